@@ -0,0 +1,7 @@
+"""
+Process start timestamp
+Imported first by main so startup timings include import cost
+"""
+import time
+
+IMPORT_STARTED = time.perf_counter()
@@ -3,7 +3,7 @@ Configuration management for SoundStage backend
 """
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-from typing import List
+from typing import List, Dict, Any
 
 
 class Settings(BaseSettings):
@@ -25,10 +25,88 @@ class Settings(BaseSettings):
     SAMPLE_RATE: int = 44100
     CHANNELS: int = 2
     BLOCKSIZE: int = 1024
+    CAPTURE_BUFFER_SECONDS: float = 10.0
+    CAPTURE_OVERRUN_POLICY: str = "drop_oldest"  # or "drop_newest"
+    DEVICE_REFRESH_SECONDS: float = 30.0  # background device rescan interval
+    
+    # Effect playback
+    OUTPUT_SAMPLE_RATE: int = 44100
+    OUTPUT_CHANNELS: int = 2
+    OUTPUT_BLOCKSIZE: int = 256
+    MIXER_MAX_VOICES: int = 8
+    MIXER_FADE_MS: float = 10.0
+    
+    # Analysis
+    ANALYSIS_WINDOW_SECONDS: float = 1.0
+    ANALYSIS_HOP_SECONDS: float = 0.25
+    ANALYSIS_SAMPLE_RATE: int = 16000  # detectors see mono at this rate; 0 = capture rate
+    ANALYSIS_FULL_RATE_DETECTORS: List[str] = ["events"]  # read the full-rate capture instead
+    ANALYSIS_DEADLINE_SECONDS: float = 0.5  # results for older audio don't fire triggers
+    # Detectors dropped first to last under load
+    ANALYSIS_SHED_ORDER: List[str] = ["keywords", "emotion", "features"]
+    ANALYSIS_POOLS: Dict[str, int] = {"analysis": 2}  # pool name -> worker processes
+    ANALYSIS_ROUTING: Dict[str, str] = {}  # detector -> pool name or "inline"
+    CAPTURE_SOURCES: Dict[str, str] = {}  # extra source name -> input device id or name
+    DETECTOR_SOURCES: Dict[str, str] = {}  # detector -> source name (default: "main")
+    ACTIVITY_OPEN_DB: float = -45.0
+    ACTIVITY_CLOSE_DB: float = -55.0
+    ACTIVITY_MAX_FLATNESS: float = 0.4  # white noise is ~0.56
+    ACTIVITY_ONSET_DB: float = 20.0  # this far above the noise floor, broadband sound opens too
+    ACTIVITY_HANGOVER_SECONDS: float = 0.5
+    KEYWORD_FUZZY_MATCHING: bool = False  # allow one-typo matches on longer words
+    EVENT_TEMPLATE_DIR: str = "~/.soundstage/templates"  # WAV clips, event name = file stem
+    
+    # Offline VOD analysis
+    VOD_CHUNK_SECONDS: float = 60.0
+    VOD_OVERLAP_SECONDS: float = 5.0  # warm-up analyzed before each chunk
+    VOD_WORKERS: int = 0  # 0 = one per CPU core
+    
+    # Remote ingest (binary PCM over WS /api/analyze/ingest)
+    REMOTE_INGEST_ENABLED: bool = False  # accept audio streamed from other machines
+    REMOTE_MAX_SESSIONS: int = 16
+    REMOTE_MAX_FRAME_BYTES: int = 65536  # sample payload per message
+    REMOTE_REORDER_FRAMES: int = 8  # frames held waiting for a missing sequence number
+    REMOTE_BUFFER_SECONDS: float = 2.0  # analysis-rate history kept per session
+    REMOTE_ANALYSIS_THREADS: int = 0  # 0 = one per CPU core
+    
+    # Trigger rules (empty = built-in defaults; see trigger_engine.DEFAULT_RULES)
+    TRIGGER_RULES: List[Dict[str, Any]] = []
+    TRIGGER_RATE_LIMIT_PER_MINUTE: float = 6.0
+    TRIGGER_RATE_LIMIT_BURST: int = 2
     
     # ElevenLabs
     ELEVENLABS_API_KEY: str = ""
     ELEVENLABS_BASE_URL: str = "https://api.elevenlabs.io/v1"
+    ELEVENLABS_SFX_MODEL: str = "eleven_text_to_sound_v2"
+    ELEVENLABS_OUTPUT_FORMAT: str = "pcm_24000"  # raw PCM so effects decode without a codec
+    ELEVENLABS_DEADLINE_SECONDS: float = 45.0
+    ELEVENLABS_MAX_RETRIES: int = 3
+    ELEVENLABS_BACKOFF_BASE_SECONDS: float = 0.5
+    ELEVENLABS_BREAKER_THRESHOLD: int = 5
+    ELEVENLABS_BREAKER_RESET_SECONDS: float = 30.0
+    
+    # Outbound HTTP pool
+    HTTP_MAX_CONNECTIONS: int = 10
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 5
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    HTTP_READ_TIMEOUT_SECONDS: float = 30.0
+    
+    # Effect prewarming
+    EFFECT_PREWARM_ENABLED: bool = True
+    EFFECT_PREWARM_CONCURRENCY: int = 2
+    EFFECT_VARIATIONS_PER_LEVEL: int = 2
+    
+    # Effect processing (once per generated effect; stored as raw float32)
+    EFFECT_PCM_DIR: str = "~/.soundstage/effects"
+    EFFECT_LOUDNESS_LUFS: float = -16.0
+    EFFECT_PEAK_DBFS: float = -1.0
+    EFFECT_TRIM_DB: float = -50.0  # leading/trailing audio this far below the peak is cut
+    
+    # WebSocket event hub
+    WS_CLIENT_QUEUE_SIZE: int = 64
+    WS_DROP_POLICY: str = "drop_oldest"  # or "drop_newest"
+    METRICS_PUBLISH_SECONDS: float = 5.0  # periodic "metrics" frame on /ws (0 = off)
     
     # Privacy & Consent
     CONSENT_REQUIRED: bool = True
@@ -36,7 +114,14 @@ class Settings(BaseSettings):
     
     # Paths
     CONFIG_DIR: str = "~/.soundstage"
+    SETTINGS_WRITE_DEBOUNCE_SECONDS: float = 0.5  # settings.json rewrites are coalesced
     AUDIO_CACHE_DIR: str = "~/.soundstage/cache"
+    AUDIO_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    
+    # Trigger history log (under CONFIG_DIR/history)
+    HISTORY_SEGMENT_RECORDS: int = 16384  # 64-byte records -> 1 MiB segments
+    HISTORY_RETENTION_DAYS: float = 30.0
+    HISTORY_MAX_SEGMENTS: int = 64
     
     class Config:
         env_file = ".env"
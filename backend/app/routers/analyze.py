@@ -2,15 +2,100 @@
 Audio analysis endpoints
 Handles emotion detection, keyword spotting, and event detection
 """
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, Set
+from dataclasses import asdict
+import asyncio
+import json
 import logging
+import os
+import time
+
+from app.core.config import get_settings
+from app.services.activity_gate import ActivityGate
+from app.services.analysis_executor import DETECTORS, AnalysisExecutor
+from app.services.analysis_scheduler import WINDOW_OUTCOMES, AnalysisScheduler
+from app.services.audio_capture import MAIN_SOURCE, AudioCaptureService
+from app.services.device_registry import get_device_registry
+from app.services.event_hub import get_event_hub
+from app.services.keyword_matcher import compile_keywords
+from app.services.metrics import get_metrics
+from app.services.remote_ingest import IngestManager, IngestSession, get_ingest_manager
+from app.services.settings_store import get_settings_store
+from app.services.trigger_engine import TriggerDecision, get_trigger_engine
+from app.services.vod_analyzer import get_vod_analyzer, read_wav_info
+from app.routers.trigger import play_effect
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Running analysis session (one per backend process)
+_session: Dict[str, Any] = {
+    "capture": None,
+    "executor": None,
+    "gates": None,
+    "scheduler": None,
+    "task": None,
+    "audio_source": None,
+    "started_at": None,
+    "last_result": None,
+}
+
+
+def _capture_stat(key: str) -> Dict[tuple, float]:
+    capture = _session["capture"]
+    return {(): capture.get_buffer_stats()[key]} if capture is not None else {}
+
+
+_metrics = get_metrics()
+_metrics.gauge(
+    "capture_buffer_frames", "Unread frames in the capture ring buffer",
+    function=lambda: _capture_stat("available")
+)
+_metrics.counter(
+    "capture_overrun_frames_total", "Captured frames lost to ring buffer overruns",
+    function=lambda: _capture_stat("overrun_frames")
+)
+
+
+def _gate_counts() -> Dict[tuple, float]:
+    counts = {}
+    for source, gate in (_session["gates"] or {}).items():
+        counts[(source, "active")] = gate.blocks_active
+        counts[(source, "skipped")] = gate.blocks_total - gate.blocks_active
+    return counts
+
+
+_metrics.counter(
+    "analysis_blocks_total", "Capture blocks seen by the activity gate", ("source", "gate"),
+    function=_gate_counts
+)
+
+
+def _scheduler_stat(key: str) -> Dict[tuple, float]:
+    scheduler = _session["scheduler"]
+    if scheduler is None:
+        return {}
+    if key == "level":
+        return {(): scheduler.level}
+    return {(outcome,): scheduler.counts[outcome] for outcome in WINDOW_OUTCOMES}
+
+
+_metrics.gauge(
+    "analysis_degradation_level", "Detectors currently shed to keep analysis on time",
+    function=lambda: _scheduler_stat("level")
+)
+_metrics.counter(
+    "analysis_windows_total", "Analysis hops by deadline outcome", ("outcome",),
+    function=lambda: _scheduler_stat("windows")
+)
+
+# Effects being fetched/played for auto-triggers (kept so tasks aren't collected)
+_auto_triggers: Set[asyncio.Task] = set()
+
 
 class AudioAnalysisRequest(BaseModel):
     """Request model for audio analysis"""
@@ -19,6 +104,18 @@ class AudioAnalysisRequest(BaseModel):
     enable_keywords: bool = True
     enable_events: bool = True
     keywords: Optional[List[str]] = None
+    # Extra inputs (source name -> device) and detector -> source routing,
+    # e.g. {"game": "3"} and {"events": "game"}; see CAPTURE_SOURCES
+    sources: Optional[Dict[str, str]] = None
+    detector_sources: Optional[Dict[str, str]] = None
+
+
+class VodAnalysisRequest(BaseModel):
+    """Request model for offline VOD analysis"""
+    path: str
+    keywords: Optional[List[str]] = None
+    sensitivity: Optional[float] = None
+    workers: Optional[int] = None
 
 
 class AudioAnalysisResponse(BaseModel):
@@ -30,6 +127,222 @@ class AudioAnalysisResponse(BaseModel):
     events_detected: Optional[List[str]] = None
 
 
+def _enabled_detectors(request: AudioAnalysisRequest) -> List[str]:
+    detectors = ["features"]
+    if request.enable_emotion:
+        detectors.append("emotion")
+    if request.enable_keywords:
+        detectors.append("keywords")
+    if request.enable_events:
+        detectors.append("events")
+    return detectors
+
+
+def _route_detectors(detectors: List[str], routing: Dict[str, str]) -> Dict[str, List[str]]:
+    """Group detectors by the capture source they analyze"""
+    by_source: Dict[str, List[str]] = {}
+    for name in detectors:
+        by_source.setdefault(routing.get(name, MAIN_SOURCE), []).append(name)
+    return by_source
+
+
+def _analysis_rate() -> Optional[int]:
+    """Rate the analysis front end resamples to (None: analyze at capture rate)"""
+    settings = get_settings()
+    rate = settings.ANALYSIS_SAMPLE_RATE
+    return rate if rate and rate != settings.SAMPLE_RATE else None
+
+
+def _shed_order() -> List[str]:
+    """Detector shed order of the active profile (settings default otherwise)"""
+    return get_settings_store().settings.get("shed_order") or get_settings().ANALYSIS_SHED_ORDER
+
+
+def _make_gate() -> ActivityGate:
+    settings = get_settings()
+    return ActivityGate(
+        blocksize=settings.BLOCKSIZE,
+        open_db=settings.ACTIVITY_OPEN_DB,
+        close_db=settings.ACTIVITY_CLOSE_DB,
+        max_flatness=settings.ACTIVITY_MAX_FLATNESS,
+        onset_db=settings.ACTIVITY_ONSET_DB,
+        hangover_blocks=int(
+            settings.ACTIVITY_HANGOVER_SECONDS * settings.SAMPLE_RATE / settings.BLOCKSIZE
+        )
+    )
+
+
+async def _auto_trigger(decision: TriggerDecision):
+    try:
+        await play_effect(
+            decision.effect, decision.intensity, source="auto", rule=decision.rule
+        )
+    except (LookupError, RuntimeError) as e:
+        logger.warning(f"Auto-trigger '{decision.rule}' failed: {e}")
+
+
+def _evaluate_triggers(result: Dict[str, Any]):
+    """Run the trigger rules over one analysis result and fire the winner"""
+    engine = get_trigger_engine()
+    if not engine.enabled:
+        return
+    emotion = result.get("emotion") or {}
+    started = time.perf_counter()
+    decision = engine.evaluate(
+        emotion.get("label"),
+        emotion.get("confidence", 0.0),
+        result.get("keywords", []),
+        result.get("events", []),
+        arousal=result.get("arousal")
+    )
+    _metrics.observe_stage("decision", time.perf_counter() - started)
+    if decision is not None:
+        task = asyncio.create_task(_auto_trigger(decision))
+        _auto_triggers.add(task)
+        task.add_done_callback(_auto_triggers.discard)
+
+
+async def _analysis_loop(
+    capture: AudioCaptureService,
+    executor: AnalysisExecutor,
+    gates: Dict[str, ActivityGate],
+    scheduler: AnalysisScheduler,
+    request: AudioAnalysisRequest,
+    routing: Dict[str, str]
+):
+    """
+    Submit the latest capture windows to the executor every hop
+    
+    New capture blocks of each source are run through that source's activity
+    gate first; detectors only run on sources whose gate opened during the
+    hop. With several sources, every window ends at the same instant on the
+    shared clock, so results from the mic and game audio line up. Detectors
+    read the mono analysis-rate buffer unless listed in
+    ANALYSIS_FULL_RATE_DETECTORS.
+    
+    The scheduler stamps each hop with a deadline: late results update the
+    meters but fire no triggers, and under sustained load it sheds detectors
+    (see AnalysisScheduler).
+    """
+    settings = get_settings()
+    analysis_rate = capture.analysis_rate or settings.SAMPLE_RATE
+    full_rate = set(settings.ANALYSIS_FULL_RATE_DETECTORS)
+    if capture.analysis_rate is None:
+        full_rate = set(DETECTORS)
+    
+    # (source, full rate?) -> detectors; each group is one window and one task
+    groups: Dict[tuple, List[str]] = {}
+    for source, names in _route_detectors(_enabled_detectors(request), routing).items():
+        for name in names:
+            groups.setdefault((source, name in full_rate), []).append(name)
+    hub = get_event_hub()
+    
+    # Compile the keyword set once up front; workers get it in canonical order
+    # so their per-process compile cache hits without re-sorting
+    keywords = compile_keywords(
+        request.keywords or [], fuzzy=settings.KEYWORD_FUZZY_MATCHING
+    ).keywords
+    
+    while True:
+        hop_started = time.monotonic()
+        active = set()
+        for source, gate in gates.items():
+            block = capture.get_audio_data(source=source)
+            while block is not None:
+                if gate.process(block):
+                    active.add(source)
+                block = capture.get_audio_data(source=source)
+        
+        # Pin windows to absolute positions so stateful detectors can tell
+        # which frames they have already seen
+        newest = capture.common_time()
+        end_time = newest if len(gates) > 1 else None
+        deadline = scheduler.stamp(newest)
+        jobs = []
+        if active and scheduler.admit(deadline):
+            for (source, full), detectors in groups.items():
+                detectors = scheduler.plan(detectors)
+                if source not in active or not detectors:
+                    continue
+                rate = settings.SAMPLE_RATE if full else analysis_rate
+                window, position = capture.aligned_window(
+                    source, end_time, int(settings.ANALYSIS_WINDOW_SECONDS * rate),
+                    analysis_rate=not full
+                )
+                if window is not None:
+                    jobs.append(executor.analyze(window, keywords, detectors, position, rate))
+        
+        level = scheduler.level
+        result: Dict[str, Any] = {}
+        on_time = False
+        if jobs:
+            started = time.perf_counter()
+            for partial in await asyncio.gather(*jobs, return_exceptions=True):
+                if isinstance(partial, Exception):
+                    logger.error(f"Analysis failed: {partial}")
+                else:
+                    result.update(partial)
+            elapsed = time.perf_counter() - started
+            on_time = scheduler.complete(deadline, elapsed)
+            if result:
+                _metrics.observe_stage("analysis", elapsed)
+                _session["last_result"] = result
+        if scheduler.level != level:
+            hub.publish("status", {"analysis": scheduler.stats()})
+        
+        if "features" in result:
+            hub.publish("meter", result["features"])
+        else:
+            # Quiet, or features shed: the gate's level still drives the meter
+            rms = 10 ** (gates[MAIN_SOURCE].last_level_db / 20)
+            hub.publish("meter", {"rms": rms, "active": MAIN_SOURCE in active})
+        # A late result describes audio the viewer has already moved past
+        if result and on_time:
+            _evaluate_triggers(result)
+            if result.get("keywords") or result.get("events") or (
+                result.get("emotion") or {}
+            ).get("label"):
+                hub.publish("detection", {
+                    "emotion": result.get("emotion"),
+                    "keywords": result.get("keywords", []),
+                    "events": result.get("events", []),
+                    "event_details": result.get("event_details", [])
+                })
+        await asyncio.sleep(scheduler.delay(hop_started))
+
+
+def _parse_device(source: str):
+    # Stable keys/names map to whatever index the device has right now
+    return get_device_registry().resolve(source, "input")
+
+
+def set_shed_order(order: Optional[List[str]]):
+    """Apply a new detector shed order to the running session, if any"""
+    scheduler = _session["scheduler"]
+    if scheduler is not None:
+        scheduler.set_shed_order(order or get_settings().ANALYSIS_SHED_ORDER)
+
+
+def switch_input_device(source: Optional[str]):
+    """
+    Move a running capture to another input device
+    
+    The capture service (and its ring buffer) is kept, so the analysis loop
+    carries on with the new device's audio. No-op when nothing is running or
+    the device is unchanged.
+    """
+    capture = _session["capture"]
+    if capture is None or source is None or source == _session["audio_source"]:
+        return
+    
+    logger.info(f"Switching audio input to {source}")
+    capture.stop_source(MAIN_SOURCE)
+    if capture.start_source(MAIN_SOURCE, _parse_device(source)):
+        _session["audio_source"] = source
+    elif not capture.start_source(MAIN_SOURCE, _parse_device(_session["audio_source"])):
+        logger.error("Failed to restore the previous audio input device")
+
+
 @router.post("/start", response_model=dict)
 async def start_analysis(request: AudioAnalysisRequest, background_tasks: BackgroundTasks):
     """
@@ -38,14 +351,96 @@ async def start_analysis(request: AudioAnalysisRequest, background_tasks: Backgr
     """
     logger.info(f"Starting audio analysis for source: {request.audio_source}")
     
-    # TODO: Implement consent check
-    # TODO: Initialize audio capture with sounddevice
-    # TODO: Start background analysis task
+    settings = get_settings()
+    if settings.CONSENT_REQUIRED and not get_settings_store().has_consent("audio_capture"):
+        raise HTTPException(status_code=403, detail="Audio capture consent has not been granted")
+    
+    if _session["task"] is not None:
+        raise HTTPException(status_code=409, detail="Audio analysis already running")
+    
+    sources = {**settings.CAPTURE_SOURCES, **(request.sources or {})}
+    routing = {**settings.DETECTOR_SOURCES, **(request.detector_sources or {})}
+    if MAIN_SOURCE in sources:
+        raise HTTPException(
+            status_code=422, detail=f"'{MAIN_SOURCE}' is the audio_source; name extra sources"
+        )
+    unknown = set(routing) - set(DETECTORS)
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown detectors: {sorted(unknown)}")
+    missing = set(routing.values()) - set(sources) - {MAIN_SOURCE}
+    if missing:
+        raise HTTPException(
+            status_code=422, detail=f"Detectors routed to undefined sources: {sorted(missing)}"
+        )
+    
+    capture = AudioCaptureService(
+        sample_rate=settings.SAMPLE_RATE,
+        channels=settings.CHANNELS,
+        blocksize=settings.BLOCKSIZE,
+        buffer_seconds=settings.CAPTURE_BUFFER_SECONDS,
+        overrun_policy=settings.CAPTURE_OVERRUN_POLICY,
+        analysis_rate=_analysis_rate()
+    )
+    for name in sources:
+        capture.add_source(name)
+    if not capture.start_capture(device_id=_parse_device(request.audio_source)):
+        raise HTTPException(status_code=500, detail="Failed to start audio capture")
+    
+    executor = None
+    try:
+        for name, device in sources.items():
+            if not capture.start_source(name, _parse_device(device)):
+                raise HTTPException(
+                    status_code=500, detail=f"Failed to start audio capture for '{name}'"
+                )
+        
+        executor = AnalysisExecutor(
+            sample_rate=settings.SAMPLE_RATE,
+            channels=settings.CHANNELS,
+            max_window_frames=int(settings.ANALYSIS_WINDOW_SECONDS * settings.SAMPLE_RATE),
+            pools=settings.ANALYSIS_POOLS,
+            routing=settings.ANALYSIS_ROUTING,
+            event_template_dir=settings.EVENT_TEMPLATE_DIR,
+            analysis_rate=_analysis_rate()
+        )
+        executor.start()
+        
+        gates = {name: _make_gate() for name in capture.sources}
+        scheduler = AnalysisScheduler(
+            hop_seconds=settings.ANALYSIS_HOP_SECONDS,
+            budget_seconds=settings.ANALYSIS_DEADLINE_SECONDS,
+            shed_order=_shed_order()
+        )
+    except Exception as e:
+        # Nothing is in the session yet, so /stop can't reach these: release
+        # the open input streams and any worker processes here
+        capture.stop_capture()
+        if executor is not None:
+            executor.shutdown()
+        if isinstance(e, HTTPException):
+            raise
+        logger.error(f"Failed to set up audio analysis: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to set up audio analysis: {e}")
+    
+    _session.update(
+        capture=capture,
+        executor=executor,
+        gates=gates,
+        scheduler=scheduler,
+        task=asyncio.create_task(
+            _analysis_loop(capture, executor, gates, scheduler, request, routing)
+        ),
+        audio_source=request.audio_source,
+        started_at=time.monotonic(),
+        last_result=None
+    )
     
     return {
         "status": "started",
         "message": "Audio analysis started successfully",
-        "audio_source": request.audio_source
+        "audio_source": request.audio_source,
+        "sources": sorted(capture.sources),
+        "detector_sources": _route_detectors(DETECTORS, routing)
     }
 
 
@@ -54,8 +449,31 @@ async def stop_analysis():
     """Stop real-time audio analysis"""
     logger.info("Stopping audio analysis")
     
-    # TODO: Stop audio capture
-    # TODO: Clean up resources
+    task = _session["task"]
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    
+    if _session["capture"] is not None:
+        _session["capture"].stop_capture()
+    if _session["executor"] is not None:
+        await asyncio.to_thread(_session["executor"].shutdown)
+    # Devices plugged in while capturing can only be seen now
+    get_device_registry().invalidate()
+    
+    _session.update(
+        capture=None,
+        executor=None,
+        gates=None,
+        scheduler=None,
+        task=None,
+        audio_source=None,
+        started_at=None,
+        last_result=None
+    )
     
     return {
         "status": "stopped",
@@ -66,27 +484,192 @@ async def stop_analysis():
 @router.get("/status")
 async def get_analysis_status():
     """Get current analysis status"""
-    # TODO: Return actual analysis state
+    active = _session["task"] is not None
     return {
-        "active": False,
-        "audio_source": None,
-        "uptime": 0
+        "active": active,
+        "audio_source": _session["audio_source"],
+        "uptime": time.monotonic() - _session["started_at"] if active else 0,
+        "last_result": _session["last_result"],
+        "activity": _session["gates"][MAIN_SOURCE].stats() if active else None,
+        "scheduler": _session["scheduler"].stats() if active else None,
+        "sources": {
+            name: {**stats, "activity": _session["gates"][name].stats()}
+            for name, stats in _session["capture"].get_source_stats().items()
+        } if active else None
     }
 
 
+@router.post("/vod")
+async def analyze_vod(request: VodAnalysisRequest):
+    """
+    Analyze a recorded VOD (WAV file on this machine) faster than real time
+    Streams the timeline as NDJSON: a start record, one record per chunk in
+    order, then a summary
+    """
+    if request.workers is not None and request.workers < 1:
+        raise HTTPException(status_code=422, detail="workers must be positive")
+    path = os.path.expanduser(request.path)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"File not found: {request.path}")
+    try:
+        read_wav_info(path)
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    
+    user_settings = get_settings_store().settings
+    sensitivity = request.sensitivity
+    if sensitivity is None:
+        sensitivity = user_settings["trigger_sensitivity"]
+    analyzer = get_vod_analyzer(
+        keywords=request.keywords,
+        sensitivity=sensitivity,
+        rules=user_settings.get("trigger_rules")
+    )
+    if request.workers:
+        # Each worker is a process; more than the cores just adds overhead
+        analyzer.workers = min(request.workers, os.cpu_count() or 1)
+    
+    async def timeline():
+        try:
+            async for record in analyzer.analyze(path):
+                yield json.dumps(record, default=str) + "\n"
+        except Exception as e:
+            logger.error(f"VOD analysis of {path} failed: {e}")
+            yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+    
+    return StreamingResponse(timeline(), media_type="application/x-ndjson")
+
+
+def _ingest_options(keywords: Optional[str], detectors: Optional[str]) -> Dict[str, Any]:
+    """IngestSession options from settings, saved user settings and query params"""
+    settings = get_settings()
+    user_settings = get_settings_store().settings
+    names = [d for d in (detectors or "").split(",") if d] or list(DETECTORS)
+    unknown = set(names) - set(DETECTORS)
+    if unknown:
+        raise ValueError(f"Unknown detectors: {sorted(unknown)}")
+    return {
+        "keywords": [k for k in (keywords or "").split(",") if k],
+        "detectors": tuple(names),
+        "analysis_rate": settings.ANALYSIS_SAMPLE_RATE or settings.SAMPLE_RATE,
+        "window_seconds": settings.ANALYSIS_WINDOW_SECONDS,
+        "hop_seconds": settings.ANALYSIS_HOP_SECONDS,
+        "buffer_seconds": settings.REMOTE_BUFFER_SECONDS,
+        "reorder_depth": settings.REMOTE_REORDER_FRAMES,
+        "max_frame_bytes": settings.REMOTE_MAX_FRAME_BYTES,
+        "event_template_dir": settings.EVENT_TEMPLATE_DIR,
+        "rules": user_settings.get("trigger_rules") or settings.TRIGGER_RULES or None,
+        "sensitivity": user_settings["trigger_sensitivity"],
+    }
+
+
+async def _send_analysis(websocket: WebSocket, manager: IngestManager, ingest: IngestSession):
+    try:
+        message = await manager.analyze(ingest)
+    except Exception as e:
+        logger.error(f"Ingest analysis for '{ingest.session_id}' failed: {e}")
+        return
+    if message is not None:
+        await websocket.send_text(json.dumps(message, default=str))
+
+
+@router.websocket("/ingest")
+async def ingest_audio(
+    websocket: WebSocket,
+    session: Optional[str] = None,
+    keywords: Optional[str] = None,
+    detectors: Optional[str] = None
+):
+    """
+    Analyze audio streamed by a remote client
+    
+    Each binary message is one PCM frame (see remote_ingest for the header);
+    analysis results come back as JSON text messages. ``keywords`` and
+    ``detectors`` are comma-separated. Malformed frames close the socket with
+    1003, and a full server refuses new sessions with 1013.
+    """
+    if not get_settings().REMOTE_INGEST_ENABLED:
+        await websocket.close(code=1008, reason="Remote ingest is disabled")
+        return
+    
+    manager = get_ingest_manager()
+    try:
+        ingest = manager.open(session, **_ingest_options(keywords, detectors))
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+    except RuntimeError as e:
+        await websocket.close(code=1013, reason=str(e))
+        return
+    
+    await websocket.accept()
+    await websocket.send_text(json.dumps({
+        "type": "session",
+        "session": ingest.session_id,
+        "analysis_rate": ingest.analysis_rate,
+        "max_frame_bytes": ingest.max_frame_bytes,
+    }))
+    
+    # At most one analysis in flight; frames keep arriving meanwhile
+    pending: Optional[asyncio.Task] = None
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            data = message.get("bytes")
+            if data is None:
+                continue
+            try:
+                due = ingest.receive(data)
+            except ValueError as e:
+                await websocket.close(code=1003, reason=str(e))
+                break
+            if due and (pending is None or pending.done()):
+                pending = asyncio.create_task(_send_analysis(websocket, manager, ingest))
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Ingest session '{ingest.session_id}' error: {e}")
+    finally:
+        if pending is not None:
+            pending.cancel()
+        manager.close_session(ingest.session_id)
+
+
+@router.get("/ingest/sessions")
+async def list_ingest_sessions():
+    """Open remote ingest sessions with their loss, memory and analysis counters"""
+    return get_ingest_manager().stats()
+
+
 @router.get("/audio-devices")
-async def list_audio_devices():
-    """List available audio input devices"""
-    # TODO: Use sounddevice to enumerate devices
-    logger.info("Listing audio devices")
+async def list_audio_devices(kind: str = "input"):
+    """
+    List audio devices (input, output or all)
+    Served from the device registry's cache; use the device ``key`` to
+    refer to a device, since indices change when devices come and go
+    """
+    if kind not in ("input", "output", "all"):
+        raise HTTPException(status_code=422, detail="kind must be input, output or all")
     
+    registry = get_device_registry()
+    if not registry.is_loaded:
+        await registry.refresh()
+    return {
+        "devices": [asdict(device) for device in registry.devices(kind)],
+        "version": registry.version,
+        "refreshed_at": registry.refreshed_at
+    }
+
+
+@router.post("/audio-devices/refresh")
+async def refresh_audio_devices():
+    """Re-enumerate devices now (picks up hot-plugged devices when no stream is open)"""
+    registry = get_device_registry()
+    changed = await registry.refresh(rescan=True)
     return {
-        "devices": [
-            {
-                "id": 0,
-                "name": "Default Microphone",
-                "type": "input",
-                "channels": 2
-            }
-        ]
+        "changed": changed,
+        "devices": [asdict(device) for device in registry.devices("all")],
+        "version": registry.version
     }
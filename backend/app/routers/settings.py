@@ -4,13 +4,27 @@ Handles user preferences, consent, API keys, and profiles
 """
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import Optional, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Any
+import asyncio
 import logging
 
+from app.core.config import get_settings
+from app.services.analysis_executor import DETECTORS
+from app.services.audio_output import get_effect_mixer
+from app.services.device_registry import get_device_registry
+from app.services.effect_library import EFFECT_CATALOG, get_effect_library
+from app.services.settings_store import get_settings_store
+from app.services.trigger_engine import DEFAULT_RULES, TriggerRule, get_trigger_engine
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Device switches stop and start PortAudio streams (blocking); one worker
+# keeps them off the event loop and applies them in the order they were made
+_device_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="device-switch")
+
 
 class ConsentRequest(BaseModel):
     """User consent for audio capture"""
@@ -36,6 +50,91 @@ class UserSettings(BaseModel):
     elevenlabs_api_key: Optional[str] = None
     effect_volume: float = 0.8
     hotkeys_enabled: bool = True
+    trigger_rules: Optional[List[Dict[str, Any]]] = None  # None = built-in rules
+    shed_order: Optional[List[str]] = None  # detectors dropped first under load; None = default
+
+
+def _parse_device(device: Optional[str]):
+    return get_device_registry().resolve(device, "output")
+
+
+def _switch_output_device(device_id: Optional[str]):
+    mixer = get_effect_mixer()
+    device = _parse_device(device_id)
+    if mixer.is_running:
+        mixer.stop()
+        mixer.start(device)
+    else:
+        mixer.device = device
+
+
+def _log_device_error(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Audio device switch failed: {future.exception()}")
+
+
+def _switch_device(fn, device_id: Optional[str]):
+    """Run a device switch on the device worker, or inline without an event loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        fn(device_id)
+        return
+    _device_executor.submit(fn, device_id).add_done_callback(_log_device_error)
+
+
+def apply_user_settings(changed: Dict[str, Any]):
+    """
+    Push changed settings into the running services
+    
+    Only the services whose settings changed are touched, so e.g. a profile
+    that keeps the same devices doesn't restart any audio stream. Device
+    switches run in the background when called from the event loop.
+    """
+    engine = get_trigger_engine()
+    if "effect_volume" in changed:
+        get_effect_mixer().set_volume(changed["effect_volume"])
+    if "trigger_sensitivity" in changed:
+        engine.sensitivity = changed["trigger_sensitivity"]
+    if "auto_trigger_enabled" in changed:
+        engine.enabled = changed["auto_trigger_enabled"]
+    if "trigger_rules" in changed:
+        engine.load_rules(
+            changed["trigger_rules"] or get_settings().TRIGGER_RULES or DEFAULT_RULES
+        )
+    if "elevenlabs_api_key" in changed:
+        service = get_effect_library().service
+        service.api_key = changed["elevenlabs_api_key"] or get_settings().ELEVENLABS_API_KEY
+    if "audio_output_device" in changed:
+        _switch_device(_switch_output_device, changed["audio_output_device"])
+    if "audio_input_device" in changed:
+        # Imported here: the analyze router imports this module's dependencies
+        from app.routers.analyze import switch_input_device
+        _switch_device(switch_input_device, changed["audio_input_device"])
+    if "shed_order" in changed:
+        from app.routers.analyze import set_shed_order
+        set_shed_order(changed["shed_order"])
+
+
+def _validate(changes: Dict[str, Any]):
+    for key in ("trigger_sensitivity", "effect_volume"):
+        if key in changes and not 0.0 <= changes[key] <= 1.0:
+            raise HTTPException(status_code=422, detail=f"{key} must be between 0.0 and 1.0")
+    unknown = set(changes.get("shed_order") or []) - set(DETECTORS)
+    if unknown:
+        raise HTTPException(
+            status_code=422, detail=f"Unknown detectors in shed_order: {sorted(unknown)}"
+        )
+    for rule in changes.get("trigger_rules") or []:
+        try:
+            TriggerRule.from_dict(dict(rule), effects=EFFECT_CATALOG)
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=422, detail=f"Invalid trigger rule: {e}")
+
+
+def _public(values: Dict[str, Any]) -> UserSettings:
+    # The API key is write-only
+    return UserSettings(**{**values, "elevenlabs_api_key": None})
 
 
 @router.post("/consent", response_model=ConsentResponse)
@@ -46,28 +145,29 @@ async def set_consent(request: ConsentRequest):
     """
     logger.info(f"Consent updated: {request}")
     
-    # TODO: Persist consent to local storage
-    # TODO: Validate required consents are granted
-    
-    from datetime import datetime
-    
-    return ConsentResponse(
+    consent = get_settings_store().set_consent(
         audio_capture=request.audio_capture_consent,
         cloud_processing=request.cloud_processing_consent,
-        analytics=request.analytics_consent,
-        timestamp=datetime.utcnow().isoformat()
+        analytics=request.analytics_consent
+    )
+    
+    return ConsentResponse(
+        audio_capture=consent["audio_capture"],
+        cloud_processing=consent["cloud_processing"],
+        analytics=consent["analytics"],
+        timestamp=consent["timestamp"]
     )
 
 
 @router.get("/consent")
 async def get_consent():
     """Get current consent status"""
-    # TODO: Load consent from storage
+    consent = get_settings_store().consent
     return {
-        "audio_capture": False,
-        "cloud_processing": False,
-        "analytics": False,
-        "consent_required": True
+        "audio_capture": consent["audio_capture"],
+        "cloud_processing": consent["cloud_processing"],
+        "analytics": consent["analytics"],
+        "consent_required": get_settings().CONSENT_REQUIRED and not consent["audio_capture"]
     }
 
 
@@ -76,25 +176,19 @@ async def update_settings(settings: UserSettings):
     """Update user settings"""
     logger.info("Updating user settings")
     
-    # TODO: Validate settings
-    # TODO: Persist to storage
-    # TODO: Apply settings to active services
+    # Only fields the client sent; omitted ones keep their stored values
+    changes = settings.model_dump(exclude_unset=True)
+    _validate(changes)
+    store = get_settings_store()
+    store.update(changes)
     
-    return settings
+    return _public(store.settings)
 
 
 @router.get("/current")
 async def get_current_settings():
     """Get current user settings"""
-    # TODO: Load from storage
-    return UserSettings(
-        audio_input_device=None,
-        audio_output_device=None,
-        auto_trigger_enabled=False,
-        trigger_sensitivity=0.5,
-        effect_volume=0.8,
-        hotkeys_enabled=True
-    )
+    return _public(get_settings_store().settings)
 
 
 @router.post("/profile/save")
@@ -102,7 +196,9 @@ async def save_profile(profile_name: str):
     """Save current settings as a named profile"""
     logger.info(f"Saving profile: {profile_name}")
     
-    # TODO: Persist profile
+    if not profile_name.strip():
+        raise HTTPException(status_code=422, detail="Profile name is required")
+    get_settings_store().save_profile(profile_name)
     
     return {
         "status": "saved",
@@ -113,9 +209,8 @@ async def save_profile(profile_name: str):
 @router.get("/profile/list")
 async def list_profiles():
     """List all saved profiles"""
-    # TODO: Load from storage
     return {
-        "profiles": []
+        "profiles": get_settings_store().list_profiles()
     }
 
 
@@ -124,9 +219,13 @@ async def load_profile(profile_name: str):
     """Load a saved profile"""
     logger.info(f"Loading profile: {profile_name}")
     
-    # TODO: Load and apply profile
+    try:
+        changed = get_settings_store().load_profile(profile_name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Profile not found: {profile_name}")
     
     return {
         "status": "loaded",
-        "profile_name": profile_name
+        "profile_name": profile_name,
+        "changed": sorted(changed)
     }
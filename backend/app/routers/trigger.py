@@ -2,10 +2,20 @@
 Sound effect triggering endpoints
 Handles both automatic and manual SFX triggering via ElevenLabs
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from pydantic import BaseModel
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Any
 import logging
+import time
+
+from app.services.audio_codec import float_wav_header
+from app.services.audio_output import get_effect_mixer
+from app.services.effect_library import EFFECT_CATALOG, get_effect_library
+from app.services.event_hub import get_event_hub
+from app.services.metrics import get_metrics
+from app.services.settings_store import get_settings_store
+from app.services.trigger_engine import TriggerRule, get_trigger_engine
+from app.services.trigger_history import get_trigger_history
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +37,43 @@ class TriggerResponse(BaseModel):
     audio_url: Optional[str] = None
 
 
+async def play_effect(effect_type: str, intensity: float, source: str, **details) -> str:
+    """
+    Fetch an effect variation, play it, and announce it on the event hub
+    
+    Raises:
+        LookupError: No audio is available for the effect
+        RuntimeError: The output device could not be opened
+    
+    Returns:
+        The played variation's effect_id
+    """
+    started = time.perf_counter()
+    picked = await get_effect_library().get_or_generate(effect_type, intensity)
+    if picked is None:
+        raise LookupError(f"Effect audio is not available: {effect_type}")
+    
+    effect_id, pcm = picked
+    
+    mixer = get_effect_mixer()
+    if not mixer.is_running and not mixer.start(mixer.device):
+        raise RuntimeError("Audio output device unavailable")
+    mixer.play(pcm)
+    # Request to audio handed to the mixer, including any generation wait
+    get_metrics().observe_stage("playback", time.perf_counter() - started)
+    
+    get_trigger_history().append(
+        effect_id, intensity=intensity, source=source, rule=details.get("rule")
+    )
+    get_event_hub().publish("trigger", {
+        "effect_type": effect_type,
+        "effect_id": effect_id,
+        "source": source,
+        **details
+    })
+    return effect_id
+
+
 @router.post("/manual", response_model=TriggerResponse)
 async def trigger_manual_effect(request: TriggerRequest):
     """
@@ -35,13 +82,23 @@ async def trigger_manual_effect(request: TriggerRequest):
     """
     logger.info(f"Manual trigger requested: {request.effect_type}")
     
-    # TODO: Validate effect_type
-    # TODO: Generate SFX using ElevenLabs
-    # TODO: Play audio through selected output device
+    if request.effect_type not in EFFECT_CATALOG:
+        raise HTTPException(status_code=404, detail=f"Unknown effect: {request.effect_type}")
+    
+    try:
+        effect_id = await play_effect(
+            request.effect_type,
+            request.intensity if request.intensity is not None else 0.5,
+            source="manual"
+        )
+    except LookupError:
+        raise HTTPException(status_code=503, detail="Effect audio is not available")
+    except RuntimeError:
+        raise HTTPException(status_code=500, detail="Audio output device unavailable")
     
     return TriggerResponse(
         status="triggered",
-        effect_id="temp_id_123",
+        effect_id=effect_id,
         audio_url=None
     )
 
@@ -51,7 +108,7 @@ async def enable_auto_trigger():
     """Enable automatic effect triggering based on analysis"""
     logger.info("Enabling auto-trigger")
     
-    # TODO: Enable automatic triggering logic
+    get_settings_store().update({"auto_trigger_enabled": True})
     
     return {
         "status": "enabled",
@@ -64,7 +121,7 @@ async def disable_auto_trigger():
     """Disable automatic effect triggering"""
     logger.info("Disabling auto-trigger")
     
-    # TODO: Disable automatic triggering
+    get_settings_store().update({"auto_trigger_enabled": False})
     
     return {
         "status": "disabled",
@@ -72,27 +129,76 @@ async def disable_auto_trigger():
     }
 
 
+@router.get("/rules")
+async def get_trigger_rules():
+    """Active trigger rules with fired/suppressed counts"""
+    return get_trigger_engine().stats()
+
+
+@router.post("/rules")
+async def set_trigger_rules(rules: List[Dict[str, Any]]):
+    """Replace the trigger rule set (counters and cooldowns reset) and save it"""
+    try:
+        for rule in rules:
+            TriggerRule.from_dict(dict(rule), effects=EFFECT_CATALOG)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    # The settings store applies it to the engine through its change listener
+    get_settings_store().update({"trigger_rules": rules})
+    return get_trigger_engine().stats()
+
+
 @router.get("/effects")
 async def list_available_effects():
     """List all available sound effects"""
-    # TODO: Return list of configured/available effects
+    library = get_effect_library()
     return {
-        "effects": [
-            {"id": "cheer", "name": "Cheer", "category": "positive"},
-            {"id": "applause", "name": "Applause", "category": "positive"},
-            {"id": "laugh", "name": "Laugh", "category": "positive"},
-            {"id": "boo", "name": "Boo", "category": "negative"},
-            {"id": "gasp", "name": "Gasp", "category": "reaction"},
-            {"id": "wow", "name": "Wow", "category": "reaction"},
-        ]
+        "effects": library.list_effects(),
+        "prewarm": library.status()
     }
 
 
+@router.get("/effects/{effect_type}/preview")
+async def preview_effect(effect_type: str, intensity: float = 0.5):
+    """
+    Download a ready variation as a float32 WAV for previewing in the UI
+    Served from the processed effect files; nothing is generated
+    """
+    if effect_type not in EFFECT_CATALOG:
+        raise HTTPException(status_code=404, detail=f"Unknown effect: {effect_type}")
+    library = get_effect_library()
+    picked = library.pick(effect_type, intensity)
+    if picked is None:
+        raise HTTPException(status_code=404, detail=f"Effect audio is not ready: {effect_type}")
+    
+    effect_id, pcm = picked
+    header = float_wav_header(pcm.shape[0], pcm.shape[1], library.store.output_rate)
+    return Response(
+        content=header + pcm.tobytes(),
+        media_type="audio/wav",
+        headers={"X-Effect-Id": effect_id}
+    )
+
+
 @router.get("/history")
-async def get_trigger_history(limit: int = 50):
-    """Get recent trigger history"""
-    # TODO: Return actual trigger history from storage
+async def get_recent_triggers(
+    limit: int = 50,
+    since: Optional[float] = None,
+    until: Optional[float] = None
+):
+    """
+    Get recent trigger history, newest first
+    
+    since/until are Unix timestamps; without them the newest records are returned.
+    """
+    if limit < 1:
+        raise HTTPException(status_code=422, detail="limit must be positive")
+    history = get_trigger_history()
+    if since is None and until is None:
+        records = history.last(limit)
+    else:
+        records = history.range(since=since, until=until, limit=limit)
     return {
-        "history": [],
-        "count": 0
+        "history": records,
+        "count": len(records)
     }
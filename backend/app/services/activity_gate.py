@@ -0,0 +1,163 @@
+"""
+Energy/spectral-flatness activity gate
+Decides per capture block whether the detectors are worth running at all
+"""
+import math
+import numpy as np
+import logging
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+EPSILON = 1e-10
+
+
+class ActivityGate:
+    """
+    Hysteresis gate in front of the analysis detectors
+
+    A block opens the gate when it is loud enough (relative to both an
+    absolute threshold and a slowly tracked noise floor). Close to the floor
+    it must also not be noise-like (spectral flatness below ``max_flatness``),
+    which keeps hiss and fan noise out; ``onset_db`` or more above the floor,
+    broadband sound (explosions, applause, impacts) opens the gate too. Once
+    open, the gate only closes after ``hangover_blocks`` blocks that are
+    under the lower close threshold or noise-like near the floor, so word
+    gaps don't chop analysis up. Noise-like blocks pull the floor up faster, so a steady hiss
+    that started loud settles into the floor instead of holding the gate open.
+
+    Quiet blocks cost one downmix and one dot product; the small FFT for the
+    flatness check only runs when the level test passes.
+    """
+
+    def __init__(
+        self,
+        blocksize: int = 1024,
+        open_db: float = -45.0,
+        close_db: float = -55.0,
+        floor_margin_db: float = 10.0,
+        max_flatness: float = 0.4,
+        hangover_blocks: int = 20,
+        onset_db: float = 20.0,
+        noise_rise_db: float = 0.5
+    ):
+        self.open_db = open_db
+        self.close_db = close_db
+        self.floor_margin_db = floor_margin_db
+        self.max_flatness = max_flatness
+        self.hangover_blocks = hangover_blocks
+        self.onset_db = onset_db
+        self.noise_rise_db = noise_rise_db
+
+        self.window = np.hanning(blocksize).astype(np.float32)
+        self._windowed = np.zeros(blocksize, dtype=np.float32)
+        self._mono = np.zeros(blocksize, dtype=np.float32)
+
+        self.noise_floor_db = close_db
+        self.active = False
+        self._hangover = 0
+        self.last_level_db = -100.0
+        self.last_flatness = 1.0
+
+        self.blocks_total = 0
+        self.blocks_active = 0
+
+    def _mono_view(self, block: np.ndarray) -> np.ndarray:
+        frames = block.shape[0]
+        if frames > self._mono.shape[0]:
+            self._mono = np.zeros(frames, dtype=np.float32)
+        mono = self._mono[:frames]
+        if block.ndim == 2 and block.shape[1] > 1:
+            np.mean(block, axis=1, out=mono)
+        else:
+            np.copyto(mono, block.reshape(frames))
+        return mono
+
+    def _flatness(self, mono: np.ndarray) -> float:
+        frames = mono.shape[0]
+        if frames != self.window.shape[0]:
+            self.window = np.hanning(frames).astype(np.float32)
+            self._windowed = np.zeros(frames, dtype=np.float32)
+        np.multiply(mono, self.window, out=self._windowed)
+        spectrum = np.fft.rfft(self._windowed)
+        power = spectrum.real * spectrum.real + spectrum.imag * spectrum.imag
+        power += EPSILON
+        return float(np.exp(np.mean(np.log(power))) / np.mean(power))
+
+    def process(self, block: np.ndarray) -> bool:
+        """
+        Update the gate with one raw capture block
+
+        Args:
+            block: Audio block, mono or (frames, channels)
+
+        Returns:
+            True if the detectors should run for this block
+        """
+        self.blocks_total += 1
+        frames = block.shape[0]
+        if frames == 0:
+            return self.active
+
+        mono = self._mono_view(block)
+        level_db = 10.0 * math.log10(float(np.dot(mono, mono)) / frames + EPSILON)
+        self.last_level_db = level_db
+
+        if self.active:
+            threshold = self.close_db
+        else:
+            threshold = max(self.open_db, self.noise_floor_db + self.floor_margin_db)
+
+        signal = level_db >= threshold
+        noise_like = False
+        if signal:
+            # Only pay for the FFT when the level test passes
+            self.last_flatness = self._flatness(mono)
+            noise_like = self.last_flatness > self.max_flatness
+            if noise_like and level_db - self.noise_floor_db < self.onset_db:
+                signal = False
+
+        if signal:
+            self.active = True
+            self._hangover = self.hangover_blocks
+        elif self.active:
+            if self._hangover > 0:
+                self._hangover -= 1
+            else:
+                self.active = False
+
+        # Noise floor: drops immediately, rises slowly (~0.05 dB per block),
+        # faster through noise-like blocks
+        if level_db < self.noise_floor_db:
+            self.noise_floor_db = level_db
+        else:
+            self.noise_floor_db += self.noise_rise_db if noise_like else 0.05
+
+        if self.active:
+            self.blocks_active += 1
+        return self.active
+
+    @property
+    def skipped_fraction(self) -> float:
+        """Fraction of blocks for which detectors were skipped"""
+        if self.blocks_total == 0:
+            return 0.0
+        return 1.0 - self.blocks_active / self.blocks_total
+
+    def reset(self):
+        self.active = False
+        self._hangover = 0
+        self.noise_floor_db = self.close_db
+        self.blocks_total = 0
+        self.blocks_active = 0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "active": self.active,
+            "level_db": self.last_level_db,
+            "noise_floor_db": self.noise_floor_db,
+            "flatness": self.last_flatness,
+            "blocks_total": self.blocks_total,
+            "blocks_active": self.blocks_active,
+            "skipped_fraction": self.skipped_fraction,
+        }
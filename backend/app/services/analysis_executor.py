@@ -0,0 +1,351 @@
+"""
+Process-pool analysis executor
+Runs AudioAnalyzer detectors in worker processes so they never hold the
+event loop's GIL. Audio windows travel through shared memory, not pickles.
+"""
+import asyncio
+import logging
+import threading
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+
+from app.core.config import get_settings
+from app.services.audio_analyzer import AudioAnalyzer
+from app.services.keyword_matcher import compile_keywords
+
+logger = logging.getLogger(__name__)
+
+DETECTORS = ("features", "emotion", "keywords", "events")
+
+# Route name that runs a detector in the API process (on a thread)
+INLINE = "inline"
+
+DEFAULT_ROUTING: Dict[str, str] = {
+    "features": INLINE,
+    "emotion": "analysis",
+    # Keyword matching and event detection keep streaming state, so they must
+    # see every window in order on one analyzer
+    "keywords": INLINE,
+    "events": INLINE,
+}
+
+
+def run_detectors(
+    analyzer: AudioAnalyzer,
+    window: np.ndarray,
+    detectors: Iterable[str],
+    keywords: Optional[List[str]] = None,
+    stream_position: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Run a set of detectors over one window with a single shared FFT pass
+
+    Args:
+        analyzer: Analyzer instance to use
+        window: Audio window, mono or (frames, channels)
+        detectors: Names from DETECTORS
+        keywords: Keywords for the keyword detector
+        stream_position: Absolute capture frame index at the window's end
+
+    Returns:
+        Mapping of detector name to its (JSON-friendly) result, plus
+        "arousal" (None until the baseline is warm) when events run
+    """
+    detectors = set(detectors)
+    # The streaming event detector keeps its own framing, so skip the shared
+    # FFT pass when nothing else needs it
+    features = None
+    if detectors & {"features", "emotion", "keywords"}:
+        features = analyzer.extract_features(window)
+    results: Dict[str, Any] = {}
+
+    if "features" in detectors:
+        results["features"] = analyzer.analyze_audio_features(window, features)
+    if "emotion" in detectors:
+        emotion, confidence = analyzer.analyze_emotion(window, features)
+        results["emotion"] = {"label": emotion, "confidence": confidence}
+    if "keywords" in detectors:
+        # Compiled once per keyword set per process, then served from cache
+        automaton = compile_keywords(
+            keywords or [], fuzzy=get_settings().KEYWORD_FUZZY_MATCHING
+        )
+        results["keywords"] = analyzer.detect_keywords(window, automaton, features)
+    if "events" in detectors:
+        results["events"] = analyzer.detect_events(window, features, stream_position)
+        results["event_details"] = [
+            {"name": e.name, "time": e.time, "score": e.score, "latency_ms": e.latency_ms}
+            for e in analyzer.last_events
+        ]
+        # The loudness baseline also needs every frame once, in stream order,
+        # so it rides along with event detection
+        analyzer.update_baseline(window, stream_position)
+        results["arousal"] = (
+            analyzer.get_arousal() if analyzer.aggregator.is_warm("2s") else None
+        )
+
+    return results
+
+
+# Per-worker-process state (set up by _init_worker): one analyzer per rate
+_worker_analyzers: Dict[int, AudioAnalyzer] = {}
+_worker_segments: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _init_worker(sample_rates: Tuple[int, ...], event_template_dir: Optional[str] = None):
+    for rate in sample_rates:
+        _worker_analyzers[rate] = AudioAnalyzer(
+            sample_rate=rate, event_template_dir=event_template_dir
+        )
+
+
+def _run_in_worker(
+    segment_name: str,
+    shape: tuple,
+    detectors: List[str],
+    keywords: Optional[List[str]],
+    stream_position: Optional[int],
+    sample_rate: int
+) -> Dict[str, Any]:
+    """Worker entry point: attach to the window's segment and run detectors"""
+    segment = _worker_segments.get(segment_name)
+    if segment is None:
+        segment = shared_memory.SharedMemory(name=segment_name)
+        _worker_segments[segment_name] = segment
+
+    window = np.ndarray(shape, dtype=np.float32, buffer=segment.buf)
+    return run_detectors(
+        _worker_analyzers[sample_rate], window, detectors, keywords, stream_position
+    )
+
+
+class SharedWindowPool:
+    """
+    Fixed set of shared-memory slots for audio windows
+
+    Slots are created once and recycled; acquiring waits when all slots are
+    in flight, which naturally applies backpressure to the producer. Windows
+    with fewer channels than the slot (e.g. a mono mic next to stereo game
+    audio) are packed contiguously at the start of the slot.
+    """
+
+    def __init__(self, slots: int, max_frames: int, channels: int):
+        self.max_frames = max_frames
+        self.channels = channels
+        nbytes = max_frames * channels * np.dtype(np.float32).itemsize
+        self.segments = [
+            shared_memory.SharedMemory(create=True, size=nbytes) for _ in range(slots)
+        ]
+        self.arrays = [
+            np.ndarray(max_frames * channels, dtype=np.float32, buffer=s.buf)
+            for s in self.segments
+        ]
+        self._free = deque(range(slots))
+        self._available = asyncio.Semaphore(slots)
+
+    async def put(self, window: np.ndarray) -> int:
+        """Copy a window into a free slot and return the slot index"""
+        if window.ndim == 1:
+            window = window.reshape(-1, 1)
+        frames, channels = window.shape
+        if frames > self.max_frames or channels > self.channels:
+            raise ValueError(
+                f"Window {window.shape} does not fit slot ({self.max_frames}, {self.channels})"
+            )
+
+        await self._available.acquire()
+        slot = self._free.popleft()
+        np.copyto(self.view(slot, window.shape), window)
+        return slot
+
+    def view(self, slot: int, shape: tuple) -> np.ndarray:
+        """The window stored in a slot, shaped (frames, channels)"""
+        frames, channels = shape
+        return self.arrays[slot][:frames * channels].reshape(frames, channels)
+
+    def release(self, slot: int):
+        self._free.append(slot)
+        self._available.release()
+
+    def close(self):
+        self.arrays = []
+        for segment in self.segments:
+            try:
+                segment.close()
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+        self.segments = []
+
+
+class AnalysisExecutor:
+    """
+    Dispatches analysis windows to worker process pools
+
+    ``pools`` maps a pool name to its worker count and ``routing`` maps each
+    detector to a pool name (or ``"inline"`` to run in this process on a
+    thread). Detectors routed to the same pool run as one task so they share
+    the window's FFT pass. Every process holds an analyzer for the capture
+    rate and, if set, the (lower) ``analysis_rate``; each window says which
+    rate it is at.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 44100,
+        channels: int = 2,
+        max_window_frames: int = 44100 * 2,
+        pools: Optional[Dict[str, int]] = None,
+        routing: Optional[Dict[str, str]] = None,
+        slots: Optional[int] = None,
+        event_template_dir: Optional[str] = None,
+        analysis_rate: Optional[int] = None
+    ):
+        self.sample_rate = sample_rate
+        self.sample_rates = tuple(sorted({sample_rate, analysis_rate or sample_rate}))
+        self.channels = channels
+        self.max_window_frames = max_window_frames
+        self.pool_sizes = dict(pools or {"analysis": 2})
+        self.routing = {**DEFAULT_ROUTING, **(routing or {})}
+        self.event_template_dir = event_template_dir
+
+        unknown = set(self.routing.values()) - set(self.pool_sizes) - {INLINE}
+        if unknown:
+            raise ValueError(f"Detectors routed to undefined pools: {sorted(unknown)}")
+
+        self.slots = slots or 2 * max(sum(self.pool_sizes.values()), 1)
+        self.executors: Dict[str, ProcessPoolExecutor] = {}
+        self.window_pool: Optional[SharedWindowPool] = None
+        self._inline_analyzers: Dict[int, AudioAnalyzer] = {}
+        # Inline analyzers reuse preallocated buffers, so one window at a time
+        self._inline_lock = threading.Lock()
+        self.windows_processed = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self.window_pool is not None
+
+    def start(self):
+        """Spawn worker processes and allocate shared-memory slots"""
+        if self.is_running:
+            return
+
+        self.window_pool = SharedWindowPool(
+            self.slots, self.max_window_frames, self.channels
+        )
+        used_pools = set(self.routing.values()) - {INLINE}
+        for name in used_pools:
+            self.executors[name] = ProcessPoolExecutor(
+                max_workers=self.pool_sizes[name],
+                initializer=_init_worker,
+                initargs=(self.sample_rates, self.event_template_dir)
+            )
+        if INLINE in self.routing.values():
+            self._inline_analyzers = {
+                rate: AudioAnalyzer(sample_rate=rate, event_template_dir=self.event_template_dir)
+                for rate in self.sample_rates
+            }
+
+        logger.info(
+            f"Analysis executor started: pools={self.pool_sizes}, routing={self.routing}"
+        )
+
+    async def analyze(
+        self,
+        window: np.ndarray,
+        keywords: Optional[List[str]] = None,
+        detectors: Optional[Iterable[str]] = None,
+        stream_position: Optional[int] = None,
+        sample_rate: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze one audio window across the configured pools
+
+        Args:
+            window: Audio window of shape (frames, channels)
+            keywords: Keywords for the keyword detector
+            detectors: Subset of detectors to run (defaults to all)
+            stream_position: Absolute capture frame index at the window's end,
+                so stateful detectors only consume frames they haven't seen
+            sample_rate: Rate of the window (defaults to the capture rate)
+
+        Returns:
+            Mapping of detector name to result
+        """
+        if not self.is_running:
+            raise RuntimeError("Analysis executor is not running")
+        sample_rate = sample_rate or self.sample_rate
+        if sample_rate not in self.sample_rates:
+            raise ValueError(f"No analyzer for {sample_rate} Hz windows")
+
+        wanted = set(detectors or DETECTORS)
+        by_route: Dict[str, List[str]] = {}
+        for name in DETECTORS:
+            if name in wanted:
+                by_route.setdefault(self.routing[name], []).append(name)
+
+        window_pool = self.window_pool
+        slot = await window_pool.put(window)
+        shape = window.shape if window.ndim == 2 else (window.shape[0], 1)
+        loop = asyncio.get_running_loop()
+
+        tasks = []
+        try:
+            for route, names in by_route.items():
+                if route == INLINE:
+                    view = window_pool.view(slot, shape)
+                    tasks.append(asyncio.ensure_future(asyncio.to_thread(
+                        self._run_inline, view, names, keywords, stream_position, sample_rate
+                    )))
+                else:
+                    tasks.append(loop.run_in_executor(
+                        self.executors[route],
+                        _run_in_worker,
+                        window_pool.segments[slot].name,
+                        shape,
+                        names,
+                        keywords,
+                        stream_position,
+                        sample_rate
+                    ))
+        finally:
+            # Workers and the inline thread read the slot until they finish,
+            # even if this call is cancelled or another route fails first, so
+            # it is only recycled once every one of them is done
+            readers = asyncio.gather(*tasks, return_exceptions=True)
+            readers.add_done_callback(lambda _: window_pool.release(slot))
+
+        results: Dict[str, Any] = {}
+        for partial in await asyncio.shield(readers):
+            if isinstance(partial, BaseException):
+                raise partial
+            results.update(partial)
+
+        self.windows_processed += 1
+        return results
+
+    def _run_inline(
+        self,
+        window: np.ndarray,
+        detectors: List[str],
+        keywords: Optional[List[str]],
+        stream_position: Optional[int],
+        sample_rate: int
+    ) -> Dict[str, Any]:
+        with self._inline_lock:
+            return run_detectors(
+                self._inline_analyzers[sample_rate], window, detectors, keywords, stream_position
+            )
+
+    def shutdown(self):
+        """Stop workers and free shared memory"""
+        for executor in self.executors.values():
+            executor.shutdown(wait=True, cancel_futures=True)
+        self.executors = {}
+        if self.window_pool:
+            self.window_pool.close()
+            self.window_pool = None
+        self._inline_analyzers = {}
+        logger.info("Analysis executor stopped")
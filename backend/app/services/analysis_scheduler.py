@@ -0,0 +1,180 @@
+"""
+Deadline-aware scheduling for live analysis
+Keeps detections timely by dropping stale work and shedding detectors under load
+"""
+import time
+import logging
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Shed first to last; event detection is cheap and streaming, so it stays on
+DEFAULT_SHED_ORDER = ("keywords", "emotion", "features")
+
+WINDOW_OUTCOMES = ("on_time", "late", "dropped", "merged")
+
+
+class AnalysisScheduler:
+    """
+    Deadline bookkeeping and graceful degradation for the analysis loop
+
+    Every hop is stamped with a deadline: the capture time of its newest
+    frame plus ``budget_seconds``. A hop whose audio is already past the
+    deadline when it would be submitted is dropped; a result that completes
+    after it is late, and late results never fire triggers (an effect for
+    audio from seconds ago is worse than none). Hops missed while analysis
+    ran long are merged: the next window simply covers them.
+
+    When analysis keeps missing its deadline or takes longer than a hop, the
+    degradation level goes up by one and the next detector in ``shed_order``
+    stops running. After ``recover_after`` hops that finish well within the
+    hop (under ``headroom`` of it), one detector is restored. If restoring it
+    overloads the loop again, the wait before the next attempt doubles, so
+    the level settles instead of flapping.
+    """
+
+    def __init__(
+        self,
+        hop_seconds: float,
+        budget_seconds: float,
+        shed_order: Iterable[str] = DEFAULT_SHED_ORDER,
+        raise_after: int = 2,
+        recover_after: int = 20,
+        headroom: float = 0.5
+    ):
+        self.hop_seconds = hop_seconds
+        self.budget_seconds = budget_seconds
+        self.shed_order: Tuple[str, ...] = tuple(shed_order)
+        self.raise_after = raise_after
+        self.recover_after = recover_after
+        self.headroom = headroom
+
+        self.level = 0
+        self._overloaded = 0
+        self._relaxed = 0
+        self._recover_hops = recover_after
+        self._restored = False  # last change restored a detector, not proven yet
+        self._held = 0
+        self.counts = dict.fromkeys(WINDOW_OUTCOMES, 0)
+        self.level_changes = 0
+        self.last_elapsed = 0.0
+        self.last_lateness = 0.0
+
+    @property
+    def max_level(self) -> int:
+        return len(self.shed_order)
+
+    @property
+    def shed(self) -> Tuple[str, ...]:
+        """Detectors currently switched off"""
+        return self.shed_order[:self.level]
+
+    def set_shed_order(self, shed_order: Iterable[str]):
+        """Change the order (e.g. on profile load), keeping the level"""
+        self.shed_order = tuple(shed_order)
+        self.level = min(self.level, self.max_level)
+
+    def plan(self, detectors: Iterable[str]) -> List[str]:
+        """Detectors to run this hop at the current level"""
+        shed = self.shed
+        return [name for name in detectors if name not in shed]
+
+    def stamp(self, newest_time: Optional[float]) -> float:
+        """
+        Deadline for a hop
+
+        Args:
+            newest_time: Shared-clock capture time of the newest frame (None
+                before the capture clock locks; now is used instead)
+        """
+        if newest_time is None:
+            newest_time = time.monotonic()
+        return newest_time + self.budget_seconds
+
+    def admit(self, deadline: float) -> bool:
+        """Whether a hop is still worth analyzing (drops it if not)"""
+        if time.monotonic() <= deadline:
+            return True
+        self.counts["dropped"] += 1
+        self._record_overload()
+        return False
+
+    def complete(self, deadline: float, elapsed: float) -> bool:
+        """
+        Record a finished analysis
+
+        Args:
+            deadline: The hop's deadline from stamp()
+            elapsed: Seconds the analysis took
+
+        Returns:
+            True if the result is on time (may fire triggers)
+        """
+        self.last_elapsed = elapsed
+        self.last_lateness = time.monotonic() - deadline
+        on_time = self.last_lateness <= 0
+        self.counts["on_time" if on_time else "late"] += 1
+
+        if not on_time or elapsed > self.hop_seconds:
+            self._record_overload()
+            return on_time
+
+        self._overloaded = 0
+        if self._restored:
+            self._held += 1
+            if self._held >= self._recover_hops:
+                self._restored = False
+                self._recover_hops = self.recover_after
+        if elapsed < self.headroom * self.hop_seconds:
+            self._relaxed += 1
+            if self._relaxed >= self._recover_hops and self.level > 0:
+                self._set_level(self.level - 1)
+        else:
+            self._relaxed = 0
+        return on_time
+
+    def delay(self, hop_started: float) -> float:
+        """
+        Seconds to sleep until the next hop
+
+        Hops that were overrun are not made up; their audio is merged into
+        the next window.
+        """
+        elapsed = time.monotonic() - hop_started
+        if elapsed < self.hop_seconds:
+            return self.hop_seconds - elapsed
+        self.counts["merged"] += int(elapsed // self.hop_seconds)
+        return self.hop_seconds - elapsed % self.hop_seconds
+
+    def _record_overload(self):
+        self._relaxed = 0
+        self._overloaded += 1
+        if self._overloaded >= self.raise_after and self.level < self.max_level:
+            if self._restored:
+                self._recover_hops = min(self._recover_hops * 2, self.recover_after * 8)
+            self._set_level(self.level + 1)
+
+    def _set_level(self, level: int):
+        logger.warning(
+            f"Analysis degradation level {self.level} -> {level} "
+            f"(shedding: {', '.join(self.shed_order[:level]) or 'nothing'})"
+        )
+        self._restored = level < self.level
+        self._held = 0
+        self.level = level
+        self.level_changes += 1
+        self._overloaded = 0
+        self._relaxed = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "degradation_level": self.level,
+            "max_level": self.max_level,
+            "shed": list(self.shed),
+            "shed_order": list(self.shed_order),
+            "budget_seconds": self.budget_seconds,
+            "last_elapsed_ms": self.last_elapsed * 1000,
+            "last_lateness_ms": self.last_lateness * 1000,
+            "level_changes": self.level_changes,
+            "windows": dict(self.counts),
+        }
@@ -3,7 +3,17 @@ Audio analysis service for emotion, keyword, and event detection
 """
 import numpy as np
 import logging
-from typing import Optional, List, Dict, Tuple
+from typing import Optional, List, Dict, Tuple, Union
+
+from app.services.feature_aggregator import MultiTimescaleAggregator
+from app.services.feature_extractor import (
+    SpectralFeatureExtractor,
+    SpectralFeatures,
+    estimate_pitch,
+)
+from app.services.event_detector import DetectedEvent, StreamingEventDetector
+from app.services.keyword_matcher import KeywordAutomaton, KeywordMatcher, compile_keywords
+from app.services.trigger_engine import TriggerEngine
 
 logger = logging.getLogger(__name__)
 
@@ -11,18 +21,47 @@ logger = logging.getLogger(__name__)
 class AudioAnalyzer:
     """Analyzes audio for emotions, keywords, and events"""
     
-    def __init__(self, sample_rate: int = 44100):
+    def __init__(self, sample_rate: int = 44100, event_template_dir: Optional[str] = None):
         self.sample_rate = sample_rate
+        self.feature_extractor = SpectralFeatureExtractor(sample_rate=sample_rate)
+        self.aggregator = MultiTimescaleAggregator()
+        self.keyword_matcher: Optional[KeywordMatcher] = None
+        self.event_detector = StreamingEventDetector(sample_rate=sample_rate)
+        if event_template_dir:
+            self.event_detector.load_templates(event_template_dir)
+        self.last_events: List[DetectedEvent] = []
+        self._events_position = 0
+        self._baseline_position = 0
+        self.trigger_engine = TriggerEngine()
         # TODO: Initialize ML models for emotion detection
         # TODO: Initialize keyword spotting models
         # TODO: Initialize event detection models
         
-    def analyze_emotion(self, audio_data: np.ndarray) -> Tuple[Optional[str], float]:
+    def extract_features(self, audio_data: np.ndarray) -> SpectralFeatures:
+        """
+        Run the shared FFT pass over a buffer
+        
+        Pass the result to the detectors so they don't each recompute it.
+        
+        Args:
+            audio_data: Audio samples, mono or (frames, channels)
+            
+        Returns:
+            Per-frame spectral features
+        """
+        return self.feature_extractor.extract(audio_data)
+    
+    def analyze_emotion(
+        self,
+        audio_data: np.ndarray,
+        features: Optional[SpectralFeatures] = None
+    ) -> Tuple[Optional[str], float]:
         """
         Analyze audio for emotional content
         
         Args:
             audio_data: Audio samples as numpy array
+            features: Precomputed spectral features (from extract_features)
             
         Returns:
             Tuple of (emotion_label, confidence_score)
@@ -33,57 +72,169 @@ class AudioAnalyzer:
         logger.debug("Analyzing emotion (stub)")
         return None, 0.0
     
-    def detect_keywords(self, audio_data: np.ndarray, keywords: List[str]) -> List[str]:
+    def transcribe(self, audio_data: np.ndarray) -> str:
+        """
+        Speech-to-text for keyword spotting
+        
+        Args:
+            audio_data: Audio samples
+            
+        Returns:
+            Transcript text for this block (may be empty)
+        """
+        # TODO: Plug in a streaming speech-to-text model
+        return ""
+    
+    def detect_keywords(
+        self,
+        audio_data: np.ndarray,
+        keywords: Union[List[str], KeywordAutomaton],
+        features: Optional[SpectralFeatures] = None
+    ) -> List[str]:
         """
         Detect specified keywords in audio
         
+        The transcript is matched with a compiled Aho-Corasick automaton whose
+        state carries over between calls, so phrases spanning two blocks are
+        still detected.
+        
         Args:
             audio_data: Audio samples
-            keywords: List of keywords to detect
+            keywords: Keywords to detect, or an automaton from compile_keywords
+            features: Precomputed spectral features (from extract_features)
             
         Returns:
             List of detected keywords
         """
-        # TODO: Implement keyword spotting
-        # Could use speech-to-text + matching or direct keyword spotting
+        if not isinstance(keywords, KeywordAutomaton):
+            if not keywords:
+                return []
+            keywords = compile_keywords(keywords)
+        
+        # Keep the streaming position unless the keyword set changed
+        if self.keyword_matcher is None or self.keyword_matcher.automaton is not keywords:
+            self.keyword_matcher = keywords.stream()
         
-        logger.debug(f"Detecting keywords (stub): {keywords}")
-        return []
+        transcript = self.transcribe(audio_data)
+        if not transcript:
+            return []
+        return self.keyword_matcher.feed_text(transcript)
     
-    def detect_events(self, audio_data: np.ndarray) -> List[str]:
+    def detect_events(
+        self,
+        audio_data: np.ndarray,
+        features: Optional[SpectralFeatures] = None,
+        stream_position: Optional[int] = None
+    ) -> List[str]:
         """
         Detect in-stream events (e.g., game victory, defeat, achievement)
         
+        Detection is incremental, so audio must arrive in stream order. When
+        windows overlap, pass stream_position (absolute index of the window's
+        last frame) and only the frames not seen yet are processed.
+        
         Args:
             audio_data: Audio samples
+            features: Precomputed spectral features (unused; the streaming
+                detector keeps its own frame alignment across calls)
+            stream_position: Absolute frame index at the end of audio_data
             
         Returns:
-            List of detected events
+            List of detected events (timing details in last_events)
         """
-        # TODO: Implement event detection
-        # Events: victory, defeat, achievement, level_up, etc.
+        block = audio_data
+        if stream_position is not None:
+            new_frames = stream_position - self._events_position
+            self._events_position = stream_position
+            if new_frames <= 0:
+                return []
+            if new_frames < audio_data.shape[0]:
+                block = audio_data[-new_frames:]
         
-        logger.debug("Detecting events (stub)")
-        return []
+        self.last_events = self.event_detector.process_block(block)
+        return [event.name for event in self.last_events]
     
-    def analyze_audio_features(self, audio_data: np.ndarray) -> Dict[str, float]:
+    def analyze_audio_features(
+        self,
+        audio_data: np.ndarray,
+        features: Optional[SpectralFeatures] = None
+    ) -> Dict[str, float]:
         """
-        Extract basic audio features for analysis
+        Extract summary audio features for analysis
         
         Args:
             audio_data: Audio samples
+            features: Precomputed spectral features (from extract_features)
             
         Returns:
             Dictionary of audio features
         """
-        # Calculate basic features
-        features = {
-            "rms": float(np.sqrt(np.mean(audio_data**2))),
-            "peak": float(np.max(np.abs(audio_data))),
-            "zero_crossing_rate": float(np.mean(np.abs(np.diff(np.sign(audio_data))))),
+        flat = audio_data.reshape(-1)
+        n = flat.shape[0]
+        if n == 0:
+            return dict.fromkeys(
+                ["rms", "peak", "zero_crossing_rate", "spectral_centroid",
+                 "spectral_rolloff", "spectral_flux", "spectral_flatness"],
+                0.0
+            )
+        
+        if features is None:
+            features = self.extract_features(audio_data)
+        
+        # Whole-buffer level features without squared/diffed temporaries
+        signs = np.signbit(self.feature_extractor.to_mono(audio_data))
+        crossings = np.count_nonzero(signs[1:] != signs[:-1])
+        zcr = crossings / max(signs.shape[0] - 1, 1)
+        
+        return {
+            "rms": float(np.sqrt(np.dot(flat, flat) / n)),
+            "peak": float(max(flat.max(), -flat.min())),
+            "zero_crossing_rate": float(zcr),
+            "spectral_centroid": float(features.centroid.mean()),
+            "spectral_rolloff": float(features.rolloff.mean()),
+            "spectral_flux": float(features.flux.mean()),
+            "spectral_flatness": float(features.flatness.mean()),
         }
+    
+    def update_baseline(self, audio_data: np.ndarray, stream_position: Optional[int] = None):
+        """
+        Fold a live block into the running multi-timescale baselines
+        
+        Call once per capture block; cost is independent of stream length.
+        As with detect_events, pass stream_position for overlapping windows
+        so each frame is counted once.
+        
+        Args:
+            audio_data: Audio block, mono or (frames, channels)
+            stream_position: Absolute frame index at the end of audio_data
+        """
+        if stream_position is not None:
+            new_frames = stream_position - self._baseline_position
+            self._baseline_position = stream_position
+            if new_frames <= 0:
+                return
+            if new_frames < audio_data.shape[0]:
+                audio_data = audio_data[-new_frames:]
+        
+        mono = self.feature_extractor.to_mono(audio_data)
+        n = mono.shape[0]
+        if n == 0:
+            return
+        
+        rms = float(np.sqrt(np.dot(mono, mono) / n))
+        pitch = estimate_pitch(mono, self.sample_rate)
+        self.aggregator.update(n / self.sample_rate, rms, pitch)
+    
+    def get_arousal(self) -> float:
+        """
+        Short-term loudness relative to the long-term baseline (z-score)
         
-        return features
+        Returns 0.0 until the 2 s horizon has warmed up, so decisions fall back
+        to the raw classifier confidence at the start of a stream.
+        """
+        if not self.aggregator.is_warm("2s"):
+            return 0.0
+        return self.aggregator.zscore("loudness_db", short="250ms", long="60s")
     
     def should_trigger_effect(
         self,
@@ -104,20 +255,13 @@ class AudioAnalyzer:
             sensitivity: Trigger sensitivity (0.0-1.0)
             
         Returns:
-            Effect type to trigger or None
+            Effect type to trigger or None (also None while a cooldown,
+            debounce or rate limit suppresses it)
         """
-        # TODO: Implement triggering logic
-        
-        if confidence > (0.7 * sensitivity):
-            if emotion in ["happy", "excited"]:
-                return "cheer"
-            elif emotion == "sad":
-                return "aww"
-        
-        if events:
-            if "victory" in events:
-                return "applause"
-            elif "defeat" in events:
-                return "boo"
-        
-        return None
+        # Once a baseline exists, excitement has to stand out from the
+        # streamer's normal level rather than just be loud
+        arousal = self.get_arousal() if self.aggregator.is_warm("2s") else None
+        decision = self.trigger_engine.evaluate(
+            emotion, confidence, keywords, events, arousal=arousal, sensitivity=sensitivity
+        )
+        return decision.effect if decision else None
@@ -2,105 +2,404 @@
 Audio capture service using sounddevice
 Handles real-time audio input from various sources
 """
-import sounddevice as sd
+import math
+import time
 import numpy as np
 import logging
-from typing import Optional, Callable
-from queue import Queue
+from typing import TYPE_CHECKING, Optional, Callable, Dict, Any, List, Union, Tuple
+
+from app.services.device_registry import (
+    AudioDevice,
+    close_stream,
+    get_device_registry,
+    open_stream,
+)
+from app.services.metrics import get_metrics
+from app.services.resampler import AnalysisFrontEnd
+from app.services.ring_buffer import AudioRingBuffer
+
+if TYPE_CHECKING:
+    import sounddevice as sd
 
 logger = logging.getLogger(__name__)
 
+# Name of the source opened by start_capture (the request's audio_source)
+MAIN_SOURCE = "main"
+
+Device = Optional[Union[int, str]]
+
+
+class StreamClock:
+    """
+    Maps a stream's frame counter onto the shared monotonic clock
+
+    A second-order delay-locked loop (as used by JACK) filters the jittery
+    per-callback timestamps into a smooth frame -> time line whose slope is
+    the device's measured sample period. Devices drift apart by tens of ppm,
+    so two sources' frame counters can't be compared directly; their clocks
+    can. State is swapped as one tuple so readers never see a torn update.
+    """
+
+    def __init__(self, sample_rate: int, bandwidth_hz: float = 0.1):
+        self.sample_rate = sample_rate
+        self.bandwidth_hz = bandwidth_hz
+        # (anchor frame, shared time of that frame, seconds per frame)
+        self._state: Optional[Tuple[int, float, float]] = None
+        self.resyncs = 0
+
+    @property
+    def is_locked(self) -> bool:
+        return self._state is not None
+
+    def update(self, frame: int, timestamp: float):
+        """
+        Feed the shared-clock time at which ``frame`` was captured
+
+        Called from the audio callback once per block.
+        """
+        state = self._state
+        if state is None:
+            self._state = (frame, timestamp, 1.0 / self.sample_rate)
+            return
+
+        anchor_frame, anchor_time, period = state
+        frames = frame - anchor_frame
+        if frames <= 0:
+            return
+        predicted = anchor_time + frames * period
+        error = timestamp - predicted
+
+        # A stall or device restart breaks the line; start over from here
+        if abs(error) > 0.25:
+            self.resyncs += 1
+            self._state = (frame, timestamp, 1.0 / self.sample_rate)
+            return
+
+        omega = 2.0 * math.pi * self.bandwidth_hz * frames * period
+        self._state = (
+            frame,
+            predicted + math.sqrt(2.0) * omega * error,
+            period + omega * omega * error / frames,
+        )
+
+    def time_at(self, frame: int) -> Optional[float]:
+        """Shared-clock time of a frame index"""
+        state = self._state
+        if state is None:
+            return None
+        anchor_frame, anchor_time, period = state
+        return anchor_time + (frame - anchor_frame) * period
+
+    def frame_at(self, timestamp: float) -> Optional[int]:
+        """Nearest frame index captured at a shared-clock time"""
+        state = self._state
+        if state is None:
+            return None
+        anchor_frame, anchor_time, period = state
+        return anchor_frame + int(round((timestamp - anchor_time) / period))
+
+    @property
+    def drift_ppm(self) -> float:
+        """Measured sample rate error against the nominal rate"""
+        if self._state is None:
+            return 0.0
+        return (1.0 / (self._state[2] * self.sample_rate) - 1.0) * 1e6
+
+    def reset(self):
+        self._state = None
+
+
+class CaptureSource:
+    """One input device: its stream, ring buffers and clock"""
+
+    def __init__(
+        self,
+        name: str,
+        sample_rate: int,
+        channels: int,
+        blocksize: int,
+        buffer_seconds: float,
+        overrun_policy: str,
+        analysis_rate: Optional[int] = None
+    ):
+        self.name = name
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.device: Device = None
+        self.stream: Optional["sd.InputStream"] = None
+        self.ring_buffer = AudioRingBuffer(
+            capacity=max(int(sample_rate * buffer_seconds), blocksize),
+            channels=channels,
+            overrun_policy=overrun_policy
+        )
+        self.clock = StreamClock(sample_rate)
+        self.callback_fn: Optional[Callable] = None
+        self._metrics = get_metrics()
+        self._stream_label = f"input:{name}"
+        # Mono copy at the analysis rate, filled as capture blocks are consumed
+        self.front_end: Optional[AnalysisFrontEnd] = None
+        if analysis_rate:
+            self.front_end = AnalysisFrontEnd(
+                sample_rate, analysis_rate, buffer_seconds, max_block=max(blocksize, 4096)
+            )
+
+    @property
+    def is_capturing(self) -> bool:
+        return self.stream is not None
+
+    def _callback(self, indata, frames, time_info, status):
+        """Called by PortAudio for each audio block"""
+        metrics = self._metrics
+        if status:
+            if status.input_overflow:
+                metrics.xruns.inc(self._stream_label, "overflow")
+            if status.input_underflow:
+                metrics.xruns.inc(self._stream_label, "underflow")
+            logger.warning(f"Audio callback status ({self.name}): {status}")
+
+        # ADC time of the block's first frame on the shared monotonic
+        # clock (PortAudio's stream clock isn't shared across devices)
+        now = time.monotonic()
+        if time_info.inputBufferAdcTime > 0:
+            delay = time_info.currentTime - time_info.inputBufferAdcTime
+            metrics.observe_stage("capture", delay)
+        else:
+            delay = frames / self.sample_rate
+        ring_buffer = self.ring_buffer
+        self.clock.update(ring_buffer.write_index, now - delay)
+
+        # Copy into the preallocated ring buffer (no allocation). Under
+        # drop_newest a full buffer keeps only part of the block, or none
+        written = ring_buffer.write(indata)
+
+        # Call custom callback with a view of the frames actually stored
+        if self.callback_fn and written:
+            self.callback_fn(ring_buffer.latest(written))
+
+    def start(self, device_id: Device = None, callback: Optional[Callable] = None):
+        """Open and start the input stream (raises on failure)"""
+        # Imported on first use: importing sounddevice initializes PortAudio
+        import sounddevice as sd
+
+        self.callback_fn = callback
+        self.stream = open_stream(lambda: sd.InputStream(
+            device=device_id,
+            channels=self.channels,
+            samplerate=self.sample_rate,
+            blocksize=self.blocksize,
+            callback=self._callback
+        ))
+        self.device = device_id
+
+    def stop(self):
+        if self.stream is None:
+            return
+        try:
+            close_stream(self.stream)
+        finally:
+            self.stream = None
+            # A new device has a different clock; re-lock on the next block
+            self.clock.reset()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "device": self.device,
+            "channels": self.channels,
+            "capturing": self.is_capturing,
+            "drift_ppm": self.clock.drift_ppm,
+            "clock_resyncs": self.clock.resyncs,
+            **self.ring_buffer.stats(),
+        }
+
 
 class AudioCaptureService:
-    """Service for capturing audio from system devices"""
-    
+    """
+    Service for capturing audio from system devices
+
+    Captures one or more named sources concurrently (e.g. the mic and game
+    audio), each with its own stream and ring buffer. PortAudio runs each
+    stream's callback on its own thread; nothing else is threaded per source,
+    so consumers read every source from one loop. ``aligned_window`` returns
+    windows that end at the same shared-clock instant on every source.
+
+    With an ``analysis_rate``, every block the consumer reads is also
+    downmixed and resampled into a mono analysis-rate buffer per source. That
+    work stays off the audio callback thread.
+    """
+
     def __init__(
         self,
         sample_rate: int = 44100,
         channels: int = 2,
-        blocksize: int = 1024
+        blocksize: int = 1024,
+        buffer_seconds: float = 10.0,
+        overrun_policy: str = "drop_oldest",
+        analysis_rate: Optional[int] = None
     ):
         self.sample_rate = sample_rate
         self.channels = channels
         self.blocksize = blocksize
-        self.stream: Optional[sd.InputStream] = None
-        self.is_capturing = False
-        self.audio_queue = Queue()
-        self.callback_fn: Optional[Callable] = None
-        
-    def list_devices(self):
-        """List all available audio devices"""
-        try:
-            devices = sd.query_devices()
-            return devices
-        except Exception as e:
-            logger.error(f"Error querying audio devices: {e}")
-            return []
-    
-    def start_capture(self, device_id: Optional[int] = None, callback: Optional[Callable] = None):
-        """Start capturing audio from specified device"""
-        if self.is_capturing:
-            logger.warning("Audio capture already in progress")
+        self.buffer_seconds = buffer_seconds
+        self.overrun_policy = overrun_policy
+        self.analysis_rate = analysis_rate
+        self.sources: Dict[str, CaptureSource] = {}
+        self.add_source(MAIN_SOURCE)
+
+    def add_source(self, name: str, channels: Optional[int] = None) -> CaptureSource:
+        """Register a named source (not started until start_source)"""
+        if name in self.sources:
+            raise ValueError(f"Capture source already exists: {name}")
+        source = CaptureSource(
+            name,
+            self.sample_rate,
+            channels or self.channels,
+            self.blocksize,
+            self.buffer_seconds,
+            self.overrun_policy,
+            self.analysis_rate
+        )
+        self.sources[name] = source
+        return source
+
+    @property
+    def ring_buffer(self) -> AudioRingBuffer:
+        """Ring buffer of the main source"""
+        return self.sources[MAIN_SOURCE].ring_buffer
+
+    @property
+    def is_capturing(self) -> bool:
+        return self.sources[MAIN_SOURCE].is_capturing
+
+    def list_devices(self) -> List[AudioDevice]:
+        """List input devices (cached; see DeviceRegistry)"""
+        return get_device_registry().devices("input")
+
+    def start_source(
+        self,
+        name: str,
+        device_id: Device = None,
+        callback: Optional[Callable] = None
+    ) -> bool:
+        """Start capturing a named source from a device"""
+        source = self.sources[name]
+        if source.is_capturing:
+            logger.warning(f"Audio capture '{name}' already in progress")
             return False
-            
-        self.callback_fn = callback
-        
+
         try:
-            def audio_callback(indata, frames, time, status):
-                """Called for each audio block"""
-                if status:
-                    logger.warning(f"Audio callback status: {status}")
-                
-                # Convert to numpy array
-                audio_data = np.copy(indata)
-                
-                # Add to queue for processing
-                self.audio_queue.put(audio_data)
-                
-                # Call custom callback if provided
-                if self.callback_fn:
-                    self.callback_fn(audio_data)
-            
-            self.stream = sd.InputStream(
-                device=device_id,
-                channels=self.channels,
-                samplerate=self.sample_rate,
-                blocksize=self.blocksize,
-                callback=audio_callback
-            )
-            
-            self.stream.start()
-            self.is_capturing = True
-            logger.info(f"Audio capture started on device {device_id}")
-            return True
-            
+            source.start(device_id, callback)
         except Exception as e:
-            logger.error(f"Failed to start audio capture: {e}")
+            logger.error(f"Failed to start audio capture '{name}': {e}")
             return False
-    
-    def stop_capture(self):
-        """Stop audio capture"""
-        if not self.is_capturing:
+        logger.info(f"Audio capture '{name}' started on device {device_id}")
+        return True
+
+    def start_capture(self, device_id: Device = None, callback: Optional[Callable] = None):
+        """Start capturing audio from specified device"""
+        return self.start_source(MAIN_SOURCE, device_id, callback)
+
+    def stop_source(self, name: str):
+        """Stop one source (its buffered audio is kept)"""
+        source = self.sources[name]
+        if not source.is_capturing:
             return
-            
         try:
-            if self.stream:
-                self.stream.stop()
-                self.stream.close()
-                self.stream = None
-            
-            self.is_capturing = False
-            logger.info("Audio capture stopped")
-            
+            source.stop()
+            logger.info(f"Audio capture '{name}' stopped")
         except Exception as e:
-            logger.error(f"Error stopping audio capture: {e}")
-    
-    def get_audio_data(self):
-        """Get captured audio data from queue"""
-        if self.audio_queue.empty():
-            return None
-        return self.audio_queue.get()
-    
+            logger.error(f"Error stopping audio capture '{name}': {e}")
+
+    def stop_capture(self):
+        """Stop audio capture on every source"""
+        for name in self.sources:
+            self.stop_source(name)
+
+    def get_audio_data(
+        self,
+        frames: Optional[int] = None,
+        source: str = MAIN_SOURCE
+    ) -> Optional[np.ndarray]:
+        """
+        Get the next unread block of captured audio
+
+        The block is also fed to the source's analysis-rate buffer, so read
+        every block (in order) when analysis-rate windows are used.
+
+        Args:
+            frames: Number of frames to read (defaults to blocksize)
+            source: Source name
+
+        Returns:
+            Zero-copy view of shape (frames, channels), or None if not enough data
+        """
+        capture = self.sources[source]
+        block = capture.ring_buffer.read(frames or self.blocksize)
+        if block is not None and capture.front_end is not None:
+            capture.front_end.process(block, capture.ring_buffer.read_index - block.shape[0])
+        return block
+
+    def get_window(self, frames: int) -> Optional[np.ndarray]:
+        """Get a zero-copy view of the most recent frames without consuming them"""
+        return self.ring_buffer.latest(frames)
+
+    def common_time(self) -> Optional[float]:
+        """
+        Latest shared-clock time that every capturing source has audio for
+
+        None until each running source has delivered a block.
+        """
+        latest = None
+        for source in self.sources.values():
+            if not source.is_capturing:
+                continue
+            end = source.clock.time_at(source.ring_buffer.write_index)
+            if end is None:
+                return None
+            latest = end if latest is None else min(latest, end)
+        return latest
+
+    def aligned_window(
+        self,
+        source: str,
+        end_time: Optional[float],
+        frames: int,
+        analysis_rate: bool = False
+    ) -> Tuple[Optional[np.ndarray], int]:
+        """
+        Zero-copy window of a source ending at a shared-clock time
+
+        Args:
+            source: Source name
+            end_time: Shared-clock time of the window's end (see common_time);
+                None for the source's newest frame
+            frames: Window length (at the rate of the buffer read)
+            analysis_rate: Read the mono analysis-rate buffer instead of the
+                full-rate capture buffer
+
+        Returns:
+            (window or None if unavailable, absolute frame index of its end)
+        """
+        capture = self.sources[source]
+        ring_buffer = capture.ring_buffer
+        end = capture.clock.frame_at(end_time) if end_time is not None else None
+        if end is None:
+            end = ring_buffer.write_index
+        # Rounding can land a frame past the newest sample
+        end = min(end, ring_buffer.write_index)
+        if analysis_rate and capture.front_end is not None:
+            # Only consumed blocks have been resampled
+            return capture.front_end.window(min(end, ring_buffer.read_index), frames)
+        return ring_buffer.window(end, frames), end
+
+    def get_buffer_stats(self):
+        """Ring buffer fill level and overrun counters (main source)"""
+        return self.ring_buffer.stats()
+
+    def get_source_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-source device, clock drift and buffer state"""
+        return {name: source.stats() for name, source in self.sources.items()}
+
     def __del__(self):
         """Cleanup on deletion"""
         self.stop_capture()
@@ -0,0 +1,246 @@
+"""
+Decoding helpers for generated effect audio
+Turns API output into float32 PCM ready for the mixer
+"""
+import math
+import struct
+import numpy as np
+import logging
+from typing import Optional, Dict, Any, Tuple
+
+from app.services.resampler import PolyphaseResampler
+
+logger = logging.getLogger(__name__)
+
+# BS.1770 gating: 400 ms blocks every 100 ms, absolute and relative gates
+_LOUDNESS_BLOCK_SECONDS = 0.4
+_LOUDNESS_STEP_SECONDS = 0.1
+_ABSOLUTE_GATE_LUFS = -70.0
+_RELATIVE_GATE_LU = -10.0
+
+
+def parse_pcm_format(output_format: str) -> Optional[int]:
+    """Sample rate of an ElevenLabs 'pcm_<rate>' output format, or None if not raw PCM"""
+    if not output_format.startswith("pcm_"):
+        return None
+    try:
+        return int(output_format.split("_", 1)[1])
+    except ValueError:
+        return None
+
+
+def decode_pcm16(data: bytes) -> np.ndarray:
+    """Decode little-endian 16-bit mono PCM to float32 in [-1, 1)"""
+    usable = len(data) - (len(data) % 2)
+    samples = np.frombuffer(data[:usable], dtype="<i2")
+    return samples.astype(np.float32) / 32768.0
+
+
+def resample_linear(signal: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """Linear-interpolation resample; good enough for one-off effect preparation"""
+    if source_rate == target_rate or signal.shape[0] == 0:
+        return signal
+    duration = signal.shape[0] / source_rate
+    target_len = max(int(round(duration * target_rate)), 1)
+    positions = np.arange(target_len, dtype=np.float64) * (source_rate / target_rate)
+    return np.interp(positions, np.arange(signal.shape[0]), signal).astype(np.float32)
+
+
+def resample_polyphase(signal: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """Band-limited resample of a whole mono clip, compensating the filter delay"""
+    if source_rate == target_rate or signal.shape[0] == 0:
+        return signal
+    resampler = PolyphaseResampler(source_rate, target_rate)
+    # Flush the filter with zeros, then drop its group delay from the front
+    pad = int(math.ceil(resampler.delay)) + 1
+    out = resampler.process(np.concatenate([signal, np.zeros(pad, dtype=np.float32)]))
+    skip = int(round(resampler.delay * target_rate / source_rate))
+    target_len = max(int(round(signal.shape[0] * target_rate / source_rate)), 1)
+    return out[skip:skip + target_len]
+
+
+def _biquad_power(b: Tuple[float, ...], a: Tuple[float, ...], w: np.ndarray) -> np.ndarray:
+    z = np.exp(-1j * w)
+    numerator = b[0] + b[1] * z + b[2] * z * z
+    denominator = a[0] + a[1] * z + a[2] * z * z
+    return np.abs(numerator / denominator) ** 2
+
+
+def k_weighting_power(n_fft: int, sample_rate: int) -> np.ndarray:
+    """
+    Power response of the BS.1770 K-weighting filter at rfft bin frequencies
+
+    Both stages (high shelf, then high pass) are derived from their analog
+    prototypes for any sample rate, as libebur128 does.
+    """
+    w = 2.0 * np.pi * np.fft.rfftfreq(n_fft, 1.0 / sample_rate) / sample_rate
+
+    # Stage 1: +4 dB high shelf around 1.7 kHz (head diffraction)
+    k = math.tan(math.pi * 1681.974450955533 / sample_rate)
+    q = 0.7071752369554196
+    vh = 10.0 ** (3.999843853973347 / 20.0)
+    vb = vh ** 0.4996667741545416
+    a0 = 1.0 + k / q + k * k
+    shelf = _biquad_power(
+        ((vh + vb * k / q + k * k) / a0, 2.0 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0),
+        (1.0, 2.0 * (k * k - 1.0) / a0, (1.0 - k / q + k * k) / a0),
+        w
+    )
+
+    # Stage 2: high pass at 38 Hz (RLB weighting)
+    k = math.tan(math.pi * 38.13547087602444 / sample_rate)
+    q = 0.5003270373238773
+    a0 = 1.0 + k / q + k * k
+    highpass = _biquad_power(
+        (1.0, -2.0, 1.0),
+        (1.0, 2.0 * (k * k - 1.0) / a0, (1.0 - k / q + k * k) / a0),
+        w
+    )
+    return shelf * highpass
+
+
+def integrated_loudness(signal: np.ndarray, sample_rate: int) -> float:
+    """
+    Gated integrated loudness of a mono clip in LUFS (BS.1770)
+
+    The K-weighted mean square of each 400 ms block is computed in the
+    frequency domain (Parseval), so no IIR filter runs sample by sample.
+    Clips shorter than one block are measured as a single block.
+
+    Returns:
+        Loudness in LUFS, or -inf if every block is below the absolute gate
+    """
+    block = int(_LOUDNESS_BLOCK_SECONDS * sample_rate)
+    step = int(_LOUDNESS_STEP_SECONDS * sample_rate)
+    if signal.shape[0] < block:
+        blocks = signal.reshape(1, -1)
+    else:
+        blocks = np.lib.stride_tricks.sliding_window_view(signal, block)[::step]
+    n = blocks.shape[1]
+    if n == 0:
+        return float("-inf")
+
+    spectrum = np.fft.rfft(blocks, axis=1)
+    power = spectrum.real ** 2 + spectrum.imag ** 2
+    power *= k_weighting_power(n, sample_rate)
+    # One-sided spectrum: every bin but DC (and Nyquist) stands for two
+    power[:, 1:(n + 1) // 2] *= 2.0
+    mean_square = power.sum(axis=1) / (n * n)
+
+    loudness = -0.691 + 10.0 * np.log10(mean_square + 1e-12)
+    gated = mean_square[loudness > _ABSOLUTE_GATE_LUFS]
+    if gated.shape[0] == 0:
+        return float("-inf")
+    relative_gate = -0.691 + 10.0 * math.log10(gated.mean()) + _RELATIVE_GATE_LU
+    gated = gated[-0.691 + 10.0 * np.log10(gated) > relative_gate]
+    return float(-0.691 + 10.0 * math.log10(gated.mean()))
+
+
+def trim_silence(
+    signal: np.ndarray,
+    sample_rate: int,
+    threshold_db: float = -50.0,
+    pad_seconds: float = 0.01,
+    fade_seconds: float = 0.005
+) -> np.ndarray:
+    """
+    Cut leading and trailing audio quieter than threshold_db below the peak
+
+    Levels are measured over 10 ms frames; a little padding is kept around
+    the sound and short fades are applied at each cut so it doesn't click.
+    """
+    peak = float(np.max(np.abs(signal))) if signal.shape[0] else 0.0
+    if peak == 0.0:
+        return signal[:0]
+    frame = max(int(0.01 * sample_rate), 1)
+    usable = signal.shape[0] // frame * frame
+    if usable == 0:
+        return signal
+    rms = np.sqrt(np.mean(signal[:usable].reshape(-1, frame) ** 2, axis=1))
+    loud = np.flatnonzero(rms >= peak * 10.0 ** (threshold_db / 20.0))
+    if loud.shape[0] == 0:
+        return signal
+
+    pad = int(pad_seconds * sample_rate)
+    start = max(loud[0] * frame - pad, 0)
+    end = min((loud[-1] + 1) * frame + pad, signal.shape[0])
+    trimmed = signal[start:end].copy()
+
+    fade = min(int(fade_seconds * sample_rate), trimmed.shape[0] // 2)
+    if fade > 0:
+        ramp = np.linspace(0.0, 1.0, fade, dtype=np.float32)
+        if start > 0:
+            trimmed[:fade] *= ramp
+        if end < signal.shape[0]:
+            trimmed[-fade:] *= ramp[::-1]
+    return trimmed
+
+
+def normalize_loudness(
+    signal: np.ndarray,
+    sample_rate: int,
+    target_lufs: float = -16.0,
+    peak_dbfs: float = -1.0
+) -> Tuple[np.ndarray, float, float]:
+    """
+    Scale a clip to a target integrated loudness without exceeding a peak ceiling
+
+    Returns:
+        (scaled clip, measured loudness in LUFS, applied gain in dB)
+    """
+    loudness = integrated_loudness(signal, sample_rate)
+    if not math.isfinite(loudness):
+        return signal, loudness, 0.0
+    gain_db = target_lufs - loudness
+    # Quiet, peaky clips are limited by the ceiling rather than clipped
+    peak = float(np.max(np.abs(signal)))
+    if peak > 0.0:
+        gain_db = min(gain_db, peak_dbfs - 20.0 * math.log10(peak))
+    scaled = signal * np.float32(10.0 ** (gain_db / 20.0))
+    return scaled, loudness, gain_db
+
+
+def prepare_effect(
+    data: bytes,
+    output_format: str,
+    target_rate: int,
+    target_lufs: float = -16.0,
+    peak_dbfs: float = -1.0,
+    trim_db: float = -50.0
+) -> Tuple[Optional[np.ndarray], Dict[str, Any]]:
+    """
+    Turn generated effect audio into ready-to-play PCM
+
+    Decodes, resamples to the output rate, trims leading/trailing silence
+    and normalizes loudness, so playback needs no per-trigger processing.
+
+    Returns:
+        ((frames, 1) float32 PCM or None if undecodable, processing details)
+    """
+    source_rate = parse_pcm_format(output_format)
+    if source_rate is None:
+        logger.warning(f"Cannot decode effect audio in format {output_format}")
+        return None, {}
+
+    decoded = decode_pcm16(data)
+    pcm = resample_polyphase(decoded, source_rate, target_rate)
+    pcm = trim_silence(pcm, target_rate, threshold_db=trim_db)
+    pcm, loudness, gain_db = normalize_loudness(pcm, target_rate, target_lufs, peak_dbfs)
+    details = {
+        "source_seconds": decoded.shape[0] / source_rate,
+        "seconds": pcm.shape[0] / target_rate,
+        "loudness_lufs": loudness,
+        "gain_db": gain_db,
+    }
+    return pcm.astype(np.float32, copy=False).reshape(-1, 1), details
+
+
+def float_wav_header(frames: int, channels: int, sample_rate: int) -> bytes:
+    """RIFF header for 32-bit float PCM; the little-endian samples follow it"""
+    data_bytes = frames * channels * 4
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_bytes, b"WAVE",
+        b"fmt ", 16, 3, channels, sample_rate, sample_rate * channels * 4, channels * 4, 32,
+        b"data", data_bytes
+    )
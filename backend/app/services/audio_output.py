@@ -0,0 +1,318 @@
+"""
+Multi-voice effect mixer for playback through an output device
+Sums overlapping effects in the sounddevice output callback
+"""
+import itertools
+import numpy as np
+import logging
+from collections import deque
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, List, Union
+
+from app.core.config import get_settings
+from app.services.device_registry import close_stream, open_stream
+from app.services.metrics import get_metrics
+
+if TYPE_CHECKING:
+    import sounddevice as sd
+
+logger = logging.getLogger(__name__)
+
+
+class Voice:
+    """One playback slot; only the output callback (or a stopped mixer) touches it"""
+
+    __slots__ = (
+        "active", "pcm", "position", "gain", "fade_in",
+        "fade_out", "stop_at", "started", "voice_id",
+    )
+
+    def __init__(self):
+        self.active = False
+        self.pcm: Optional[np.ndarray] = None
+        self.position = 0
+        self.gain = 1.0
+        self.fade_in = 0
+        self.fade_out = 0
+        self.stop_at: Optional[int] = None
+        self.started = 0
+        self.voice_id = 0
+
+
+class EffectMixer:
+    """
+    Persistent output stream that mixes up to ``max_voices`` effects
+
+    Effects must already be decoded PCM at the mixer's sample rate; play()
+    converts them to float32 and downmixes channel layouts other than
+    (frames, channels) or (frames, 1) to mono. play() and the stop methods
+    never touch the voices: they queue a command that the callback applies
+    at the start of its next block, so the audio thread takes no lock. The
+    callback does all mixing into scratch buffers preallocated for
+    ``max_block_frames``; a larger block from the device is mixed in slices
+    of that size, so the callback never allocates audio memory.
+
+    When ``max_voices`` effects are already playing, the oldest is faded out
+    over the fade time rather than cut, and the new effect starts in one of
+    the spare slots kept for voices that are fading out.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 44100,
+        channels: int = 2,
+        blocksize: int = 256,
+        max_voices: int = 8,
+        fade_ms: float = 10.0,
+        volume: float = 0.8,
+        max_block_frames: int = 4096
+    ):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.fade_frames = max(int(sample_rate * fade_ms / 1000), 1)
+        self.volume = volume
+        self.max_voices = max_voices
+        # Spare slots let stolen voices fade out while new ones start
+        self.voices: List[Voice] = [Voice() for _ in range(2 * max_voices)]
+        self.stream: Optional["sd.OutputStream"] = None
+        self.device: Optional[Union[int, str]] = None
+        # deque append/popleft are atomic, so this is the lock-free handoff
+        # from the API threads to the callback
+        self._commands: deque = deque()
+        self._voice_ids = itertools.count(1)
+        self.voices_stolen = 0
+        self.underflows = 0
+        self._xruns = get_metrics().xruns
+
+        # Callback scratch space, sized for the largest block PortAudio
+        # normally asks for (blocksize 0 lets the device pick)
+        frames = max(blocksize, max_block_frames)
+        self._scratch = np.zeros((frames, channels), dtype=np.float32)
+        self._envelope = np.zeros((frames, 1), dtype=np.float32)
+        self._ramp = np.arange(frames, dtype=np.float32).reshape(frames, 1)
+
+    @property
+    def is_running(self) -> bool:
+        return self.stream is not None
+
+    def start(self, device: Optional[Union[int, str]] = None) -> bool:
+        """Open and start the output stream (kept open between effects)"""
+        if self.stream is not None:
+            return True
+
+        try:
+            # Imported on first use: importing sounddevice initializes PortAudio
+            import sounddevice as sd
+            self.stream = open_stream(lambda: sd.OutputStream(
+                device=device,
+                channels=self.channels,
+                samplerate=self.sample_rate,
+                blocksize=self.blocksize,
+                dtype="float32",
+                latency="low",
+                callback=self._callback
+            ))
+            self.device = device
+            logger.info(f"Effect mixer started on device {device}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to start effect mixer: {e}")
+            self.stream = None
+            return False
+
+    def stop(self):
+        """Stop and close the output stream"""
+        if self.stream is None:
+            return
+        try:
+            close_stream(self.stream)
+        except Exception as e:
+            logger.error(f"Error stopping effect mixer: {e}")
+        finally:
+            self.stream = None
+            self._commands.clear()
+            for voice in self.voices:
+                voice.active = False
+            logger.info("Effect mixer stopped")
+
+    def set_volume(self, volume: float):
+        """Master effect volume (0.0-1.0), applied from the next block"""
+        self.volume = min(max(volume, 0.0), 1.0)
+
+    def play(self, pcm: np.ndarray, gain: float = 1.0, fade_in: bool = False) -> int:
+        """
+        Start playing a decoded effect
+
+        Starts at the output's next block. If every voice is busy the oldest
+        one is faded out to make room.
+
+        Args:
+            pcm: PCM of shape (frames,), (frames, 1) or (frames, channels);
+                other channel counts are downmixed to mono
+            gain: Per-voice gain (multiplied with the master volume)
+            fade_in: Ramp the start instead of starting at full level
+
+        Returns:
+            Voice id that can be passed to stop_voice()
+
+        Raises:
+            ValueError: pcm is not 1-D or 2-D
+        """
+        # Conversions happen here, off the audio thread
+        pcm = np.asarray(pcm, dtype=np.float32)
+        if pcm.ndim == 1:
+            pcm = pcm.reshape(-1, 1)
+        elif pcm.ndim != 2:
+            raise ValueError(f"Effect PCM must be 1-D or 2-D, got shape {pcm.shape}")
+        elif pcm.shape[1] not in (1, self.channels):
+            pcm = pcm.mean(axis=1, keepdims=True, dtype=np.float32)
+
+        voice_id = next(self._voice_ids)
+        self._commands.append(("play", voice_id, pcm, gain, fade_in))
+        return voice_id
+
+    def stop_voice(self, voice_id: int):
+        """Fade out a playing voice"""
+        self._commands.append(("stop", voice_id))
+
+    def stop_all(self):
+        """Fade out every playing voice"""
+        self._commands.append(("stop", None))
+
+    def active_voices(self) -> int:
+        return sum(1 for v in self.voices if v.active)
+
+    def _release(self, voice: Voice):
+        # Fade out from the current position (keeps an earlier, shorter fade)
+        stop_at = voice.position + self.fade_frames
+        if voice.stop_at is None or stop_at < voice.stop_at:
+            voice.fade_out = self.fade_frames
+            voice.stop_at = stop_at
+
+    def _start(self, voice_id: int, pcm: np.ndarray, gain: float, fade_in: bool):
+        playing = 0
+        oldest: Optional[Voice] = None
+        free: Optional[Voice] = None
+        for v in self.voices:
+            if not v.active:
+                free = free or v
+            elif v.stop_at is None:
+                playing += 1
+                if oldest is None or v.started < oldest.started:
+                    oldest = v
+        if playing >= self.max_voices:
+            self._release(oldest)
+            self.voices_stolen += 1
+
+        voice = free
+        if voice is None:
+            # Every spare slot is still fading out: cut the one nearest silence
+            voice = min(
+                (v for v in self.voices if v.stop_at is not None),
+                key=lambda v: v.stop_at - v.position
+            )
+
+        voice.pcm = pcm
+        voice.position = 0
+        voice.gain = gain
+        voice.fade_in = self.fade_frames if fade_in else 0
+        voice.fade_out = 0
+        voice.stop_at = None
+        voice.started = voice_id
+        voice.voice_id = voice_id
+        voice.active = True
+
+    def _apply_commands(self):
+        commands = self._commands
+        while commands:
+            command = commands.popleft()
+            if command[0] == "play":
+                self._start(*command[1:])
+                continue
+            voice_id = command[1]
+            for voice in self.voices:
+                if voice.active and (voice_id is None or voice.voice_id == voice_id):
+                    self._release(voice)
+
+    def _callback(self, outdata, frames, time, status):
+        if status.output_underflow:
+            self.underflows += 1
+            self._xruns.inc("output", "underflow")
+
+        self._apply_commands()
+        outdata.fill(0.0)
+        step = self._scratch.shape[0]
+        if frames <= step:
+            self._mix(outdata, frames)
+        else:
+            # Bigger than preallocated: mix in slices rather than allocate here
+            for start in range(0, frames, step):
+                self._mix(outdata[start:start + step], min(step, frames - start))
+        np.clip(outdata, -1.0, 1.0, out=outdata)
+
+    def _mix(self, outdata, frames: int):
+        """Add every active voice's next ``frames`` frames into outdata"""
+        scratch = self._scratch[:frames]
+        envelope = self._envelope[:frames]
+        ramp = self._ramp[:frames]
+        master = self.volume
+
+        for voice in self.voices:
+            if not voice.active:
+                continue
+
+            pcm = voice.pcm
+            pos = voice.position
+            end = pcm.shape[0] if voice.stop_at is None else min(pcm.shape[0], voice.stop_at)
+            n = min(frames, end - pos)
+            if n <= 0:
+                voice.active = False
+                continue
+
+            out = scratch[:n]
+            np.multiply(pcm[pos:pos + n], voice.gain * master, out=out)
+
+            if voice.fade_in and pos < voice.fade_in:
+                env = envelope[:n]
+                np.add(ramp[:n], pos, out=env)
+                np.multiply(env, 1.0 / voice.fade_in, out=env)
+                np.minimum(env, 1.0, out=env)
+                np.multiply(out, env, out=out)
+
+            if voice.stop_at is not None:
+                env = envelope[:n]
+                np.add(ramp[:n], pos - (voice.stop_at - voice.fade_out), out=env)
+                np.multiply(env, -1.0 / voice.fade_out, out=env)
+                np.add(env, 1.0, out=env)
+                np.clip(env, 0.0, 1.0, out=env)
+                np.multiply(out, env, out=out)
+
+            np.add(outdata[:n], out, out=outdata[:n])
+
+            voice.position = pos + n
+            if voice.position >= end:
+                voice.active = False
+
+
+@lru_cache()
+def get_effect_mixer() -> EffectMixer:
+    """Get the shared effect mixer instance"""
+    settings = get_settings()
+    mixer = EffectMixer(
+        sample_rate=settings.OUTPUT_SAMPLE_RATE,
+        channels=settings.OUTPUT_CHANNELS,
+        blocksize=settings.OUTPUT_BLOCKSIZE,
+        max_voices=settings.MIXER_MAX_VOICES,
+        fade_ms=settings.MIXER_FADE_MS
+    )
+    metrics = get_metrics()
+    metrics.gauge(
+        "mixer_active_voices", "Effects currently playing",
+        function=lambda: {(): mixer.active_voices()}
+    )
+    metrics.counter(
+        "mixer_voices_stolen_total", "Effects cut off to make room for new ones",
+        function=lambda: {(): mixer.voices_stolen}
+    )
+    return mixer
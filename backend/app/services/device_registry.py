@@ -0,0 +1,281 @@
+"""
+Audio device registry
+Cached device enumeration with background refresh and stable device keys
+"""
+import asyncio
+import threading
+import time
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, Callable, Tuple, Union
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+Device = Optional[Union[int, str]]
+
+# Re-initializing PortAudio under a stream that is open (or being opened or
+# closed) is undefined behaviour, so the re-init and every stream open and
+# close happen under this lock
+_portaudio_lock = threading.RLock()
+_open_streams = 0
+
+
+@dataclass(frozen=True)
+class AudioDevice:
+    """Descriptor for one PortAudio device"""
+    id: int                      # PortAudio index; can change when devices come and go
+    key: str                     # "<host api>:<name>", stable across re-enumeration
+    name: str
+    host_api: str
+    max_input_channels: int
+    max_output_channels: int
+    default_samplerate: float
+    default_input: bool = False
+    default_output: bool = False
+
+    @property
+    def is_input(self) -> bool:
+        return self.max_input_channels > 0
+
+    @property
+    def is_output(self) -> bool:
+        return self.max_output_channels > 0
+
+
+def _enumerate() -> Tuple[AudioDevice, ...]:
+    """Query PortAudio for every device (blocking; can be slow)"""
+    # Imported on first use: importing sounddevice initializes PortAudio
+    import sounddevice as sd
+    host_apis = [api["name"] for api in sd.query_hostapis()]
+    default_input, default_output = sd.default.device
+    devices = []
+    for info in sd.query_devices():
+        host_api = host_apis[info["hostapi"]]
+        devices.append(AudioDevice(
+            id=info["index"],
+            key=f"{host_api}:{info['name']}",
+            name=info["name"],
+            host_api=host_api,
+            max_input_channels=info["max_input_channels"],
+            max_output_channels=info["max_output_channels"],
+            default_samplerate=info["default_samplerate"],
+            default_input=info["index"] == default_input,
+            default_output=info["index"] == default_output,
+        ))
+    return tuple(devices)
+
+
+def open_stream(factory: Callable[[], Any]) -> Any:
+    """
+    Create and start a PortAudio stream, excluded from device rescans
+
+    Args:
+        factory: Builds the (not yet started) stream
+
+    Returns:
+        The running stream; close it with close_stream
+    """
+    global _open_streams
+    with _portaudio_lock:
+        stream = factory()
+        try:
+            stream.start()
+        except Exception:
+            stream.close()
+            raise
+        _open_streams += 1
+        return stream
+
+
+def close_stream(stream: Any):
+    """Stop and close a stream from open_stream"""
+    global _open_streams
+    with _portaudio_lock:
+        _open_streams -= 1
+        try:
+            stream.stop()
+        finally:
+            stream.close()
+
+
+def streams_open() -> int:
+    """Streams currently open through open_stream"""
+    return _open_streams
+
+
+def _reinitialize():
+    """Restart PortAudio so hot-plugged devices show up (hold _portaudio_lock)"""
+    import sounddevice as sd
+    sd._terminate()
+    sd._initialize()
+
+
+class DeviceRegistry:
+    """
+    Enumerates audio devices once and serves cached descriptors
+
+    PortAudio only sees hot-plugged devices after it is re-initialized, which
+    would break any open stream, so a rescan only happens while
+    ``streams_idle()`` says nothing is capturing or playing (by default: no
+    stream is open through open_stream). The check and the re-init hold the
+    same lock as every stream open and close, so no stream can appear in
+    between. Refreshes run on a worker thread, either every
+    ``refresh_seconds`` or right after ``invalidate()``; readers always get
+    the last complete snapshot.
+    """
+
+    def __init__(
+        self,
+        refresh_seconds: float = 30.0,
+        streams_idle: Optional[Callable[[], bool]] = None
+    ):
+        self.refresh_seconds = refresh_seconds
+        self.streams_idle = streams_idle or (lambda: streams_open() == 0)
+        self._devices: Tuple[AudioDevice, ...] = ()
+        self._by_key: Dict[str, AudioDevice] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_lock = asyncio.Lock()
+        self.version = 0
+        self.refreshed_at: Optional[float] = None
+        self.last_refresh_ms = 0.0
+        self.rescans = 0
+        self.listeners: List[Callable[[Tuple[AudioDevice, ...]], None]] = []
+
+    # Reads (never touch PortAudio)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.refreshed_at is not None
+
+    def devices(self, kind: str = "all") -> List[AudioDevice]:
+        """Cached devices, filtered by kind ("input", "output" or "all")"""
+        if kind == "input":
+            return [d for d in self._devices if d.is_input]
+        if kind == "output":
+            return [d for d in self._devices if d.is_output]
+        return list(self._devices)
+
+    def get(self, key: str) -> Optional[AudioDevice]:
+        return self._by_key.get(key)
+
+    def resolve(self, device: Device, kind: str = "input") -> Device:
+        """
+        Map a stored device reference to the current PortAudio index
+
+        Accepts a stable key, an exact device name, or a numeric index. Keys
+        and names survive devices being reordered; anything unknown is passed
+        through for sounddevice to match (e.g. a name substring).
+        """
+        if device is None or isinstance(device, int):
+            return device
+        if device.isdigit():
+            return int(device)
+
+        candidates = self.devices(kind)
+        found = self._by_key.get(device)
+        if found is not None and found in candidates:
+            return found.id
+        named = [d for d in candidates if d.name == device]
+        if len(named) == 1:
+            return named[0].id
+        return device
+
+    # Refresh
+
+    async def refresh(self, rescan: bool = False) -> bool:
+        """
+        Re-enumerate devices on a worker thread
+
+        Args:
+            rescan: Re-initialize PortAudio first to pick up hot-plugged
+                devices (skipped while streams are open)
+
+        Returns:
+            True if the device list changed
+        """
+        async with self._refresh_lock:
+            started = time.perf_counter()
+            try:
+                devices, rescan = await asyncio.to_thread(self._query, rescan)
+            except Exception as e:
+                logger.error(f"Audio device enumeration failed: {e}")
+                return False
+            self.last_refresh_ms = (time.perf_counter() - started) * 1000
+            self.refreshed_at = time.time()
+
+            if devices == self._devices:
+                return False
+            self._devices = devices
+            self._by_key = {d.key: d for d in devices}
+            self.version += 1
+            logger.info(
+                f"Audio devices updated: {len(devices)} devices "
+                f"({self.last_refresh_ms:.0f} ms{', rescanned' if rescan else ''})"
+            )
+        for listener in self.listeners:
+            try:
+                listener(devices)
+            except Exception as e:
+                logger.error(f"Device listener failed: {e}")
+        return True
+
+    def _query(self, rescan: bool) -> Tuple[Tuple[AudioDevice, ...], bool]:
+        with _portaudio_lock:
+            rescan = rescan and self.streams_idle()
+            if rescan:
+                _reinitialize()
+                self.rescans += 1
+            return _enumerate(), rescan
+
+    def invalidate(self):
+        """Ask the background task to rescan now (e.g. after a hotplug hint)"""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        if not self.is_loaded:
+            await self.refresh()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.refresh_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            # Without a rescan PortAudio would return the same list, so skip
+            # the query entirely while streams are open
+            if self.streams_idle():
+                await self.refresh(rescan=True)
+
+    def start(self):
+        """Enumerate in the background and keep refreshing (event loop thread)"""
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "devices": len(self._devices),
+            "version": self.version,
+            "refreshed_at": self.refreshed_at,
+            "last_refresh_ms": self.last_refresh_ms,
+            "rescans": self.rescans,
+        }
+
+
+@lru_cache()
+def get_device_registry() -> DeviceRegistry:
+    """Get the shared device registry"""
+    return DeviceRegistry(refresh_seconds=get_settings().DEVICE_REFRESH_SECONDS)
@@ -0,0 +1,218 @@
+"""
+Effect catalog and library of ready-to-play variations
+Prewarms every catalog effect at startup so manual triggers never wait on generation
+"""
+import asyncio
+import itertools
+import logging
+import numpy as np
+from functools import lru_cache
+from typing import Optional, List, Dict, Tuple
+
+from app.core.config import get_settings
+from app.services.effect_store import EffectStore, get_effect_store
+from app.services.elevenlabs_service import ElevenLabsService
+
+logger = logging.getLogger(__name__)
+
+# Effect id -> display name, category and the sound being described
+EFFECT_CATALOG: Dict[str, Dict[str, str]] = {
+    "cheer": {"name": "Cheer", "category": "positive", "sound": "crowd cheering"},
+    "applause": {"name": "Applause", "category": "positive", "sound": "audience applause"},
+    "laugh": {"name": "Laugh", "category": "positive", "sound": "audience laughing"},
+    "boo": {"name": "Boo", "category": "negative", "sound": "crowd booing"},
+    "gasp": {"name": "Gasp", "category": "reaction", "sound": "audience gasping in surprise"},
+    "wow": {"name": "Wow", "category": "reaction", "sound": "crowd saying wow"},
+    "aww": {"name": "Aww", "category": "reaction", "sound": "audience going aww in sympathy"},
+}
+
+# Intensity level -> descriptors; variation i of a level uses descriptor i
+INTENSITY_LEVELS: Dict[str, List[str]] = {
+    "low": ["small", "light", "scattered", "quiet"],
+    "medium": ["lively", "enthusiastic", "warm", "energetic"],
+    "high": ["huge", "roaring", "stadium", "explosive"],
+}
+
+# Shorter, punchier clips at low intensity; longer swells at high intensity
+LEVEL_DURATIONS: Dict[str, float] = {"low": 2.0, "medium": 3.0, "high": 4.0}
+
+
+def intensity_level(intensity: float) -> str:
+    """Map a 0.0-1.0 intensity to a catalog intensity level"""
+    if intensity < 1 / 3:
+        return "low"
+    if intensity < 2 / 3:
+        return "medium"
+    return "high"
+
+
+def build_prompt(effect_id: str, level: str, variation: int) -> str:
+    descriptors = INTENSITY_LEVELS[level]
+    descriptor = descriptors[variation % len(descriptors)]
+    return f"{descriptor} {EFFECT_CATALOG[effect_id]['sound']}"
+
+
+class EffectLibrary:
+    """
+    Holds ready-to-play PCM for every (effect, intensity level)
+
+    ``prewarm`` fills the library in the background with bounded concurrency.
+    Variations already processed are memory-mapped from the effect store;
+    others are loaded from the SFX cache (or generated) and processed once
+    into the store. Triggers then just pick the next variation for the
+    requested level and hand it to the mixer.
+    """
+
+    def __init__(
+        self,
+        service: Optional[ElevenLabsService] = None,
+        variations_per_level: int = 2,
+        concurrency: int = 2,
+        store: Optional[EffectStore] = None
+    ):
+        self.service = service or ElevenLabsService()
+        self.store = store or get_effect_store()
+        self.variations_per_level = variations_per_level
+        self.concurrency = concurrency
+        self.variations: Dict[Tuple[str, str], List[np.ndarray]] = {}
+        # (effect, level, variation) -> lock; a variation loads at most once
+        # even when prewarm and an on-demand trigger ask for it together
+        self._load_locks: Dict[Tuple[str, str, int], asyncio.Lock] = {}
+        self._ready: set = set()
+        self._cursors: Dict[Tuple[str, str], itertools.count] = {}
+        self.total = len(EFFECT_CATALOG) * len(INTENSITY_LEVELS) * variations_per_level
+        self.loaded = 0
+        self.failed = 0
+        self.prewarm_done = False
+
+    def list_effects(self) -> List[Dict[str, str]]:
+        """Catalog entries for the API"""
+        return [
+            {"id": effect_id, "name": info["name"], "category": info["category"]}
+            for effect_id, info in EFFECT_CATALOG.items()
+        ]
+
+    async def _load(
+        self,
+        effect_id: str,
+        level: str,
+        variation: int,
+        semaphore: asyncio.Semaphore,
+        cache_only: bool
+    ):
+        lock = self._load_locks.setdefault((effect_id, level, variation), asyncio.Lock())
+        async with lock:
+            if (effect_id, level, variation) not in self._ready:
+                await self._load_variation(effect_id, level, variation, semaphore, cache_only)
+
+    async def _load_variation(
+        self,
+        effect_id: str,
+        level: str,
+        variation: int,
+        semaphore: asyncio.Semaphore,
+        cache_only: bool
+    ):
+        prompt = build_prompt(effect_id, level, variation)
+        duration = LEVEL_DURATIONS[level]
+        key = self.service.cache_key(prompt, duration)
+
+        pcm = self.store.load(key)
+        if pcm is None:
+            async with semaphore:
+                if cache_only:
+                    audio = self.service.get_cached_sound_effect(prompt, duration)
+                else:
+                    audio = await self.service.generate_sound_effect(prompt, duration)
+            if audio is not None:
+                pcm = await asyncio.to_thread(
+                    self.store.ingest, key, audio, self.service.output_format
+                )
+        if pcm is None:
+            self.failed += 1
+            return
+        self.variations.setdefault((effect_id, level), []).append(pcm)
+        self._ready.add((effect_id, level, variation))
+        self.loaded += 1
+
+    async def prewarm(self):
+        """Load or generate every catalog variation in the background"""
+        cache_only = not self.service.api_key
+        if cache_only:
+            logger.warning("ElevenLabs API key not configured, prewarming from cache only")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        jobs = [
+            self._load(effect_id, level, variation, semaphore, cache_only)
+            for level in INTENSITY_LEVELS
+            for effect_id in EFFECT_CATALOG
+            for variation in range(self.variations_per_level)
+        ]
+        await asyncio.gather(*jobs)
+
+        self.prewarm_done = True
+        logger.info(
+            f"Effect prewarm finished: {self.loaded}/{self.total} ready, {self.failed} failed"
+        )
+
+    def pick(self, effect_id: str, intensity: float = 0.5) -> Optional[Tuple[str, np.ndarray]]:
+        """
+        Pick the next ready variation for an effect, rotating through variations
+
+        Falls back to the other intensity levels, nearest to the requested
+        intensity first, if the requested one is not loaded yet.
+
+        Returns:
+            Tuple of (variation_id, pcm) or None if nothing is ready
+        """
+        requested = intensity_level(intensity)
+        order = list(INTENSITY_LEVELS)
+        # Then the others by distance from the intensity to the level's centre
+        others = sorted(
+            (level for level in order if level != requested),
+            key=lambda level: abs((order.index(level) + 0.5) / len(order) - intensity)
+        )
+        for level in [requested] + others:
+            key = (effect_id, level)
+            ready = self.variations.get(key)
+            if ready:
+                cursor = self._cursors.setdefault(key, itertools.count())
+                index = next(cursor) % len(ready)
+                return f"{effect_id}:{level}:{index}", ready[index]
+        return None
+
+    async def get_or_generate(
+        self,
+        effect_id: str,
+        intensity: float = 0.5
+    ) -> Optional[Tuple[str, np.ndarray]]:
+        """Pick a ready variation, generating one on demand if none is loaded"""
+        picked = self.pick(effect_id, intensity)
+        if picked is not None:
+            return picked
+
+        level = intensity_level(intensity)
+        await self._load(effect_id, level, 0, asyncio.Semaphore(1), cache_only=False)
+        return self.pick(effect_id, intensity)
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "ready": self.loaded,
+            "failed": self.failed,
+            "total": self.total,
+            "done": self.prewarm_done,
+            "processed": self.store.ingested,
+        }
+
+    async def close(self):
+        await self.service.close()
+
+
+@lru_cache()
+def get_effect_library() -> EffectLibrary:
+    """Get the shared effect library instance"""
+    settings = get_settings()
+    return EffectLibrary(
+        variations_per_level=settings.EFFECT_VARIATIONS_PER_LEVEL,
+        concurrency=settings.EFFECT_PREWARM_CONCURRENCY
+    )
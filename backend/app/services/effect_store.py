@@ -0,0 +1,164 @@
+"""
+On-disk store of processed, ready-to-play effects
+Raw float32 PCM at the output rate, memory-mapped for playback and preview
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import numpy as np
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+from app.core.config import get_settings
+from app.services.audio_codec import prepare_effect
+from app.services.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+PCM_FILE_SUFFIX = ".f32"
+
+# Bump when prepare_effect changes what it produces
+PROCESSING_VERSION = 1
+
+
+class EffectStore:
+    """
+    Processed effects as headerless float32 files, one per generated clip
+
+    ``ingest`` runs once per generated effect: decode, resample to the output
+    rate, trim silence and normalize loudness (see prepare_effect), then write
+    the samples atomically. ``load`` maps the file read-only, so playback and
+    preview read straight from the page cache with no decoding or copying.
+
+    File names carry a tag of the output rate and processing parameters;
+    files made with other settings are removed when the store opens, and the
+    raw API audio in the SFX cache is processed again on next use.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        output_rate: int,
+        target_lufs: float = -16.0,
+        peak_dbfs: float = -1.0,
+        trim_db: float = -50.0
+    ):
+        self.directory = Path(directory).expanduser()
+        self.output_rate = output_rate
+        self.target_lufs = target_lufs
+        self.peak_dbfs = peak_dbfs
+        self.trim_db = trim_db
+        self.tag = hashlib.sha256(json.dumps(
+            [PROCESSING_VERSION, output_rate, target_lufs, peak_dbfs, trim_db]
+        ).encode("utf-8")).hexdigest()[:8]
+        self._lock = threading.Lock()
+        self.ingested = 0
+        self.loaded = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._remove_stale()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.{self.tag}{PCM_FILE_SUFFIX}"
+
+    def _remove_stale(self):
+        removed = 0
+        for path in self.directory.iterdir():
+            stale = path.suffix == ".tmp" or (
+                path.suffix == PCM_FILE_SUFFIX and not path.stem.endswith(f".{self.tag}")
+            )
+            if stale:
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        if removed:
+            logger.info(f"Removed {removed} effect files processed with other settings")
+
+    def __contains__(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def load(self, key: str) -> Optional[np.ndarray]:
+        """Memory-map a processed effect as read-only (frames, 1) float32, or None"""
+        path = self._path(key)
+        try:
+            size = path.stat().st_size
+        except OSError:
+            return None
+        if size == 0 or size % 4:
+            return None
+        pcm = np.memmap(path, dtype="<f4", mode="r").reshape(-1, 1)
+        with self._lock:
+            self.loaded += 1
+        return pcm
+
+    def ingest(self, key: str, data: bytes, output_format: str) -> Optional[np.ndarray]:
+        """
+        Process generated audio once and store it (blocking; run on a thread)
+
+        Returns:
+            The stored effect, memory-mapped, or None if it couldn't be decoded
+        """
+        pcm, details = prepare_effect(
+            data, output_format, self.output_rate,
+            target_lufs=self.target_lufs, peak_dbfs=self.peak_dbfs, trim_db=self.trim_db
+        )
+        if pcm is None or pcm.shape[0] == 0:
+            return None
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pcm.astype("<f4", copy=False).tobytes())
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.error(f"Failed to store processed effect: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            # Still playable from memory this session
+            return pcm
+
+        with self._lock:
+            self.ingested += 1
+        logger.debug(
+            f"Processed effect {key[:12]}: {details['seconds']:.2f}s "
+            f"(from {details['source_seconds']:.2f}s), "
+            f"{details['loudness_lufs']:.1f} LUFS, {details['gain_db']:+.1f} dB"
+        )
+        return self.load(key)
+
+    def stats(self) -> Dict[str, Any]:
+        files = list(self.directory.glob(f"*.{self.tag}{PCM_FILE_SUFFIX}"))
+        return {
+            "files": len(files),
+            "bytes": sum(path.stat().st_size for path in files),
+            "ingested": self.ingested,
+            "loaded": self.loaded,
+            "output_rate": self.output_rate,
+            "target_lufs": self.target_lufs,
+        }
+
+
+@lru_cache()
+def get_effect_store() -> EffectStore:
+    """Get the shared processed-effect store"""
+    settings = get_settings()
+    store = EffectStore(
+        settings.EFFECT_PCM_DIR,
+        settings.OUTPUT_SAMPLE_RATE,
+        target_lufs=settings.EFFECT_LOUDNESS_LUFS,
+        peak_dbfs=settings.EFFECT_PEAK_DBFS,
+        trim_db=settings.EFFECT_TRIM_DB
+    )
+    get_metrics().counter(
+        "effects_processed_total", "Generated effects decoded, normalized and stored",
+        function=lambda: {(): store.ingested}
+    )
+    return store
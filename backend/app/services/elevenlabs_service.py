@@ -1,22 +1,80 @@
 """
 ElevenLabs API integration for sound effect generation
 """
+import asyncio
 import httpx
 import logging
-from typing import Optional
+import time
+from typing import Optional, Dict
 from app.core.config import get_settings
+from app.services.http_client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    backoff_delays,
+    get_http_client,
+)
+from app.services.metrics import get_metrics
+from app.services.sfx_cache import SoundEffectCache, get_sfx_cache, make_cache_key
 
 logger = logging.getLogger(__name__)
 
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# Process-wide state shared by every service instance, so per-request
+# services still coalesce and trip the same breaker
+_in_flight: Dict[str, "asyncio.Task[bytes]"] = {}
+_breaker: Optional[CircuitBreaker] = None
+client_stats: Dict[str, int] = {
+    "requests": 0,
+    "retries": 0,
+    "coalesced": 0,
+    "failures": 0,
+    "circuit_rejections": 0,
+}
+
+
+get_metrics().counter(
+    "elevenlabs_requests_total", "ElevenLabs client activity by outcome", ("outcome",),
+    function=lambda: {(name,): value for name, value in client_stats.items()}
+)
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Get the shared ElevenLabs circuit breaker"""
+    global _breaker
+    if _breaker is None:
+        settings = get_settings()
+        _breaker = CircuitBreaker(
+            failure_threshold=settings.ELEVENLABS_BREAKER_THRESHOLD,
+            reset_timeout=settings.ELEVENLABS_BREAKER_RESET_SECONDS
+        )
+    return _breaker
+
+
+class RetryableError(Exception):
+    """Transient API failure worth retrying"""
+
 
 class ElevenLabsService:
     """Service for generating sound effects via ElevenLabs API"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cache: Optional[SoundEffectCache] = None,
+        base_url: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None
+    ):
         self.settings = get_settings()
         self.api_key = api_key or self.settings.ELEVENLABS_API_KEY
-        self.base_url = self.settings.ELEVENLABS_BASE_URL
-        self.client = httpx.AsyncClient()
+        self.base_url = base_url or self.settings.ELEVENLABS_BASE_URL
+        self.model = self.settings.ELEVENLABS_SFX_MODEL
+        self.output_format = self.settings.ELEVENLABS_OUTPUT_FORMAT
+        self.cache = cache or get_sfx_cache()
+        # Shared pooled client unless one is injected (e.g. for a stub server);
+        # either way the caller that created it closes it
+        self.client = client or get_http_client()
+        self.breaker = get_circuit_breaker()
     
     async def generate_sound_effect(
         self,
@@ -35,42 +93,128 @@ class ElevenLabsService:
         Returns:
             Audio data as bytes or None on failure
         """
+        cached = self.get_cached_sound_effect(text_prompt, duration_seconds, prompt_influence)
+        if cached is not None:
+            logger.info(f"Sound effect cache hit: {text_prompt}")
+            return cached
+        
         if not self.api_key:
             logger.error("ElevenLabs API key not configured")
             return None
         
-        try:
-            # TODO: Implement actual ElevenLabs API call
-            # Endpoint: /sound-generation or /text-to-sound-effects
-            
-            headers = {
-                "xi-api-key": self.api_key,
-                "Content-Type": "application/json"
-            }
-            
+        cache_key = make_cache_key(
+            text_prompt, duration_seconds, prompt_influence, self.model, self.output_format
+        )
+        task = _in_flight.get(cache_key)
+        if task is None:
             payload = {
                 "text": text_prompt,
                 "duration_seconds": duration_seconds,
-                "prompt_influence": prompt_influence
+                "prompt_influence": prompt_influence,
+                "model_id": self.model
             }
-            
-            # Placeholder - will implement actual API call
-            logger.info(f"Generating sound effect: {text_prompt}")
-            
-            # response = await self.client.post(
-            #     f"{self.base_url}/sound-generation",
-            #     headers=headers,
-            #     json=payload
-            # )
-            
-            # return response.content
-            
+            task = asyncio.create_task(self._generate(cache_key, payload))
+            _in_flight[cache_key] = task
+            task.add_done_callback(lambda _: _in_flight.pop(cache_key, None))
+        else:
+            client_stats["coalesced"] += 1
+            logger.info(f"Joining in-flight generation: {text_prompt}")
+        
+        try:
+            # Shield so one caller giving up doesn't cancel the shared request
+            return await asyncio.shield(task)
+        except CircuitOpenError as e:
+            client_stats["circuit_rejections"] += 1
+            logger.warning(f"Sound effect generation skipped: {e}")
             return None
-            
         except Exception as e:
             logger.error(f"Failed to generate sound effect: {e}")
             return None
     
+    async def _generate(self, cache_key: str, payload: dict) -> bytes:
+        """Issue the API call with deadline, retries and circuit breaking"""
+        trial = self.breaker.before_call()
+        try:
+            return await self._request(cache_key, payload)
+        finally:
+            # Cancellation or an unexpected error records no outcome; don't
+            # leave the breaker waiting forever on a half-open trial
+            self.breaker.release(trial)
+    
+    async def _request(self, cache_key: str, payload: dict) -> bytes:
+        """POST with deadline and retries, reporting the outcome to the breaker"""
+        headers = {
+            "xi-api-key": self.api_key,
+            "Content-Type": "application/json"
+        }
+        deadline = time.monotonic() + self.settings.ELEVENLABS_DEADLINE_SECONDS
+        delays = backoff_delays(
+            self.settings.ELEVENLABS_MAX_RETRIES,
+            self.settings.ELEVENLABS_BACKOFF_BASE_SECONDS
+        )
+        
+        logger.info(f"Generating sound effect: {payload['text']}")
+        started = time.perf_counter()
+        
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise TimeoutError("Sound effect generation deadline exceeded")
+                client_stats["requests"] += 1
+                response = await asyncio.wait_for(
+                    self.client.post(
+                        f"{self.base_url}/sound-generation",
+                        params={"output_format": self.output_format},
+                        headers=headers,
+                        json=payload
+                    ),
+                    timeout=remaining
+                )
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    raise RetryableError(f"HTTP {response.status_code}")
+                response.raise_for_status()
+            except (RetryableError, httpx.TransportError, TimeoutError) as e:
+                delay = next(delays, None)
+                if delay is None or time.monotonic() + delay >= deadline:
+                    client_stats["failures"] += 1
+                    self.breaker.record_failure()
+                    raise
+                client_stats["retries"] += 1
+                logger.warning(f"Sound effect request failed ({e}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            except httpx.HTTPStatusError:
+                # Client errors (bad key, bad prompt) are not an outage
+                client_stats["failures"] += 1
+                self.breaker.record_success()
+                raise
+            
+            self.breaker.record_success()
+            get_metrics().observe_stage("generation", time.perf_counter() - started)
+            self.cache.put(cache_key, response.content)
+            return response.content
+    
+    def get_cached_sound_effect(
+        self,
+        text_prompt: str,
+        duration_seconds: Optional[float] = None,
+        prompt_influence: float = 0.5
+    ) -> Optional[bytes]:
+        """Return a previously generated effect from the cache without calling the API"""
+        return self.cache.get(self.cache_key(text_prompt, duration_seconds, prompt_influence))
+    
+    def cache_key(
+        self,
+        text_prompt: str,
+        duration_seconds: Optional[float] = None,
+        prompt_influence: float = 0.5
+    ) -> str:
+        """Key identifying the audio a request would produce"""
+        return make_cache_key(
+            text_prompt, duration_seconds, prompt_influence, self.model, self.output_format
+        )
+    
     async def get_available_voices(self):
         """Get list of available voices/models"""
         if not self.api_key:
@@ -89,8 +233,12 @@ class ElevenLabsService:
             return []
     
     async def close(self):
-        """Close the HTTP client"""
-        await self.client.aclose()
+        """
+        Release the service
+
+        The HTTP client is never closed here: the shared one stays open until
+        shutdown (close_http_client) and an injected one belongs to its creator.
+        """
     
     async def __aenter__(self):
         return self
@@ -0,0 +1,334 @@
+"""
+Streaming in-stream event detection
+Spectral-flux onsets with adaptive median thresholds, plus template matching
+against short reference clips (victory jingles, kill sounds, ...)
+"""
+import time
+import wave
+import numpy as np
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, List, Dict, Tuple
+
+from app.services.audio_codec import resample_linear
+from app.services.feature_extractor import SpectralFeatureExtractor
+from app.services.ring_buffer import AudioRingBuffer
+
+logger = logging.getLogger(__name__)
+
+# Event label used for generic transients found by the onset detector
+ONSET_EVENT = "impact"
+
+# Log-mel values more than this far below a frame's peak band are clamped,
+# so empty bands in a clean reference clip still match a noisy stream
+TEMPLATE_DYNAMIC_RANGE_DB = 40.0
+_DYNAMIC_RANGE = TEMPLATE_DYNAMIC_RANGE_DB / 10.0 * np.log(10.0)
+
+
+@lru_cache(maxsize=4)
+def _read_clips(directory: str, modified_ns: int) -> Tuple[Tuple[str, np.ndarray, int], ...]:
+    # Keyed on the directory's mtime so added or removed clips are picked up
+    clips = []
+    for wav_path in sorted(Path(directory).glob("*.wav")):
+        try:
+            with wave.open(str(wav_path), "rb") as wav:
+                if wav.getsampwidth() != 2:
+                    logger.warning(f"Skipping {wav_path.name}: only 16-bit WAV is supported")
+                    continue
+                rate = wav.getframerate()
+                channels = wav.getnchannels()
+                raw = wav.readframes(wav.getnframes())
+        except (OSError, wave.Error) as e:
+            logger.error(f"Failed to read template {wav_path}: {e}")
+            continue
+
+        audio = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+        audio.flags.writeable = False
+        clips.append((wav_path.stem.split("_")[0], audio.reshape(-1, channels), rate))
+    return tuple(clips)
+
+
+def read_template_clips(directory: str) -> Tuple[Tuple[str, np.ndarray, int], ...]:
+    """
+    Decoded template clips in a directory as (event name, audio, sample rate)
+
+    Decoded once per process and shared by every detector (read-only arrays).
+    """
+    path = Path(directory).expanduser()
+    if not path.is_dir():
+        return ()
+    return _read_clips(str(path), path.stat().st_mtime_ns)
+
+
+@dataclass
+class DetectedEvent:
+    """One detection with its timing"""
+    name: str
+    time: float        # seconds into the stream where the event happened
+    score: float
+    latency_ms: float  # from the event's last needed frame to its detection
+
+
+class OnsetDetector:
+    """
+    Peak picker over spectral flux with an adaptive threshold
+
+    The threshold is ``multiplier * median(recent flux) + delta`` over a
+    fixed-size history, so it follows the stream's loudness without ever
+    growing. A frame is an onset when it is a local maximum above the
+    threshold; that needs one frame of lookahead.
+    """
+
+    def __init__(
+        self,
+        median_frames: int = 43,
+        multiplier: float = 1.5,
+        delta: float = 0.05,
+        min_gap_frames: int = 4
+    ):
+        self.multiplier = multiplier
+        self.delta = delta
+        self.min_gap_frames = min_gap_frames
+        self.min_history = max(median_frames // 4, 1)
+        self._history = np.zeros(median_frames, dtype=np.float32)
+        self._filled = 0
+        self._cursor = 0
+        self._prev = 0.0
+        self._prev_prev = 0.0
+        self._prev_threshold = np.inf
+        self._since_last = min_gap_frames
+
+    def update(self, flux: float) -> Optional[float]:
+        """
+        Add one frame of flux
+
+        Returns:
+            Strength of an onset at the previous frame, or None
+        """
+        history = self._history[:self._filled] if self._filled < self._history.shape[0] \
+            else self._history
+        # No threshold until there is enough history for a meaningful median
+        threshold = (
+            self.multiplier * float(np.median(history)) + self.delta
+            if self._filled >= self.min_history else np.inf
+        )
+
+        onset = None
+        self._since_last += 1
+        candidate = self._prev
+        if (
+            candidate > self._prev_threshold
+            and candidate > self._prev_prev
+            and candidate >= flux
+            and self._since_last > self.min_gap_frames
+        ):
+            onset = candidate / max(self._prev_threshold, 1e-6)
+            self._since_last = 0
+
+        self._history[self._cursor] = flux
+        self._cursor = (self._cursor + 1) % self._history.shape[0]
+        self._filled = min(self._filled + 1, self._history.shape[0])
+        self._prev_prev = self._prev
+        self._prev = flux
+        self._prev_threshold = threshold
+        return onset
+
+
+def compress_log_mel(log_mel: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Clamp each frame's log-mel bands to TEMPLATE_DYNAMIC_RANGE_DB below its peak"""
+    floor = log_mel.max(axis=1, keepdims=True) - _DYNAMIC_RANGE
+    return np.maximum(log_mel, floor, out=out)
+
+
+class EventTemplate:
+    """A reference clip reduced to a z-normalised log-mel sequence"""
+
+    def __init__(self, name: str, features: np.ndarray, threshold: float = 0.7):
+        self.name = name
+        self.length = features.shape[0]
+        flat = features.reshape(-1).astype(np.float32)
+        self.vector = (flat - flat.mean()) / (flat.std() + 1e-6)
+        self.threshold = threshold
+        self.cooldown = 0
+        # Best above-threshold score of the current peak and its end frame
+        self.peak_score = 0.0
+        self.peak_frame = -1
+
+
+class StreamingEventDetector:
+    """
+    Incremental event detector with bounded state
+
+    Feed consecutive, non-overlapping capture blocks to ``process_block``.
+    Per block it runs the streaming feature extractor (one FFT per new
+    frame), updates the onset detector, and correlates the most recent
+    frames against each template. History is a fixed-size ring sized to the
+    longest template, so per-block cost does not depend on stream length.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 44100,
+        frame_size: int = 1024,
+        hop_size: int = 512,
+        max_template_seconds: float = 3.0,
+        onset_min_strength: float = 2.0
+    ):
+        self.sample_rate = sample_rate
+        self.extractor = SpectralFeatureExtractor(
+            sample_rate=sample_rate, frame_size=frame_size, hop_size=hop_size
+        )
+        self.hop_seconds = hop_size / sample_rate
+        self.onsets = OnsetDetector()
+        self.onset_min_strength = onset_min_strength
+        self.templates: List[EventTemplate] = []
+
+        # Range-compressed log-mel frames; correlation ignores overall loudness
+        self.n_features = self.extractor.n_mels
+        max_frames = max(int(max_template_seconds / self.hop_seconds), 1)
+        self.history = AudioRingBuffer(max_frames, channels=self.n_features)
+        self._scratch = np.zeros(max_frames * self.n_features, dtype=np.float32)
+
+        self.samples_processed = 0
+        self.frames_processed = 0
+        self.events_detected = 0
+        self.total_latency_ms = 0.0
+
+    def template_features(self, audio: np.ndarray, sample_rate: int) -> np.ndarray:
+        """Log-mel sequence for a reference clip, in the detector's framing"""
+        mono = SpectralFeatureExtractor.to_mono(audio)
+        mono = resample_linear(mono, sample_rate, self.sample_rate)
+        extractor = SpectralFeatureExtractor(
+            sample_rate=self.sample_rate,
+            frame_size=self.extractor.frame_size,
+            hop_size=self.extractor.hop_size
+        )
+        return compress_log_mel(extractor.extract(mono).log_mel).copy()
+
+    def add_template(
+        self,
+        name: str,
+        audio: np.ndarray,
+        sample_rate: int,
+        threshold: float = 0.7
+    ):
+        """Register a reference clip as an event template"""
+        features = self.template_features(audio, sample_rate)
+        if features.shape[0] > self.history.capacity:
+            logger.warning(f"Template '{name}' truncated to the detector's history length")
+            features = features[:self.history.capacity]
+        self.templates.append(EventTemplate(name, features, threshold))
+        logger.info(f"Event template '{name}' added ({features.shape[0]} frames)")
+
+    def load_templates(self, directory: str, threshold: float = 0.7) -> int:
+        """
+        Load every 16-bit WAV in a directory as a template named after the file
+
+        A file named ``victory.wav`` or ``victory_2.wav`` yields event "victory".
+        """
+        clips = read_template_clips(directory)
+        for name, audio, rate in clips:
+            self.add_template(name, audio, rate, threshold)
+        return len(clips)
+
+    def _match_templates(self) -> List[tuple]:
+        matches = []
+        for template in self.templates:
+            if template.cooldown > 0:
+                template.cooldown -= 1
+                continue
+            window = self.history.latest(template.length)
+            if window is None:
+                continue
+            size = template.length * self.n_features
+            flat = self._scratch[:size]
+            np.copyto(flat, window.reshape(-1))
+            flat -= flat.mean()
+            std = flat.std()
+            if std < 1e-6:
+                continue
+            score = float(np.dot(flat, template.vector)) / (size * std)
+            if score >= template.threshold and score > template.peak_score:
+                template.peak_score = score
+                template.peak_frame = self.frames_processed - 1
+            elif template.peak_frame >= 0:
+                # Score is past its peak: report the best alignment once, then
+                # don't re-fire while the same clip is still inside the window
+                matches.append((template.name, template.peak_score, template.peak_frame,
+                                template.length))
+                template.cooldown = template.length
+                template.peak_score = 0.0
+                template.peak_frame = -1
+        return matches
+
+    def process_block(self, block: np.ndarray) -> List[DetectedEvent]:
+        """
+        Run detection over the next capture block
+
+        Args:
+            block: Audio block, mono or (frames, channels)
+
+        Returns:
+            Events completed within this block
+        """
+        started = time.perf_counter()
+        features = self.extractor.process_block(block)
+        self.samples_processed += block.shape[0]
+        stream_end = self.samples_processed / self.sample_rate
+
+        if self.templates:
+            compressed = compress_log_mel(features.log_mel, out=features.log_mel)
+
+        found = []
+        for i in range(features.n_frames):
+            frame_index = self.frames_processed
+            self.frames_processed += 1
+            frame_time = frame_index * self.hop_seconds
+
+            strength = self.onsets.update(float(features.flux[i]))
+            if strength is not None and strength >= self.onset_min_strength:
+                onset_time = frame_time - self.hop_seconds
+                found.append((ONSET_EVENT, onset_time, strength, onset_time))
+
+            if self.templates:
+                self.history.write(compressed[i:i + 1])
+                for name, score, end_frame, length in self._match_templates():
+                    found.append((
+                        name,
+                        (end_frame - length + 1) * self.hop_seconds,
+                        score,
+                        end_frame * self.hop_seconds
+                    ))
+
+        processing_ms = (time.perf_counter() - started) * 1000
+        events = []
+        for name, event_time, score, evidence_time in found:
+            # Latency counts from the last frame needed to recognise the event
+            latency_ms = (stream_end - evidence_time) * 1000 + processing_ms
+            events.append(DetectedEvent(name, max(event_time, 0.0), float(score), latency_ms))
+            self.events_detected += 1
+            self.total_latency_ms += latency_ms
+        return events
+
+    def reset(self):
+        self.extractor.reset()
+        self.onsets = OnsetDetector()
+        self.history = AudioRingBuffer(self.history.capacity, channels=self.n_features)
+        for template in self.templates:
+            template.cooldown = 0
+            template.peak_score = 0.0
+            template.peak_frame = -1
+        self.samples_processed = 0
+        self.frames_processed = 0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "templates": len(self.templates),
+            "frames_processed": self.frames_processed,
+            "events_detected": self.events_detected,
+            "mean_latency_ms": (
+                self.total_latency_ms / self.events_detected if self.events_detected else 0.0
+            ),
+        }
@@ -0,0 +1,215 @@
+"""
+Broadcast hub for real-time dashboard events
+Fans events out to WebSocket clients through bounded per-client queues
+"""
+import asyncio
+import json
+import logging
+import struct
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Optional, Dict, Any, Deque, Set
+
+from app.core.config import get_settings
+from app.services.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Topic codes for the binary encoding (first byte of every binary frame)
+TOPIC_CODES: Dict[str, int] = {
+    "meter": 1,
+    "detection": 2,
+    "trigger": 3,
+    "status": 4,
+    "metrics": 5,
+}
+
+# Meter frames are packed as little-endian float32 in this field order
+METER_FIELDS = ("rms", "peak", "spectral_centroid", "spectral_flux")
+_METER_STRUCT = struct.Struct("<Bd" + "f" * len(METER_FIELDS))
+
+ENCODINGS = ("json", "binary")
+DROP_POLICIES = ("drop_oldest", "drop_newest")
+
+
+class HubMessage:
+    """One published event; each encoding is produced at most once"""
+
+    __slots__ = ("topic", "payload", "timestamp", "_encoded")
+
+    def __init__(self, topic: str, payload: Dict[str, Any]):
+        self.topic = topic
+        self.payload = payload
+        self.timestamp = time.time()
+        self._encoded: Dict[str, Any] = {}
+
+    def encode(self, encoding: str):
+        """Text (str) for json, bytes for binary; cached across subscribers"""
+        cached = self._encoded.get(encoding)
+        if cached is not None:
+            return cached
+
+        if encoding == "binary":
+            code = TOPIC_CODES.get(self.topic, 0)
+            if self.topic == "meter":
+                values = [float(self.payload.get(field, 0.0)) for field in METER_FIELDS]
+                data = _METER_STRUCT.pack(code, self.timestamp, *values)
+            else:
+                # Non-meter topics: topic byte followed by the JSON document
+                data = bytes((code,)) + self.encode("json").encode("utf-8")
+        else:
+            data = json.dumps(
+                {"type": self.topic, "timestamp": self.timestamp, "data": self.payload},
+                separators=(",", ":"),
+                default=str
+            )
+
+        self._encoded[encoding] = data
+        return data
+
+
+class Subscriber:
+    """
+    A connected client's outbound queue
+
+    Regular events go through a bounded deque; when the client falls behind
+    the configured policy drops either the oldest queued event or the new one.
+    Coalesced topics (meters) skip the queue entirely and keep only the
+    latest value, so a slow client just sees fewer, fresher updates.
+    """
+
+    def __init__(self, encoding: str = "json", max_queue: int = 64, policy: str = "drop_oldest"):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"encoding must be one of {ENCODINGS}")
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"policy must be one of {DROP_POLICIES}")
+
+        self.encoding = encoding
+        self.max_queue = max_queue
+        self.policy = policy
+        self.queue: Deque[HubMessage] = deque()
+        self.latest: Dict[str, HubMessage] = {}
+        self.wakeup = asyncio.Event()
+        self.dropped = 0
+        self.coalesced = 0
+        self.sent = 0
+
+    def offer(self, message: HubMessage, coalesce: bool):
+        if coalesce:
+            if message.topic in self.latest:
+                self.coalesced += 1
+            self.latest[message.topic] = message
+        elif len(self.queue) >= self.max_queue:
+            self.dropped += 1
+            if self.policy == "drop_newest":
+                return
+            self.queue.popleft()
+            self.queue.append(message)
+        else:
+            self.queue.append(message)
+        self.wakeup.set()
+
+    def drain(self):
+        """Take everything pending, queued events first then latest coalesced values"""
+        pending = list(self.queue)
+        self.queue.clear()
+        if self.latest:
+            pending.extend(self.latest.values())
+            self.latest.clear()
+        self.wakeup.clear()
+        return pending
+
+
+class EventHub:
+    """Publishes events to every subscriber without waiting on any of them"""
+
+    def __init__(self, max_queue: int = 64, policy: str = "drop_oldest"):
+        self.max_queue = max_queue
+        self.policy = policy
+        self.subscribers: Set[Subscriber] = set()
+        self.published = 0
+        # Counts carried over from subscribers that have disconnected
+        self._closed_dropped = 0
+        self._closed_coalesced = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self, encoding: str = "json") -> Subscriber:
+        self._loop = asyncio.get_running_loop()
+        subscriber = Subscriber(encoding, self.max_queue, self.policy)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        if subscriber in self.subscribers:
+            self.subscribers.discard(subscriber)
+            self._closed_dropped += subscriber.dropped
+            self._closed_coalesced += subscriber.coalesced
+
+    def publish(self, topic: str, payload: Dict[str, Any], coalesce: Optional[bool] = None):
+        """
+        Queue an event for every subscriber (event loop thread only)
+
+        Args:
+            topic: Event type, e.g. "meter", "detection", "trigger"
+            payload: JSON-serializable event data
+            coalesce: Keep only the latest value per client (defaults to True for meters)
+        """
+        if coalesce is None:
+            coalesce = topic == "meter"
+        message = HubMessage(topic, payload)
+        for subscriber in self.subscribers:
+            subscriber.offer(message, coalesce)
+        self.published += 1
+
+    def publish_threadsafe(
+        self,
+        topic: str,
+        payload: Dict[str, Any],
+        coalesce: Optional[bool] = None
+    ):
+        """Publish from a non-event-loop thread (e.g. an audio callback consumer)"""
+        if self._loop is not None and self.subscribers:
+            self._loop.call_soon_threadsafe(self.publish, topic, payload, coalesce)
+
+    async def serve(self, websocket, subscriber: Subscriber):
+        """Send a subscriber's events to its WebSocket until it disconnects"""
+        while True:
+            await subscriber.wakeup.wait()
+            for message in subscriber.drain():
+                data = message.encode(subscriber.encoding)
+                if subscriber.encoding == "binary":
+                    await websocket.send_bytes(data)
+                else:
+                    await websocket.send_text(data)
+                subscriber.sent += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "dropped": self._closed_dropped + sum(s.dropped for s in self.subscribers),
+            "coalesced": self._closed_coalesced + sum(s.coalesced for s in self.subscribers),
+            "queued": sum(len(s.queue) for s in self.subscribers),
+        }
+
+
+@lru_cache()
+def get_event_hub() -> EventHub:
+    """Get the shared event hub instance"""
+    settings = get_settings()
+    hub = EventHub(max_queue=settings.WS_CLIENT_QUEUE_SIZE, policy=settings.WS_DROP_POLICY)
+    metrics = get_metrics()
+    metrics.counter(
+        "ws_events_dropped_total", "WebSocket events dropped for slow clients",
+        function=lambda: {(): hub.stats()["dropped"]}
+    )
+    metrics.gauge(
+        "ws_queue_depth", "Events queued across WebSocket clients",
+        function=lambda: {(): hub.stats()["queued"]}
+    )
+    metrics.gauge(
+        "ws_subscribers", "Connected WebSocket clients",
+        function=lambda: {(): len(hub.subscribers)}
+    )
+    return hub
@@ -0,0 +1,154 @@
+"""
+Incremental multi-timescale feature statistics
+Keeps running baselines so trigger decisions can compare "now" against "normal"
+"""
+import math
+import logging
+from typing import Optional, Dict
+
+logger = logging.getLogger(__name__)
+
+# Horizon name -> time constant in seconds
+DEFAULT_HORIZONS: Dict[str, float] = {
+    "250ms": 0.25,
+    "2s": 2.0,
+    "10s": 10.0,
+    "60s": 60.0,
+}
+
+METRICS = ("loudness_db", "energy", "pitch_hz")
+
+SILENCE_DB = -100.0
+
+
+def rms_to_db(rms: float) -> float:
+    """Convert linear RMS to dBFS, clamped at the silence floor"""
+    if rms <= 0.0:
+        return SILENCE_DB
+    return max(20.0 * math.log10(rms), SILENCE_DB)
+
+
+class ExponentialStats:
+    """Exponentially weighted mean and variance, updated in O(1)"""
+
+    __slots__ = ("mean", "variance", "count")
+
+    def __init__(self):
+        self.mean = 0.0
+        self.variance = 0.0
+        self.count = 0
+
+    def update(self, value: float, alpha: float):
+        if self.count == 0:
+            self.mean = value
+            self.variance = 0.0
+        else:
+            # West's incremental form of the EW mean/variance
+            delta = value - self.mean
+            self.mean += alpha * delta
+            self.variance = (1.0 - alpha) * (self.variance + alpha * delta * delta)
+        self.count += 1
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class MultiTimescaleAggregator:
+    """
+    Running loudness, energy and pitch summaries at several horizons
+
+    Each update is a constant amount of work per (metric, horizon) pair and
+    never looks at past blocks, so it is cheap enough to run on every capture
+    block. Smoothing factors are derived from the block duration and cached
+    while the block size stays the same.
+    """
+
+    def __init__(self, horizons: Optional[Dict[str, float]] = None):
+        self.horizons = dict(horizons or DEFAULT_HORIZONS)
+        self.stats: Dict[str, Dict[str, ExponentialStats]] = {
+            metric: {name: ExponentialStats() for name in self.horizons}
+            for metric in METRICS
+        }
+        self.elapsed = 0.0
+        self._alpha_dt: Optional[float] = None
+        self._alphas: Dict[str, float] = {}
+
+    def _alphas_for(self, dt: float) -> Dict[str, float]:
+        if dt != self._alpha_dt:
+            self._alphas = {
+                name: 1.0 - math.exp(-dt / tau) for name, tau in self.horizons.items()
+            }
+            self._alpha_dt = dt
+        return self._alphas
+
+    def update(
+        self,
+        dt: float,
+        rms: float,
+        pitch_hz: Optional[float] = None
+    ):
+        """
+        Fold one block into every horizon
+
+        Args:
+            dt: Block duration in seconds
+            rms: Block RMS level (linear)
+            pitch_hz: Estimated pitch, or None for unvoiced/silent blocks
+        """
+        alphas = self._alphas_for(dt)
+        loudness = rms_to_db(rms)
+        energy = rms * rms
+
+        loudness_stats = self.stats["loudness_db"]
+        energy_stats = self.stats["energy"]
+        pitch_stats = self.stats["pitch_hz"]
+        for name, alpha in alphas.items():
+            loudness_stats[name].update(loudness, alpha)
+            energy_stats[name].update(energy, alpha)
+            if pitch_hz is not None:
+                pitch_stats[name].update(pitch_hz, alpha)
+
+        self.elapsed += dt
+
+    def mean(self, metric: str, horizon: str) -> float:
+        return self.stats[metric][horizon].mean
+
+    def std(self, metric: str, horizon: str) -> float:
+        return self.stats[metric][horizon].std
+
+    def is_warm(self, horizon: str) -> bool:
+        """True once at least one time constant of audio has been seen"""
+        return self.elapsed >= self.horizons[horizon]
+
+    def zscore(self, metric: str, short: str = "250ms", long: str = "60s") -> float:
+        """
+        How far the short-term mean sits above the long-term baseline
+
+        Returns 0.0 until there is data for both horizons.
+        """
+        short_stats = self.stats[metric][short]
+        long_stats = self.stats[metric][long]
+        if short_stats.count == 0 or long_stats.count == 0:
+            return 0.0
+        # Floor the spread so a perfectly steady baseline doesn't explode the score
+        spread = max(long_stats.std, 1e-3 if metric == "energy" else 1.0)
+        return (short_stats.mean - long_stats.mean) / spread
+
+    def reset(self):
+        for per_metric in self.stats.values():
+            for stats in per_metric.values():
+                stats.mean = 0.0
+                stats.variance = 0.0
+                stats.count = 0
+        self.elapsed = 0.0
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Current mean/std for every metric and horizon"""
+        return {
+            metric: {
+                name: {"mean": stats.mean, "std": stats.std}
+                for name, stats in per_metric.items()
+            }
+            for metric, per_metric in self.stats.items()
+        }
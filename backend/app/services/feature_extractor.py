@@ -0,0 +1,374 @@
+"""
+Frame-based spectral feature extraction
+Computes every per-frame feature the detectors need from a single FFT pass
+"""
+import inspect
+import numpy as np
+import logging
+from dataclasses import dataclass
+from typing import Optional, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# numpy >= 2.0 lets rfft write into a preallocated array
+_RFFT_SUPPORTS_OUT = "out" in inspect.signature(np.fft.rfft).parameters
+
+# Default band edges in Hz: sub-bass, bass, low-mid, high-mid, presence, brilliance
+DEFAULT_BAND_EDGES: Tuple[float, ...] = (20.0, 250.0, 500.0, 2000.0, 4000.0, 8000.0, 20000.0)
+
+EPSILON = 1e-10
+
+
+@dataclass
+class SpectralFeatures:
+    """
+    Per-frame features for a batch of frames
+
+    Arrays are views into the extractor's preallocated outputs and are only
+    valid until the next call on the same extractor; copy them to keep them.
+    """
+    rms: np.ndarray                 # (n_frames,)
+    zero_crossing_rate: np.ndarray  # (n_frames,)
+    centroid: np.ndarray            # (n_frames,) Hz
+    rolloff: np.ndarray             # (n_frames,) Hz
+    flux: np.ndarray                # (n_frames,)
+    flatness: np.ndarray            # (n_frames,) 0 (tonal) .. 1 (noise)
+    band_energies: np.ndarray       # (n_frames, n_bands)
+    mfcc: np.ndarray                # (n_frames, n_mfcc)
+    log_mel: np.ndarray             # (n_frames, n_mels) natural-log mel power
+    magnitude: np.ndarray           # (n_frames, n_bins)
+    frame_times: np.ndarray         # (n_frames,) seconds, frame centre relative to input
+
+    @property
+    def n_frames(self) -> int:
+        return self.rms.shape[0]
+
+
+def mel_filterbank(
+    sample_rate: int,
+    n_fft: int,
+    n_mels: int,
+    fmin: float = 0.0,
+    fmax: Optional[float] = None
+) -> np.ndarray:
+    """Triangular mel filterbank of shape (n_mels, n_fft // 2 + 1)"""
+    fmax = fmax or sample_rate / 2
+
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + np.asarray(hz) / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10.0 ** (np.asarray(mel) / 2595.0) - 1.0)
+
+    bin_freqs = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    mel_points = np.linspace(hz_to_mel(fmin), hz_to_mel(fmax), n_mels + 2)
+    hz_points = mel_to_hz(mel_points)
+
+    filters = np.zeros((n_mels, bin_freqs.shape[0]), dtype=np.float32)
+    for i in range(n_mels):
+        left, center, right = hz_points[i], hz_points[i + 1], hz_points[i + 2]
+        rising = (bin_freqs - left) / max(center - left, EPSILON)
+        falling = (right - bin_freqs) / max(right - center, EPSILON)
+        filters[i] = np.maximum(0.0, np.minimum(rising, falling))
+    return filters
+
+
+def dct_matrix(n_out: int, n_in: int) -> np.ndarray:
+    """Orthonormal DCT-II matrix of shape (n_out, n_in)"""
+    n = np.arange(n_in)
+    k = np.arange(n_out)[:, None]
+    matrix = np.cos(np.pi * k * (2 * n + 1) / (2 * n_in)) * np.sqrt(2.0 / n_in)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+
+class SpectralFeatureExtractor:
+    """
+    Batched spectral feature engine
+
+    Windows, filterbanks and output arrays are built once and reused. Frames are
+    extracted as strided views of the input, so the only per-call work is the
+    windowing multiply, one real FFT per frame and a handful of matrix products.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 44100,
+        frame_size: int = 1024,
+        hop_size: int = 512,
+        n_mels: int = 40,
+        n_mfcc: int = 13,
+        rolloff_percent: float = 0.85,
+        band_edges: Tuple[float, ...] = DEFAULT_BAND_EDGES,
+        max_frames: int = 64
+    ):
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size
+        self.hop_size = hop_size
+        self.n_mels = n_mels
+        self.n_mfcc = n_mfcc
+        self.rolloff_percent = rolloff_percent
+        self.n_bins = frame_size // 2 + 1
+
+        # Precomputed analysis tables
+        self.window = np.hanning(frame_size).astype(np.float32)
+        self.frequencies = np.fft.rfftfreq(frame_size, 1.0 / sample_rate).astype(np.float32)
+        self.mel_filters = mel_filterbank(sample_rate, frame_size, n_mels)
+        self.dct = dct_matrix(n_mfcc, n_mels)
+
+        nyquist = sample_rate / 2
+        edges = [e for e in band_edges if e < nyquist] + [nyquist]
+        self.band_edges: List[float] = edges
+        self.band_matrix = np.zeros((self.n_bins, len(edges) - 1), dtype=np.float32)
+        for i in range(len(edges) - 1):
+            mask = (self.frequencies >= edges[i]) & (self.frequencies < edges[i + 1])
+            self.band_matrix[mask, i] = 1.0
+
+        # Streaming state: carry-over samples and previous magnitude for flux
+        self._carry = np.zeros(frame_size + hop_size, dtype=np.float32)
+        self._carry_len = 0
+        self._prev_magnitude = np.zeros(self.n_bins, dtype=np.float32)
+        self._has_prev = False
+
+        self._allocate(max_frames)
+
+    def _allocate(self, max_frames: int):
+        """(Re)allocate the per-frame work and output arrays"""
+        self.max_frames = max_frames
+        n_bands = self.band_matrix.shape[1]
+        self._windowed = np.zeros((max_frames, self.frame_size), dtype=np.float32)
+        self._spectrum = np.zeros((max_frames, self.n_bins), dtype=np.complex64)
+        self._magnitude = np.zeros((max_frames, self.n_bins), dtype=np.float32)
+        self._power = np.zeros((max_frames, self.n_bins), dtype=np.float32)
+        self._cumulative = np.zeros((max_frames, self.n_bins), dtype=np.float32)
+        self._diff = np.zeros((max_frames, self.n_bins), dtype=np.float32)
+        self._mel = np.zeros((max_frames, self.n_mels), dtype=np.float32)
+        self._rms = np.zeros(max_frames, dtype=np.float32)
+        self._zcr = np.zeros(max_frames, dtype=np.float32)
+        self._centroid = np.zeros(max_frames, dtype=np.float32)
+        self._rolloff = np.zeros(max_frames, dtype=np.float32)
+        self._flux = np.zeros(max_frames, dtype=np.float32)
+        self._flatness = np.zeros(max_frames, dtype=np.float32)
+        self._totals = np.zeros(max_frames, dtype=np.float32)
+        self._bands = np.zeros((max_frames, n_bands), dtype=np.float32)
+        self._mfcc = np.zeros((max_frames, self.n_mfcc), dtype=np.float32)
+        self._times = np.zeros(max_frames, dtype=np.float32)
+
+    @staticmethod
+    def to_mono(audio_data: np.ndarray) -> np.ndarray:
+        """Downmix (frames, channels) audio to a 1-D float32 signal"""
+        if audio_data.ndim == 2:
+            if audio_data.shape[1] == 1:
+                audio_data = audio_data[:, 0]
+            else:
+                audio_data = audio_data.mean(axis=1)
+        return np.asarray(audio_data, dtype=np.float32)
+
+    def frame_count(self, n_samples: int) -> int:
+        """Number of complete frames in a signal of n_samples"""
+        if n_samples < self.frame_size:
+            return 0
+        return 1 + (n_samples - self.frame_size) // self.hop_size
+
+    def extract(self, audio_data: np.ndarray) -> SpectralFeatures:
+        """
+        Extract features for every frame of a complete buffer (stateless)
+
+        Signals shorter than one frame are zero-padded to a single frame.
+
+        Args:
+            audio_data: Audio samples, mono or (frames, channels)
+
+        Returns:
+            SpectralFeatures for all frames in the buffer
+        """
+        signal = self.to_mono(audio_data)
+        if signal.shape[0] < self.frame_size:
+            padded = np.zeros(self.frame_size, dtype=np.float32)
+            padded[:signal.shape[0]] = signal
+            signal = padded
+        return self._compute(signal, None)
+
+    def process_block(self, block: np.ndarray) -> SpectralFeatures:
+        """
+        Extract features for a live block, keeping frame alignment across calls
+
+        Samples that do not fill a complete hop are carried over to the next
+        block and spectral flux is computed against the last frame of the
+        previous call.
+
+        Args:
+            block: Audio block, mono or (frames, channels)
+
+        Returns:
+            SpectralFeatures for the frames completed by this block (may be empty)
+        """
+        block = self.to_mono(block)
+        signal = np.concatenate((self._carry[:self._carry_len], block))
+        features = self._compute(signal, self._prev_magnitude if self._has_prev else None)
+
+        n_frames = features.n_frames
+        if n_frames:
+            self._prev_magnitude[:] = features.magnitude[-1]
+            self._has_prev = True
+            consumed = n_frames * self.hop_size
+        else:
+            consumed = 0
+
+        remaining = signal[consumed:]
+        if remaining.shape[0] > self._carry.shape[0]:
+            self._carry = np.zeros(remaining.shape[0], dtype=np.float32)
+        self._carry[:remaining.shape[0]] = remaining
+        self._carry_len = remaining.shape[0]
+        return features
+
+    def reset(self):
+        """Clear streaming state"""
+        self._carry_len = 0
+        self._prev_magnitude.fill(0.0)
+        self._has_prev = False
+
+    def _compute(
+        self,
+        signal: np.ndarray,
+        prev_magnitude: Optional[np.ndarray]
+    ) -> SpectralFeatures:
+        n = self.frame_count(signal.shape[0])
+        if n > self.max_frames:
+            self._allocate(max(n, 2 * self.max_frames))
+
+        if n:
+            frames = np.lib.stride_tricks.sliding_window_view(
+                signal, self.frame_size
+            )[::self.hop_size][:n]
+        else:
+            frames = self._windowed[:0]
+
+        # Time-domain features straight off the strided frames
+        rms = self._rms[:n]
+        np.einsum("ij,ij->i", frames, frames, out=rms)
+        np.divide(rms, self.frame_size, out=rms)
+        np.sqrt(rms, out=rms)
+
+        zcr = self._zcr[:n]
+        signs = np.signbit(frames)
+        np.sum(signs[:, 1:] != signs[:, :-1], axis=1, out=zcr)
+        np.divide(zcr, self.frame_size - 1, out=zcr)
+
+        # One FFT pass
+        windowed = self._windowed[:n]
+        np.multiply(frames, self.window, out=windowed)
+        spectrum = self._spectrum[:n]
+        if _RFFT_SUPPORTS_OUT:
+            np.fft.rfft(windowed, axis=1, out=spectrum)
+        else:
+            spectrum[:] = np.fft.rfft(windowed, axis=1)
+
+        magnitude = self._magnitude[:n]
+        np.abs(spectrum, out=magnitude)
+        power = self._power[:n]
+        np.multiply(magnitude, magnitude, out=power)
+
+        totals = self._totals[:n]
+        np.sum(magnitude, axis=1, out=totals)
+        np.add(totals, EPSILON, out=totals)
+
+        centroid = self._centroid[:n]
+        np.matmul(magnitude, self.frequencies, out=centroid)
+        np.divide(centroid, totals, out=centroid)
+
+        cumulative = self._cumulative[:n]
+        np.cumsum(magnitude, axis=1, out=cumulative)
+        threshold = totals * self.rolloff_percent
+        rolloff_bins = np.argmax(cumulative >= threshold[:, None], axis=1)
+        rolloff = self._rolloff[:n]
+        np.take(self.frequencies, rolloff_bins, out=rolloff)
+
+        # Half-wave rectified spectral flux against the previous frame
+        flux = self._flux[:n]
+        diff = self._diff[:n]
+        if n:
+            np.subtract(magnitude[1:], magnitude[:-1], out=diff[1:])
+            if prev_magnitude is not None:
+                np.subtract(magnitude[0], prev_magnitude, out=diff[0])
+            else:
+                diff[0].fill(0.0)
+            np.maximum(diff, 0.0, out=diff)
+            np.einsum("ij,ij->i", diff, diff, out=flux)
+            np.sqrt(flux, out=flux)
+
+        # Spectral flatness: geometric / arithmetic mean of the power spectrum
+        flatness = self._flatness[:n]
+        np.add(power, EPSILON, out=diff)
+        np.log(diff, out=diff)
+        np.mean(diff, axis=1, out=flatness)
+        np.exp(flatness, out=flatness)
+        np.divide(flatness, np.mean(power, axis=1) + EPSILON, out=flatness)
+
+        bands = self._bands[:n]
+        np.matmul(power, self.band_matrix, out=bands)
+
+        mel = self._mel[:n]
+        np.matmul(power, self.mel_filters.T, out=mel)
+        np.add(mel, EPSILON, out=mel)
+        np.log(mel, out=mel)
+        mfcc = self._mfcc[:n]
+        np.matmul(mel, self.dct.T, out=mfcc)
+
+        times = self._times[:n]
+        times[:] = np.arange(n, dtype=np.float32)
+        np.multiply(times, self.hop_size, out=times)
+        np.add(times, self.frame_size / 2, out=times)
+        np.divide(times, self.sample_rate, out=times)
+
+        return SpectralFeatures(
+            rms=rms,
+            zero_crossing_rate=zcr,
+            centroid=centroid,
+            rolloff=rolloff,
+            flux=flux,
+            flatness=flatness,
+            band_energies=bands,
+            mfcc=mfcc,
+            log_mel=mel,
+            magnitude=magnitude,
+            frame_times=times,
+        )
+
+
+def estimate_pitch(
+    signal: np.ndarray,
+    sample_rate: int,
+    fmin: float = 70.0,
+    fmax: float = 500.0,
+    voicing_threshold: float = 0.3
+) -> Optional[float]:
+    """
+    Cheap autocorrelation pitch estimate for a short mono block
+
+    Args:
+        signal: Mono audio samples
+        sample_rate: Sample rate in Hz
+        fmin: Lowest pitch to search for
+        fmax: Highest pitch to search for
+        voicing_threshold: Minimum normalized autocorrelation peak
+
+    Returns:
+        Pitch in Hz, or None if the block looks unvoiced
+    """
+    n = signal.shape[0]
+    min_lag = max(int(sample_rate / fmax), 1)
+    max_lag = min(int(sample_rate / fmin), n - 1)
+    if max_lag <= min_lag:
+        return None
+
+    centered = signal - signal.mean()
+    spectrum = np.fft.rfft(centered, n=2 * n)
+    autocorr = np.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2)[:n]
+    if autocorr[0] <= EPSILON:
+        return None
+
+    lag = min_lag + int(np.argmax(autocorr[min_lag:max_lag]))
+    if autocorr[lag] / autocorr[0] < voicing_threshold:
+        return None
+    return float(sample_rate / lag)
@@ -0,0 +1,128 @@
+"""
+Shared outbound HTTP client and resilience helpers
+One pooled httpx.AsyncClient per process, plus retry backoff and a circuit breaker
+"""
+import importlib.util
+import logging
+import random
+import time
+from typing import Optional, Iterator
+
+import httpx
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional h2 package (pip install "httpx[http2]")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the process-wide pooled HTTP client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        settings = get_settings()
+        _client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            timeout=httpx.Timeout(
+                settings.HTTP_READ_TIMEOUT_SECONDS,
+                connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+            ),
+        )
+    return _client
+
+
+async def close_http_client():
+    """Close the shared client (call once at shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def backoff_delays(
+    retries: int,
+    base: float,
+    cap: float = 10.0
+) -> Iterator[float]:
+    """Full-jitter exponential backoff delays for each retry"""
+    for attempt in range(retries):
+        yield random.uniform(0.0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    After ``failure_threshold`` failures in a row the breaker opens and
+    refuses calls for ``reset_timeout`` seconds, then lets a single trial
+    call through (half-open). A success closes it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> bool:
+        """
+        Raise CircuitOpenError if the call must not be made
+
+        Returns:
+            True if this call is the half-open trial; pass it to release()
+            once the call is over, however it ended
+        """
+        state = self.state
+        if state == "open":
+            raise CircuitOpenError("Circuit breaker is open")
+        if state == "half_open":
+            if self._trial_in_flight:
+                raise CircuitOpenError("Circuit breaker trial call already in flight")
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def release(self, trial: bool):
+        """
+        End a call that recorded no outcome (cancelled, or an unexpected error)
+
+        Frees the half-open trial slot so the next call can try again;
+        a no-op after record_success/record_failure.
+        """
+        if trial:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(f"Circuit breaker opened after {self.failures} failures")
+            self.opened_at = time.monotonic()
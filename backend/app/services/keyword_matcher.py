@@ -0,0 +1,210 @@
+"""
+Compiled multi-keyword matcher for streaming transcripts
+Token-level Aho-Corasick automaton with optional edit-distance-1 fuzzy tokens
+"""
+import logging
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Optional, List, Dict, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[\w']+")
+
+# Tokens shorter than this must match exactly; "gg" -> "go" is not a typo
+FUZZY_MIN_LENGTH = 4
+
+_FUZZY_CACHE_SIZE = 4096
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, keeping apostrophes (e.g. "let's")"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _deletions(token: str) -> List[str]:
+    return [token[:i] + token[i + 1:] for i in range(len(token))]
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la == lb:
+        return sum(x != y for x, y in zip(a, b)) == 1
+    if la > lb:
+        a, b = b, a
+    # b is one longer than a: skip one char of b
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+class KeywordAutomaton:
+    """
+    Compiled, immutable matcher for a fixed keyword set
+
+    Keywords may be multi-word phrases; matching is over tokens, so each
+    transcript token costs amortised O(1) regardless of how many keywords
+    there are. With ``fuzzy`` enabled, a transcript token that is one edit
+    away from a keyword token (and at least FUZZY_MIN_LENGTH long) is treated
+    as that keyword token, found through a symmetric-delete index rather than
+    by comparing against every keyword.
+
+    Use ``stream()`` to get a matcher with its own position in a transcript.
+    """
+
+    def __init__(self, keywords: Iterable[str], fuzzy: bool = False):
+        self.fuzzy = fuzzy
+        self.keywords: List[str] = []
+
+        # Trie: goto[state][token] -> state; output[state] -> keyword indices
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        vocabulary = set()
+        for keyword in dict.fromkeys(keywords):
+            tokens = tokenize(keyword)
+            if not tokens:
+                continue
+            self._insert(tokens, len(self.keywords))
+            self.keywords.append(keyword)
+            vocabulary.update(tokens)
+
+        self._build_failure_links()
+        self.vocabulary = vocabulary
+        self._delete_index: Dict[str, List[str]] = {}
+        if fuzzy:
+            self._build_delete_index()
+        self._fuzzy_cache: Dict[str, Optional[str]] = {}
+
+    def _insert(self, tokens: List[str], index: int):
+        state = 0
+        for token in tokens:
+            next_state = self._goto[state].get(token)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][token] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(index)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[child] = target if target != child else 0
+                # Inherit matches that end at the fallback state
+                self._output[child].extend(self._output[self._fail[child]])
+
+    def _build_delete_index(self):
+        for token in self.vocabulary:
+            if len(token) < FUZZY_MIN_LENGTH:
+                continue
+            for variant in [token] + _deletions(token):
+                self._delete_index.setdefault(variant, []).append(token)
+
+    def _canonical(self, token: str) -> Optional[str]:
+        """Map a transcript token onto a keyword token (exact or fuzzy)"""
+        if token in self.vocabulary:
+            return token
+        if not self.fuzzy or len(token) < FUZZY_MIN_LENGTH - 1:
+            return None
+
+        if token in self._fuzzy_cache:
+            return self._fuzzy_cache[token]
+
+        match = None
+        for variant in [token] + _deletions(token):
+            for candidate in self._delete_index.get(variant, ()):
+                if _within_one_edit(token, candidate):
+                    match = candidate
+                    break
+            if match:
+                break
+
+        if len(self._fuzzy_cache) >= _FUZZY_CACHE_SIZE:
+            self._fuzzy_cache.clear()
+        self._fuzzy_cache[token] = match
+        return match
+
+    def stream(self) -> "KeywordMatcher":
+        """New streaming matcher positioned at the start of a transcript"""
+        return KeywordMatcher(self)
+
+
+class KeywordMatcher:
+    """
+    Streaming position of a transcript within a KeywordAutomaton
+
+    The automaton state survives between ``feed`` calls, so a phrase split
+    across two transcript chunks is still found.
+    """
+
+    def __init__(self, automaton: KeywordAutomaton):
+        self.automaton = automaton
+        self.state = 0
+        self.tokens_seen = 0
+
+    def feed(self, tokens: Iterable[str]) -> List[str]:
+        """
+        Advance the automaton over the next chunk of transcript tokens
+
+        Args:
+            tokens: Lowercase tokens (see tokenize)
+
+        Returns:
+            Keywords whose last token appeared in this chunk, in match order
+        """
+        automaton = self.automaton
+        goto, fail, output = automaton._goto, automaton._fail, automaton._output
+        keywords = automaton.keywords
+        state = self.state
+        matches: List[str] = []
+
+        for raw in tokens:
+            self.tokens_seen += 1
+            token = automaton._canonical(raw)
+            if token is None:
+                state = 0
+                continue
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for index in output[state]:
+                matches.append(keywords[index])
+
+        self.state = state
+        return matches
+
+    def feed_text(self, text: str) -> List[str]:
+        """Tokenize and feed a transcript fragment"""
+        return self.feed(tokenize(text))
+
+    def reset(self):
+        """Forget partial phrase matches (e.g. after a gap in the transcript)"""
+        self.state = 0
+
+
+@lru_cache(maxsize=32)
+def _compile(keywords: Tuple[str, ...], fuzzy: bool) -> KeywordAutomaton:
+    logger.info(f"Compiling keyword matcher for {len(keywords)} keywords (fuzzy={fuzzy})")
+    return KeywordAutomaton(keywords, fuzzy=fuzzy)
+
+
+def compile_keywords(keywords: Iterable[str], fuzzy: bool = False) -> KeywordAutomaton:
+    """Get the compiled automaton for a keyword set, building it only once per set"""
+    return _compile(tuple(sorted(set(keywords))), fuzzy)
@@ -0,0 +1,240 @@
+"""
+Low-overhead runtime metrics
+Fixed-bucket latency histograms, counters and gauges with Prometheus text output
+"""
+import math
+import time
+import logging
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Pipeline stages timed end to end
+STAGES = ("capture", "analysis", "decision", "generation", "playback")
+
+# Seconds; spans sub-millisecond callbacks up to multi-second API generations
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape_label(value: Any) -> str:
+    # Label values may be device or rule names; the text format needs these escaped
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """
+    Monotonic count per label set
+
+    Increments are plain integer adds with no lock; a rare lost update from
+    the audio thread is an acceptable price for staying off the hot path.
+    A ``function`` turns the counter into a view over an existing count.
+    """
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Tuple[str, ...] = (),
+        function: Optional[Callable[[], Dict[LabelValues, float]]] = None
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+        self.function = function
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self) -> Dict[LabelValues, float]:
+        return self.function() if self.function else dict(self.values)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in self.samples().items():
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            )
+        return lines
+
+
+class Gauge(Counter):
+    """Current value per label set (set directly or read from a function at scrape time)"""
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str):
+        self.values[labels] = value
+
+
+class Histogram(_Metric):
+    """
+    Fixed-bucket histogram per label set
+
+    Observing is a binary search over the bucket bounds plus two adds; bucket
+    counts are stored non-cumulatively and summed only when rendered.
+    """
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self.series: Dict[LabelValues, List[Any]] = {}
+
+    def _series(self, labels: LabelValues) -> List[Any]:
+        series = self.series.get(labels)
+        if series is None:
+            series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            self.series[labels] = series
+        return series
+
+    def observe(self, value: float, *labels: str):
+        series = self.series.get(labels) or self._series(labels)
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def quantile(self, q: float, *labels: str) -> Optional[float]:
+        """Bucket upper bound below which a fraction q of observations fall"""
+        series = self.series.get(labels)
+        if not series or not series[2]:
+            return None
+        target = q * series[2]
+        running = 0
+        for bound, count in zip(self.buckets + (math.inf,), series[0]):
+            running += count
+            if running >= target:
+                return bound
+        return math.inf
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, (counts, total, count) in self.series.items():
+            running = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                running += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {running}"
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics with Prometheus text and JSON snapshot output"""
+
+    def __init__(self, namespace: str = "soundstage"):
+        self.namespace = namespace
+        self.metrics: Dict[str, _Metric] = {}
+        self.started = time.time()
+
+        self.stage_latency = self.histogram(
+            "stage_latency_seconds", "Latency of each pipeline stage", ("stage",)
+        )
+        self.xruns = self.counter(
+            "audio_xruns_total", "Audio stream over/underflows", ("stream", "kind")
+        )
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                function: Optional[Callable] = None) -> Counter:
+        return self._register(Counter(f"{self.namespace}_{name}", help_text, labelnames, function))
+
+    def gauge(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+              function: Optional[Callable] = None) -> Gauge:
+        return self._register(Gauge(f"{self.namespace}_{name}", help_text, labelnames, function))
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(f"{self.namespace}_{name}", help_text, labelnames, buckets))
+
+    def observe_stage(self, stage: str, seconds: float):
+        """Record one stage latency (see STAGES)"""
+        self.stage_latency.observe(seconds, stage)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        for metric in self.metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                logger.error(f"Failed to collect metric {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Compact summary for the dashboard: stage percentiles plus scalar metrics"""
+        stages = {}
+        for (stage,), (_, total, count) in self.stage_latency.series.items():
+            stages[stage] = {
+                "count": count,
+                "mean_ms": total / count * 1000 if count else 0.0,
+                "p50_ms": (self.stage_latency.quantile(0.5, stage) or 0.0) * 1000,
+                "p99_ms": (self.stage_latency.quantile(0.99, stage) or 0.0) * 1000,
+            }
+
+        values: Dict[str, Any] = {}
+        for metric in self.metrics.values():
+            if not isinstance(metric, Counter):
+                continue
+            try:
+                samples = metric.samples()
+            except Exception:
+                continue
+            short = metric.name[len(self.namespace) + 1:]
+            for labels, value in samples.items():
+                key = short + "".join(f".{v}" for v in labels)
+                values[key] = value
+
+        return {"uptime": time.time() - self.started, "stages": stages, "values": values}
+
+
+@lru_cache()
+def get_metrics() -> MetricsRegistry:
+    """Get the shared metrics registry"""
+    return MetricsRegistry()
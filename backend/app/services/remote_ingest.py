@@ -0,0 +1,501 @@
+"""
+Remote audio ingest
+Decodes binary PCM frames sent by remote streamers and analyzes each stream
+in its own bounded pipeline
+
+Frame layout (one WebSocket binary message, little-endian):
+    magic b"SSPC" | version u8 | format u8 | channels u16 | sample rate u32 |
+    sequence u32 | interleaved samples (int16 or float32)
+"""
+import asyncio
+import os
+import struct
+import time
+import uuid
+import logging
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, Tuple
+
+from app.core.config import get_settings
+from app.services.activity_gate import ActivityGate
+from app.services.analysis_executor import DETECTORS, run_detectors
+from app.services.audio_analyzer import AudioAnalyzer
+from app.services.keyword_matcher import compile_keywords
+from app.services.metrics import get_metrics
+from app.services.resampler import AnalysisFrontEnd
+from app.services.trigger_engine import DEFAULT_RULES, TriggerEngine
+
+logger = logging.getLogger(__name__)
+
+FRAME_MAGIC = b"SSPC"
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct("<4sBBHII")
+
+# Format code -> (numpy dtype, scale to [-1, 1])
+SAMPLE_FORMATS = {
+    1: ("<i2", 1.0 / 32768.0),
+    2: ("<f4", 1.0),
+}
+
+MAX_CHANNELS = 8
+SAMPLE_RATES = (8000, 192000)  # accepted range
+
+_SEQUENCE_MOD = 1 << 32
+
+
+@dataclass
+class PcmFrame:
+    """One decoded ingest frame"""
+    sequence: int
+    sample_rate: int
+    channels: int
+    scale: float
+    samples: np.ndarray  # (frames, channels) read-only view of the message
+
+    @property
+    def frames(self) -> int:
+        return self.samples.shape[0]
+
+
+def decode_frame(data: bytes) -> PcmFrame:
+    """
+    Parse a frame header and view its samples without copying
+
+    Raises:
+        ValueError: Malformed header or payload
+    """
+    if len(data) < FRAME_HEADER.size:
+        raise ValueError("Frame shorter than its header")
+    magic, version, fmt, channels, sample_rate, sequence = FRAME_HEADER.unpack_from(data)
+    if magic != FRAME_MAGIC:
+        raise ValueError("Not an ingest frame (bad magic)")
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported frame version: {version}")
+    if fmt not in SAMPLE_FORMATS:
+        raise ValueError(f"Unsupported sample format: {fmt}")
+    if not 1 <= channels <= MAX_CHANNELS:
+        raise ValueError(f"Unsupported channel count: {channels}")
+    if not SAMPLE_RATES[0] <= sample_rate <= SAMPLE_RATES[1]:
+        raise ValueError(f"Unsupported sample rate: {sample_rate}")
+
+    dtype, scale = SAMPLE_FORMATS[fmt]
+    frame_bytes = np.dtype(dtype).itemsize * channels
+    payload = len(data) - FRAME_HEADER.size
+    if payload % frame_bytes:
+        raise ValueError("Payload is not a whole number of sample frames")
+    samples = np.frombuffer(data, dtype=dtype, offset=FRAME_HEADER.size)
+    return PcmFrame(
+        sequence, sample_rate, channels, scale, samples.reshape(-1, channels)
+    )
+
+
+class ReorderBuffer:
+    """
+    Puts frames back in sequence order within a small window
+
+    Frames ahead of the expected sequence number wait here (as views of their
+    messages, no copy) until the gap fills. Once more than ``depth`` frames
+    are waiting, the missing ones are declared lost and delivery resumes at
+    the oldest waiting frame. Late and duplicate frames are dropped; a long
+    run of them means the sender restarted its counter, so the stream
+    resynchronizes on it.
+    """
+
+    def __init__(self, depth: int = 8):
+        self.depth = depth
+        self.expected: Optional[int] = None
+        self._pending: Dict[int, PcmFrame] = {}
+        self._late_run = 0
+        self.late = 0
+        self.lost = 0
+
+    def _offset(self, sequence: int) -> int:
+        """Distance ahead of the expected sequence number (negative if behind)"""
+        offset = (sequence - self.expected) % _SEQUENCE_MOD
+        return offset - _SEQUENCE_MOD if offset >= _SEQUENCE_MOD // 2 else offset
+
+    def push(self, frame: PcmFrame) -> List[Tuple[PcmFrame, int]]:
+        """
+        Add a received frame
+
+        Returns:
+            Frames now deliverable in order, each with the number of
+            sequence numbers lost just before it
+        """
+        if self.expected is None:
+            self.expected = frame.sequence
+        offset = self._offset(frame.sequence)
+
+        if offset < 0 or frame.sequence in self._pending:
+            self.late += 1
+            self._late_run += 1
+            if self._late_run <= self.depth:
+                return []
+            self.reset()
+            self.expected = frame.sequence
+            offset = 0
+        self._late_run = 0
+
+        if offset > 0:
+            self._pending[frame.sequence] = frame
+            if len(self._pending) <= self.depth:
+                return []
+            # Give up on the gap: resume at the oldest frame still waiting
+            oldest = min(self._pending, key=self._offset)
+            lost = self._offset(oldest)
+            self.lost += lost
+            frame = self._pending.pop(oldest)
+        else:
+            lost = 0
+
+        ready = [(frame, lost)]
+        self.expected = (frame.sequence + 1) % _SEQUENCE_MOD
+        while self.expected in self._pending:
+            ready.append((self._pending.pop(self.expected), 0))
+            self.expected = (self.expected + 1) % _SEQUENCE_MOD
+        return ready
+
+    @property
+    def waiting(self) -> int:
+        return len(self._pending)
+
+    def pending_bytes(self) -> int:
+        return sum(frame.samples.nbytes for frame in self._pending.values())
+
+    def reset(self):
+        self.expected = None
+        self._pending.clear()
+        self._late_run = 0
+
+
+class IngestSession:
+    """
+    Analysis pipeline for one remote stream
+
+    Frames are converted to float32, gated for activity and folded into a
+    mono analysis-rate buffer (see AnalysisFrontEnd); every hop the latest
+    window is analyzed by the session's own AudioAnalyzer, so streaming
+    detector state never mixes between streamers. Memory is fixed per
+    session: the analysis buffer, one window, one conversion buffer and at
+    most ``reorder_depth`` frames waiting for a gap.
+
+    A lost frame is assumed to be as long as the frame after it; the stream
+    position skips over it and the resampler restarts there. A format change
+    (rate or channels) starts the pipeline over, keeping the stream clock.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        keywords: Optional[List[str]] = None,
+        detectors: Tuple[str, ...] = DETECTORS,
+        analysis_rate: int = 16000,
+        window_seconds: float = 1.0,
+        hop_seconds: float = 0.25,
+        buffer_seconds: float = 2.0,
+        reorder_depth: int = 8,
+        max_frame_bytes: int = 65536,
+        event_template_dir: Optional[str] = None,
+        rules: Optional[List[Dict[str, Any]]] = None,
+        sensitivity: float = 0.5
+    ):
+        self.session_id = session_id
+        self.detectors = detectors
+        self.keywords = compile_keywords(
+            keywords or [], fuzzy=get_settings().KEYWORD_FUZZY_MATCHING
+        ).keywords
+        self.analysis_rate = analysis_rate
+        self.window_seconds = window_seconds
+        self.hop_seconds = hop_seconds
+        self.buffer_seconds = max(buffer_seconds, window_seconds)
+        self.max_frame_bytes = max_frame_bytes
+        self.event_template_dir = event_template_dir
+        self.reorder = ReorderBuffer(reorder_depth)
+        self.trigger_engine = TriggerEngine(rules=rules or DEFAULT_RULES, sensitivity=sensitivity)
+
+        # Built from the first frame's format
+        self.sample_rate: Optional[int] = None
+        self.channels: Optional[int] = None
+        self.analyzer: Optional[AudioAnalyzer] = None
+        self.front_end: Optional[AnalysisFrontEnd] = None
+        self.gate: Optional[ActivityGate] = None
+        self._convert = np.zeros(max_frame_bytes // 2, dtype=np.float32)
+        self._window = np.zeros((int(window_seconds * analysis_rate), 1), dtype=np.float32)
+
+        self.position = 0           # next frame index at the stream rate
+        self._time_offset = 0.0     # stream seconds before the last format change
+        self._since_hop = 0
+        self._active_in_hop = False
+        self.last_sequence: Optional[int] = None
+        self.opened_at = time.monotonic()
+        self.frames_received = 0
+        self.frames_invalid = 0
+        self.format_changes = 0
+        self.analyses = 0
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    @property
+    def stream_time(self) -> float:
+        """Seconds of stream audio received (lost frames included)"""
+        if self.sample_rate is None:
+            return 0.0
+        return self._time_offset + self.position / self.sample_rate
+
+    def _configure(self, frame: PcmFrame):
+        if self.sample_rate is not None:
+            self._time_offset = self.stream_time
+            self.format_changes += 1
+            self.reorder.reset()
+            self.reorder.expected = frame.sequence
+        self.sample_rate = frame.sample_rate
+        self.channels = frame.channels
+        self.position = 0
+        self._since_hop = 0
+
+        max_block = self.max_frame_bytes // 2 // frame.channels
+        self.front_end = AnalysisFrontEnd(
+            frame.sample_rate, self.analysis_rate, self.buffer_seconds, max_block=max_block
+        )
+        if self.analyzer is None or self.format_changes:
+            self.analyzer = AudioAnalyzer(
+                sample_rate=self.analysis_rate, event_template_dir=self.event_template_dir
+            )
+        settings = get_settings()
+        self.gate = ActivityGate(
+            blocksize=max(frame.frames, 1),
+            open_db=settings.ACTIVITY_OPEN_DB,
+            close_db=settings.ACTIVITY_CLOSE_DB,
+            max_flatness=settings.ACTIVITY_MAX_FLATNESS,
+            onset_db=settings.ACTIVITY_ONSET_DB,
+            hangover_blocks=int(
+                settings.ACTIVITY_HANGOVER_SECONDS * frame.sample_rate / max(frame.frames, 1)
+            )
+        )
+
+    def receive(self, data: bytes) -> bool:
+        """
+        Decode one message and feed the frames it releases into the pipeline
+
+        Returns:
+            True when a hop of active audio has arrived since the last analysis
+
+        Raises:
+            ValueError: Malformed or oversized frame
+        """
+        if len(data) > FRAME_HEADER.size + self.max_frame_bytes:
+            self.frames_invalid += 1
+            raise ValueError(f"Frame larger than {self.max_frame_bytes} bytes")
+        try:
+            frame = decode_frame(data)
+        except ValueError:
+            self.frames_invalid += 1
+            raise
+        self.frames_received += 1
+
+        if (frame.sample_rate, frame.channels) != (self.sample_rate, self.channels):
+            self._configure(frame)
+        for ready, lost in self.reorder.push(frame):
+            self._process(ready, lost)
+
+        return self._active_in_hop and self._since_hop >= self.hop_seconds * self.sample_rate
+
+    def _process(self, frame: PcmFrame, lost: int):
+        frames = frame.frames
+        if lost:
+            # The front end sees the jump and restarts its filter there
+            self.position += lost * frames
+
+        block = self._convert[:frames * frame.channels].reshape(frames, frame.channels)
+        np.multiply(frame.samples, frame.scale, out=block, casting="unsafe")
+        if self.gate.process(block):
+            self._active_in_hop = True
+        self.front_end.process(block, self.position)
+        self.position += frames
+        self._since_hop += frames
+        self.last_sequence = frame.sequence
+
+    def take_window(self) -> Optional[Tuple[np.ndarray, int, int, float]]:
+        """
+        Copy out the latest analysis window and start a new hop
+
+        Returns:
+            (window, analysis frame index of its end, last sequence, stream
+            time) or None until a full window has arrived
+        """
+        self._since_hop = 0
+        self._active_in_hop = self.gate.active
+        window, end = self.front_end.window(self.position, self._window.shape[0])
+        if window is None:
+            return None
+        # Copied so the next frames can't overwrite it mid-analysis
+        np.copyto(self._window, window)
+        return self._window, end, self.last_sequence, self.stream_time
+
+    def analyze(self, window: np.ndarray, end: int) -> Dict[str, Any]:
+        """Run the detectors over a window (worker thread, one at a time)"""
+        return run_detectors(self.analyzer, window, self.detectors, self.keywords, end)
+
+    def evaluate(self, result: Dict[str, Any], stream_time: float) -> Optional[Dict[str, Any]]:
+        """Trigger decision for a result, rate-limited in stream time"""
+        emotion = result.get("emotion") or {}
+        decision = self.trigger_engine.evaluate(
+            emotion.get("label"),
+            emotion.get("confidence", 0.0),
+            result.get("keywords", []),
+            result.get("events", []),
+            arousal=result.get("arousal"),
+            now=stream_time
+        )
+        if decision is None:
+            return None
+        return {"effect": decision.effect, "rule": decision.rule, "intensity": decision.intensity}
+
+    def memory_bytes(self) -> int:
+        """Bytes held by this session's buffers"""
+        held = self._convert.nbytes + self._window.nbytes + self.reorder.pending_bytes()
+        if self.front_end is not None:
+            # Mirrored storage: twice the capacity
+            held += 2 * self.front_end.ring_buffer.capacity * 4
+        return held
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+            "stream_time": self.stream_time,
+            "uptime": time.monotonic() - self.opened_at,
+            "frames_received": self.frames_received,
+            "frames_invalid": self.frames_invalid,
+            "frames_late": self.reorder.late,
+            "frames_lost": self.reorder.lost,
+            "frames_waiting": self.reorder.waiting,
+            "format_changes": self.format_changes,
+            "analyses": self.analyses,
+            "active": self.gate.active if self.gate is not None else False,
+            "memory_bytes": self.memory_bytes(),
+        }
+
+
+class IngestManager:
+    """
+    Registry of remote ingest sessions
+
+    Caps the number of concurrent sessions and runs every session's analysis
+    on one shared thread pool; each session has at most one window in
+    flight, so a streamer whose analysis falls behind gets fresher windows
+    less often rather than a growing backlog.
+    """
+
+    def __init__(self, max_sessions: int = 16, threads: Optional[int] = None):
+        self.max_sessions = max_sessions
+        self.threads = threads or os.cpu_count() or 1
+        self.sessions: Dict[str, IngestSession] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self.rejected = 0
+
+    def open(self, session_id: Optional[str] = None, **options) -> IngestSession:
+        """
+        Register a new session
+
+        Raises:
+            ValueError: The session id is already streaming
+            RuntimeError: max_sessions are already open
+        """
+        session_id = session_id or uuid.uuid4().hex[:12]
+        if session_id in self.sessions:
+            raise ValueError(f"Ingest session already open: {session_id}")
+        if len(self.sessions) >= self.max_sessions:
+            self.rejected += 1
+            raise RuntimeError(f"Ingest is at capacity ({self.max_sessions} sessions)")
+        session = IngestSession(session_id, **options)
+        self.sessions[session_id] = session
+        logger.info(f"Ingest session '{session_id}' opened")
+        return session
+
+    def close_session(self, session_id: str):
+        if self.sessions.pop(session_id, None) is not None:
+            logger.info(f"Ingest session '{session_id}' closed")
+
+    async def analyze(self, session: IngestSession) -> Optional[Dict[str, Any]]:
+        """
+        Analyze the session's latest window on the shared pool
+
+        Returns:
+            Result message, or None if no full window was available yet
+        """
+        taken = session.take_window()
+        if taken is None:
+            return None
+        window, end, sequence, stream_time = taken
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.threads, thread_name_prefix="ingest"
+            )
+
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._pool, session.analyze, window, end)
+        elapsed = time.perf_counter() - started
+        get_metrics().observe_stage("analysis", elapsed)
+        session.analyses += 1
+        session.last_result = result
+        return {
+            "type": "analysis",
+            "session": session.session_id,
+            "sequence": sequence,
+            "stream_time": stream_time,
+            "latency_ms": elapsed * 1000,
+            **result,
+            "trigger": session.evaluate(result, stream_time),
+        }
+
+    def close(self):
+        self.sessions.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": {sid: session.stats() for sid, session in self.sessions.items()},
+            "max_sessions": self.max_sessions,
+            "rejected": self.rejected,
+            "memory_bytes": sum(s.memory_bytes() for s in self.sessions.values()),
+        }
+
+
+def _frame_counts(manager: IngestManager) -> Dict[tuple, float]:
+    counts = {"received": 0, "invalid": 0, "late": 0, "lost": 0}
+    for session in manager.sessions.values():
+        counts["received"] += session.frames_received
+        counts["invalid"] += session.frames_invalid
+        counts["late"] += session.reorder.late
+        counts["lost"] += session.reorder.lost
+    return {(outcome,): value for outcome, value in counts.items()}
+
+
+@lru_cache()
+def get_ingest_manager() -> IngestManager:
+    """Get the shared remote ingest manager"""
+    settings = get_settings()
+    manager = IngestManager(
+        max_sessions=settings.REMOTE_MAX_SESSIONS,
+        threads=settings.REMOTE_ANALYSIS_THREADS or None
+    )
+    metrics = get_metrics()
+    metrics.gauge(
+        "ingest_sessions", "Open remote ingest sessions",
+        function=lambda: {(): len(manager.sessions)}
+    )
+    metrics.gauge(
+        "ingest_memory_bytes", "Buffer memory held by remote ingest sessions",
+        function=lambda: {(): manager.stats()["memory_bytes"]}
+    )
+    metrics.gauge(
+        "ingest_frames", "Frames of the open ingest sessions by outcome", ("outcome",),
+        function=lambda: _frame_counts(manager)
+    )
+    return manager
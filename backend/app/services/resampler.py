@@ -0,0 +1,192 @@
+"""
+Streaming sample rate conversion
+Stateful polyphase resampling and the downmixing analysis front end
+"""
+import math
+import numpy as np
+import logging
+from typing import Optional, Tuple
+
+from app.services.feature_extractor import SpectralFeatureExtractor
+from app.services.ring_buffer import AudioRingBuffer
+
+logger = logging.getLogger(__name__)
+
+
+def design_lowpass(
+    up: int,
+    down: int,
+    taps_per_phase: int,
+    rolloff: float = 0.92,
+    beta: float = 8.6
+) -> np.ndarray:
+    """
+    Kaiser-windowed sinc anti-aliasing filter for L/M resampling
+
+    The cutoff sits at ``rolloff`` times the lower of the two Nyquist rates,
+    expressed at the upsampled rate; beta 8.6 gives about 90 dB stopband.
+    Gain is ``up`` so the zero-stuffed signal keeps its level.
+    """
+    n_taps = up * taps_per_phase
+    cutoff = rolloff * 0.5 / max(up, down)  # cycles per upsampled sample
+    t = np.arange(n_taps) - (n_taps - 1) / 2.0
+    taps = 2.0 * cutoff * np.sinc(2.0 * cutoff * t) * np.kaiser(n_taps, beta)
+    return taps * (up / taps.sum())
+
+
+class PolyphaseResampler:
+    """
+    Rational-ratio mono resampler that runs across block boundaries
+
+    The filter is split into ``up`` phases of ``taps_per_phase`` taps, so each
+    output sample costs one short dot product with only the input samples it
+    depends on (no zero-stuffing). The last ``taps_per_phase - 1`` inputs and
+    the output phase carry over between calls, so a stream cut into arbitrary
+    blocks resamples to exactly the same samples as one long call.
+    """
+
+    def __init__(
+        self,
+        in_rate: int,
+        out_rate: int,
+        taps_per_phase: int = 32,
+        max_block: int = 4096
+    ):
+        divisor = math.gcd(in_rate, out_rate)
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.up = out_rate // divisor
+        self.down = in_rate // divisor
+        self.taps_per_phase = taps_per_phase
+
+        taps = design_lowpass(self.up, self.down, taps_per_phase).astype(np.float32)
+        # bank[p, j] weights input x[i - (K - 1) + j] for an output at phase p
+        self.bank = taps.reshape(taps_per_phase, self.up).T[:, ::-1].copy()
+        # Group delay of the linear-phase filter, in input samples
+        self.delay = (taps.shape[0] - 1) / 2.0 / self.up
+
+        self._history = taps_per_phase - 1
+        self._buffer = np.zeros(self._history + max_block, dtype=np.float32)
+        self.samples_in = 0   # input samples consumed
+        self.samples_out = 0  # output samples produced
+
+    def output_count(self, samples_in: int) -> int:
+        """Outputs produced once ``samples_in`` input samples were consumed"""
+        return -(-samples_in * self.up // self.down)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Resample the next block of a mono stream
+
+        Args:
+            block: 1-D float32 samples at ``in_rate``
+
+        Returns:
+            The output samples this block completes (new array)
+        """
+        n = block.shape[0]
+        history = self._history
+        if history + n > self._buffer.shape[0]:
+            grown = np.zeros(history + n, dtype=np.float32)
+            grown[:history] = self._buffer[:history]
+            self._buffer = grown
+        buffer = self._buffer
+        buffer[history:history + n] = block
+
+        start = self.samples_in
+        first = self.samples_out
+        last = self.output_count(start + n)
+        if last > first:
+            positions = np.arange(first, last, dtype=np.int64) * self.down
+            inputs = positions // self.up - start   # newest input, relative to block
+            phases = positions % self.up
+            frames = np.lib.stride_tricks.sliding_window_view(
+                buffer[:history + n], self.taps_per_phase
+            )
+            out = np.einsum("ij,ij->i", frames[inputs], self.bank[phases])
+        else:
+            out = np.zeros(0, dtype=np.float32)
+
+        # Keep the newest inputs for the next block's first outputs
+        buffer[:history] = buffer[n:n + history]
+        self.samples_in = start + n
+        self.samples_out = last
+        return out
+
+    def reset(self):
+        self._buffer[:self._history] = 0.0
+        self.samples_in = 0
+        self.samples_out = 0
+
+
+class AnalysisFrontEnd:
+    """
+    Downmix plus resample from the capture format to the analysis rate
+
+    Consumed capture blocks go in; a mono ring buffer at ``analysis_rate``
+    comes out, so speech and emotion detectors process a fraction of the
+    samples (16 kHz mono is about 5.5x fewer than 44.1 kHz stereo).
+    """
+
+    def __init__(
+        self,
+        capture_rate: int,
+        analysis_rate: int,
+        buffer_seconds: float = 10.0,
+        max_block: int = 4096
+    ):
+        self.capture_rate = capture_rate
+        self.analysis_rate = analysis_rate
+        self.resampler: Optional[PolyphaseResampler] = None
+        if analysis_rate != capture_rate:
+            self.resampler = PolyphaseResampler(capture_rate, analysis_rate, max_block=max_block)
+        self.ring_buffer = AudioRingBuffer(
+            capacity=max(int(analysis_rate * buffer_seconds), max_block), channels=1
+        )
+        # Capture / analysis frame indices where the current run started, and
+        # the next capture frame expected
+        self._base_in = 0
+        self._base_out = 0
+        self._next_in = 0
+
+    def process(self, block: np.ndarray, start_frame: int):
+        """
+        Fold the next consumed capture block into the analysis buffer
+
+        Args:
+            block: Capture block, mono or (frames, channels)
+            start_frame: Capture frame index of the block's first frame
+        """
+        if start_frame != self._next_in:
+            # Frames were skipped (capture overrun): restart the filter here
+            # rather than blending across the gap
+            if self.resampler is not None:
+                self.resampler.reset()
+            self._base_in = start_frame
+            self._base_out = self.ring_buffer.write_index
+        self._next_in = start_frame + block.shape[0]
+
+        mono = SpectralFeatureExtractor.to_mono(block)
+        if self.resampler is not None:
+            mono = self.resampler.process(mono)
+        if mono.shape[0]:
+            self.ring_buffer.write(mono)
+            # Only read through windows; nothing consumes it sequentially
+            self.ring_buffer.clear()
+
+    def position(self, capture_frame: int) -> int:
+        """Analysis-rate frame index matching a capture frame index"""
+        frames = capture_frame - self._base_in
+        if self.resampler is not None:
+            frames = self.resampler.output_count(frames)
+        return self._base_out + frames
+
+    def window(self, capture_end: int, frames: int) -> Tuple[Optional[np.ndarray], int]:
+        """
+        Mono analysis-rate window ending where a capture window ends
+
+        Returns:
+            (window or None if unavailable, its end as an analysis frame index)
+        """
+        end = min(self.position(capture_end), self.ring_buffer.write_index)
+        return self.ring_buffer.window(end, frames), end
@@ -0,0 +1,208 @@
+"""
+Preallocated single-producer/single-consumer ring buffer for audio frames
+Used between the PortAudio callback and the analysis consumers
+"""
+import numpy as np
+import logging
+from typing import Optional, Dict
+
+logger = logging.getLogger(__name__)
+
+OVERRUN_POLICIES = ("drop_oldest", "drop_newest")
+
+
+class AudioRingBuffer:
+    """
+    Fixed-capacity float32 ring buffer with zero-copy window reads
+
+    The storage is mirrored (every frame is written at ``i`` and ``i + capacity``)
+    so any window of up to ``capacity`` frames is a contiguous slice and can be
+    handed out as a view. Write and read positions are monotonic frame counters;
+    each is only ever advanced by one side, so no lock is needed as long as there
+    is exactly one producer and one consumer.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        channels: int = 1,
+        overrun_policy: str = "drop_oldest"
+    ):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if overrun_policy not in OVERRUN_POLICIES:
+            raise ValueError(f"overrun_policy must be one of {OVERRUN_POLICIES}")
+
+        self.capacity = capacity
+        self.channels = channels
+        self.overrun_policy = overrun_policy
+        self._buffer = np.zeros((2 * capacity, channels), dtype=np.float32)
+
+        # Monotonic frame counters (total frames written / consumed)
+        self._write_index = 0
+        self._read_index = 0
+
+        # Overrun accounting
+        self.overrun_events = 0
+        self.overrun_frames = 0
+
+    @property
+    def write_index(self) -> int:
+        """Total number of frames written since creation"""
+        return self._write_index
+
+    @property
+    def read_index(self) -> int:
+        """Total number of frames consumed (or skipped) since creation"""
+        return self._read_index
+
+    def available(self) -> int:
+        """Number of unread frames currently held in the buffer"""
+        return min(self._write_index - self._read_index, self.capacity)
+
+    def write(self, block: np.ndarray) -> int:
+        """
+        Copy a block of frames into the buffer (producer side, no allocation)
+
+        Args:
+            block: Array of shape (frames, channels) or (frames,) for mono
+
+        Returns:
+            Number of frames actually stored
+        """
+        frames = block.shape[0]
+        if block.ndim == 1:
+            block = block.reshape(frames, 1)
+
+        # Blocks larger than the buffer can only keep their newest frames
+        if frames > self.capacity:
+            self.overrun_events += 1
+            self.overrun_frames += frames - self.capacity
+            block = block[frames - self.capacity:]
+            frames = self.capacity
+
+        free = self.capacity - (self._write_index - self._read_index)
+        if frames > free:
+            if self.overrun_policy == "drop_newest":
+                self.overrun_events += 1
+                self.overrun_frames += frames - max(free, 0)
+                if free <= 0:
+                    return 0
+                block = block[:free]
+                frames = free
+            else:
+                # Oldest unread frames get overwritten; the consumer skips them
+                self.overrun_events += 1
+                self.overrun_frames += frames - max(free, 0)
+
+        self._store(self._write_index % self.capacity, block)
+        # Publish only after the data is in place
+        self._write_index += frames
+        return frames
+
+    def _store(self, pos: int, block: np.ndarray):
+        """Write block at pos in both mirrored halves"""
+        frames = block.shape[0]
+        cap = self.capacity
+        first = min(frames, cap - pos)
+
+        np.copyto(self._buffer[pos:pos + first], block[:first])
+        np.copyto(self._buffer[pos + cap:pos + cap + first], block[:first])
+
+        rest = frames - first
+        if rest:
+            np.copyto(self._buffer[:rest], block[first:])
+            np.copyto(self._buffer[cap:cap + rest], block[first:])
+
+    def _catch_up(self):
+        """Skip the read position past frames that were overwritten"""
+        oldest = self._write_index - self.capacity
+        if self._read_index < oldest:
+            self._read_index = oldest
+
+    def _view(self, start: int, frames: int) -> np.ndarray:
+        pos = start % self.capacity
+        return self._buffer[pos:pos + frames]
+
+    def read(self, frames: int) -> Optional[np.ndarray]:
+        """
+        Consume the next ``frames`` unread frames (consumer side)
+
+        The returned array is a view into the buffer. Under the ``drop_oldest``
+        policy it can be overwritten once the producer laps it, so copy it if it
+        has to outlive the next ``capacity`` frames of capture.
+
+        Args:
+            frames: Number of frames to read (must not exceed capacity)
+
+        Returns:
+            View of shape (frames, channels), or None if not enough data yet
+        """
+        if frames > self.capacity:
+            raise ValueError("Cannot read more frames than the buffer capacity")
+
+        self._catch_up()
+        if self._write_index - self._read_index < frames:
+            return None
+
+        view = self._view(self._read_index, frames)
+        self._read_index += frames
+        return view
+
+    def peek(self, frames: int) -> Optional[np.ndarray]:
+        """Return the next ``frames`` unread frames without consuming them"""
+        if frames > self.capacity:
+            raise ValueError("Cannot read more frames than the buffer capacity")
+
+        self._catch_up()
+        if self._write_index - self._read_index < frames:
+            return None
+        return self._view(self._read_index, frames)
+
+    def latest(self, frames: int) -> Optional[np.ndarray]:
+        """
+        Return a view of the most recent ``frames`` frames, ignoring the read position
+
+        Useful for analysis windows that overlap (e.g. the last 2 seconds on
+        every block) without disturbing the sequential consumer.
+        """
+        if frames > self.capacity:
+            raise ValueError("Cannot read more frames than the buffer capacity")
+        if self._write_index < frames:
+            return None
+        return self._view(self._write_index - frames, frames)
+
+    def window(self, end: int, frames: int) -> Optional[np.ndarray]:
+        """
+        View of ``frames`` frames ending at absolute frame index ``end``
+
+        Returns None if that range has not been written yet or has already
+        been overwritten.
+        """
+        if frames > self.capacity:
+            raise ValueError("Cannot read more frames than the buffer capacity")
+        start = end - frames
+        if start < 0 or end > self._write_index or start < self._write_index - self.capacity:
+            return None
+        return self._view(start, frames)
+
+    def skip(self, frames: int) -> int:
+        """Advance the read position without reading; returns frames skipped"""
+        self._catch_up()
+        frames = min(frames, self._write_index - self._read_index)
+        self._read_index += frames
+        return frames
+
+    def clear(self):
+        """Drop all unread frames (consumer side)"""
+        self._read_index = self._write_index
+
+    def stats(self) -> Dict[str, int]:
+        """Buffer fill level and overrun counters"""
+        return {
+            "capacity": self.capacity,
+            "available": self.available(),
+            "frames_written": self._write_index,
+            "overrun_events": self.overrun_events,
+            "overrun_frames": self.overrun_frames,
+        }
@@ -0,0 +1,263 @@
+"""
+User settings, consent and profile store
+In-memory snapshot with debounced, atomic persistence and change notifications
+"""
+import asyncio
+import copy
+import json
+import os
+import tempfile
+import threading
+import logging
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable, FrozenSet, Tuple
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_SETTINGS: Dict[str, Any] = {
+    "audio_input_device": None,
+    "audio_output_device": None,
+    "auto_trigger_enabled": False,
+    "trigger_sensitivity": 0.5,
+    "elevenlabs_api_key": None,
+    "effect_volume": 0.8,
+    "hotkeys_enabled": True,
+    "trigger_rules": None,
+    "shed_order": None,
+}
+
+# Credentials: persisted (owner-only file) but never copied into profiles
+SECRET_SETTINGS = frozenset({"elevenlabs_api_key"})
+
+DEFAULT_CONSENT: Dict[str, Any] = {
+    "audio_capture": False,
+    "cloud_processing": False,
+    "analytics": False,
+    "timestamp": None,
+}
+
+Listener = Callable[[Dict[str, Any]], None]
+
+
+class SettingsStore:
+    """
+    Settings, consent and named profiles backed by one JSON document
+
+    Reads are served from memory. Changes apply to the snapshot immediately,
+    notify listeners with just the keys whose values changed, and mark the
+    document dirty; the file is rewritten (temp file + os.replace) at most
+    once per ``debounce_seconds`` on a worker thread, so a burst of updates
+    costs one write and requests never wait on disk.
+    """
+
+    def __init__(self, path: str, debounce_seconds: float = 0.5):
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.debounce_seconds = debounce_seconds
+        self._state = self._load()
+        self._listeners: List[Tuple[Optional[FrozenSet[str]], Listener]] = []
+
+        self._version = 0          # bumped on every change
+        self._written_version = 0  # last version persisted
+        self._write_lock = threading.Lock()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Future] = None
+        self.writes = 0
+        self.coalesced = 0
+
+    def _load(self) -> Dict[str, Any]:
+        state = {
+            "settings": dict(DEFAULT_USER_SETTINGS),
+            "consent": dict(DEFAULT_CONSENT),
+            "profiles": {},
+        }
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return state
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load settings from {self.path}, using defaults: {e}")
+            return state
+
+        state["settings"].update(
+            {k: v for k, v in stored.get("settings", {}).items() if k in DEFAULT_USER_SETTINGS}
+        )
+        state["consent"].update(
+            {k: v for k, v in stored.get("consent", {}).items() if k in DEFAULT_CONSENT}
+        )
+        state["profiles"] = {
+            name: {k: v for k, v in profile.items() if k not in SECRET_SETTINGS}
+            for name, profile in stored.get("profiles", {}).items()
+        }
+        logger.info(f"Loaded settings ({len(state['profiles'])} profiles) from {self.path}")
+        return state
+
+    # Reads
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        return copy.deepcopy(self._state["settings"])
+
+    @property
+    def consent(self) -> Dict[str, Any]:
+        return dict(self._state["consent"])
+
+    def has_consent(self, kind: str = "audio_capture") -> bool:
+        return bool(self._state["consent"].get(kind))
+
+    def list_profiles(self) -> List[str]:
+        return sorted(self._state["profiles"])
+
+    # Changes
+
+    def subscribe(self, listener: Listener, keys: Optional[List[str]] = None):
+        """
+        Call ``listener(changed)`` after settings change
+
+        Args:
+            listener: Receives a dict of only the changed keys and new values
+            keys: Only notify when one of these keys changes (default: any)
+        """
+        self._listeners.append((frozenset(keys) if keys else None, listener))
+
+    def update(self, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply setting changes; returns the subset that actually changed
+
+        Raises:
+            KeyError: An unknown setting name was given
+        """
+        unknown = set(changes) - set(DEFAULT_USER_SETTINGS)
+        if unknown:
+            raise KeyError(f"Unknown settings: {sorted(unknown)}")
+
+        current = self._state["settings"]
+        changed = {k: copy.deepcopy(v) for k, v in changes.items() if current.get(k) != v}
+        if not changed:
+            return {}
+
+        current.update(changed)
+        self._mark_dirty()
+        self._notify(changed)
+        return changed
+
+    def set_consent(
+        self,
+        audio_capture: bool,
+        cloud_processing: bool = False,
+        analytics: bool = False
+    ) -> Dict[str, Any]:
+        self._state["consent"] = {
+            "audio_capture": audio_capture,
+            "cloud_processing": cloud_processing,
+            "analytics": analytics,
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+        self._mark_dirty()
+        return self.consent
+
+    def save_profile(self, name: str):
+        """Store the current settings, minus credentials, under a profile name"""
+        self._state["profiles"][name] = {
+            k: v for k, v in self.settings.items() if k not in SECRET_SETTINGS
+        }
+        self._mark_dirty()
+
+    def load_profile(self, name: str) -> Dict[str, Any]:
+        """
+        Apply a saved profile; returns the settings that changed
+
+        Raises:
+            KeyError: No profile with that name
+        """
+        profile = self._state["profiles"][name]
+        return self.update({
+            k: v for k, v in profile.items()
+            if k in DEFAULT_USER_SETTINGS and k not in SECRET_SETTINGS
+        })
+
+    def _notify(self, changed: Dict[str, Any]):
+        for keys, listener in self._listeners:
+            if keys is not None and keys.isdisjoint(changed):
+                continue
+            try:
+                listener(changed)
+            except Exception as e:
+                logger.error(f"Settings listener failed: {e}")
+
+    # Persistence
+
+    def _mark_dirty(self):
+        self._version += 1
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts, shutdown): write straight away
+            self.flush()
+            return
+
+        if self._flush_handle is not None:
+            self.coalesced += 1
+            return
+        self._flush_handle = loop.call_later(self.debounce_seconds, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        document = json.dumps(self._state, indent=2, default=str)
+        self._flush_task = asyncio.ensure_future(
+            asyncio.to_thread(self._write, document, self._version)
+        )
+
+    def _write(self, document: str, version: int):
+        with self._write_lock:
+            # A newer snapshot may already be on disk
+            if version <= self._written_version:
+                return
+            # mkstemp creates the file owner-only (0600); the document holds the API key
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(document)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.error(f"Failed to save settings: {e}")
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                return
+            self._written_version = version
+            self.writes += 1
+
+    def flush(self):
+        """Write any pending changes now (blocking)"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._version > self._written_version:
+            self._write(json.dumps(self._state, indent=2, default=str), self._version)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+            "pending": int(self._version > self._written_version),
+            "profiles": len(self._state["profiles"]),
+        }
+
+
+@lru_cache()
+def get_settings_store() -> SettingsStore:
+    """Get the shared settings store"""
+    settings = get_settings()
+    return SettingsStore(
+        os.path.join(os.path.expanduser(settings.CONFIG_DIR), "settings.json"),
+        debounce_seconds=settings.SETTINGS_WRITE_DEBOUNCE_SECONDS
+    )
@@ -0,0 +1,198 @@
+"""
+Content-addressed on-disk cache for generated sound effects
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Dict
+
+from app.core.config import get_settings
+from app.services.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE_SUFFIX = ".sfx"
+
+
+def make_cache_key(
+    text_prompt: str,
+    duration_seconds: Optional[float],
+    prompt_influence: float,
+    model: str,
+    output_format: str = ""
+) -> str:
+    """Stable hash of everything that affects the generated audio"""
+    payload = json.dumps(
+        {
+            "prompt": text_prompt.strip(),
+            "duration_seconds": duration_seconds,
+            "prompt_influence": round(float(prompt_influence), 4),
+            "model": model,
+            "output_format": output_format,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SoundEffectCache:
+    """
+    Size-budgeted LRU cache of generated audio, one file per key
+
+    The index (key -> size, in recency order) lives in memory and is rebuilt
+    from the directory at startup using file mtimes as last-access times, so
+    recency survives restarts. Writes go to a temp file and are renamed into
+    place, so a crash never leaves a truncated entry behind.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{CACHE_FILE_SUFFIX}"
+
+    def _load_index(self):
+        # Leftovers from writes interrupted by a crash
+        for tmp in self.cache_dir.glob("*.tmp"):
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+
+        entries = []
+        for path in self.cache_dir.glob(f"*{CACHE_FILE_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self.total_bytes += size
+
+        logger.info(
+            f"SFX cache loaded: {len(self._index)} entries, {self.total_bytes} bytes"
+        )
+        self._evict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached audio for key, or None on a miss"""
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            # File vanished underneath us; treat as a miss
+            with self._lock:
+                size = self._index.pop(key, 0)
+                self.total_bytes -= size
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        """Atomically store audio under key and evict down to the byte budget"""
+        if len(data) > self.max_bytes:
+            logger.warning(f"SFX of {len(data)} bytes exceeds cache budget, not cached")
+            return
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.error(f"Failed to write SFX cache entry: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            self.total_bytes -= self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self.total_bytes += len(data)
+            self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._index):
+                try:
+                    self._path(key).unlink()
+                except OSError:
+                    pass
+            self._index.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._index),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+@lru_cache()
+def get_sfx_cache() -> SoundEffectCache:
+    """Get the shared SFX cache instance"""
+    settings = get_settings()
+    cache = SoundEffectCache(settings.AUDIO_CACHE_DIR, settings.AUDIO_CACHE_MAX_BYTES)
+    metrics = get_metrics()
+    metrics.counter(
+        "sfx_cache_lookups_total", "Sound effect cache lookups", ("result",),
+        function=lambda: {("hit",): cache.hits, ("miss",): cache.misses}
+    )
+    metrics.counter(
+        "sfx_cache_evictions_total", "Sound effects evicted from the cache",
+        function=lambda: {(): cache.evictions}
+    )
+    metrics.gauge(
+        "sfx_cache_bytes", "Bytes of cached sound effects",
+        function=lambda: {(): cache.total_bytes}
+    )
+    return cache
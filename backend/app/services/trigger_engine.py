@@ -0,0 +1,332 @@
+"""
+Declarative trigger rules compiled into a per-block evaluator
+Decides which effect (if any) analysis results should fire, with per-rule
+cooldowns and debouncing, priorities, and a global rate limit
+"""
+import time
+import logging
+from dataclasses import dataclass, field, asdict
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, Iterable, FrozenSet, Collection
+
+from app.core.config import get_settings
+from app.services.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Arousal threshold at full sensitivity; rules add their arousal_z on top as
+# sensitivity drops (threshold = arousal_z * (1 - sensitivity) + floor)
+AROUSAL_FLOOR = 0.5
+
+SUPPRESSION_REASONS = ("debounce", "cooldown", "rate_limit", "priority")
+
+# Equivalent of the original hard-coded decision chain
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {
+        "name": "excited-cheer",
+        "effect": "cheer",
+        "emotions": ["happy", "excited"],
+        "min_confidence": 0.7,
+        "arousal_z": 2.0,
+        "priority": 10,
+    },
+    {
+        "name": "sad-aww",
+        "effect": "aww",
+        "emotions": ["sad"],
+        "min_confidence": 0.7,
+        "priority": 10,
+    },
+    {"name": "victory-applause", "effect": "applause", "events": ["victory"], "priority": 20},
+    {"name": "defeat-boo", "effect": "boo", "events": ["defeat"], "priority": 19},
+]
+
+
+@dataclass
+class TriggerRule:
+    """
+    One trigger rule
+
+    A rule matches when any of its emotions, keywords or events is present
+    (a rule with several kinds of signal needs one of each kind). Emotion
+    rules also need ``min_confidence * sensitivity`` confidence and, when
+    ``arousal_z`` is set and a baseline exists, enough arousal.
+    """
+    name: str
+    effect: str
+    emotions: List[str] = field(default_factory=list)
+    keywords: List[str] = field(default_factory=list)
+    events: List[str] = field(default_factory=list)
+    min_confidence: float = 0.0
+    arousal_z: Optional[float] = None
+    priority: int = 0
+    cooldown_seconds: float = 10.0
+    debounce_blocks: int = 1  # consecutive matching evaluations before firing
+
+    @classmethod
+    def from_dict(
+        cls,
+        data: Dict[str, Any],
+        effects: Optional[Collection[str]] = None
+    ) -> "TriggerRule":
+        """
+        Build and validate a rule
+
+        Args:
+            data: Rule fields
+            effects: Known effect ids; when given, the rule's effect must be one
+        """
+        unknown = set(data) - set(cls.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"Unknown trigger rule fields: {sorted(unknown)}")
+        rule = cls(**data)
+        if effects is not None and rule.effect not in effects:
+            raise ValueError(f"Trigger rule '{rule.name}' uses unknown effect '{rule.effect}'")
+        if not (rule.emotions or rule.keywords or rule.events):
+            raise ValueError(f"Trigger rule '{rule.name}' has no emotions, keywords or events")
+        if rule.debounce_blocks < 1:
+            raise ValueError(f"Trigger rule '{rule.name}' needs debounce_blocks >= 1")
+        return rule
+
+
+@dataclass
+class TriggerDecision:
+    """An effect the engine decided to fire"""
+    effect: str
+    rule: str
+    priority: int
+    intensity: float
+
+
+class _CompiledRule:
+    """Rule with its lookups frozen and its runtime state"""
+
+    __slots__ = (
+        "rule", "index", "emotions", "keywords", "events", "kinds",
+        "streak", "last_fired", "fired", "suppressed"
+    )
+
+    def __init__(self, rule: TriggerRule, index: int):
+        self.rule = rule
+        self.index = index
+        self.emotions: FrozenSet[str] = frozenset(rule.emotions)
+        self.keywords: FrozenSet[str] = frozenset(k.lower() for k in rule.keywords)
+        self.events: FrozenSet[str] = frozenset(rule.events)
+        self.kinds = sum(bool(s) for s in (self.emotions, self.keywords, self.events))
+        self.streak = 0
+        self.last_fired = float("-inf")
+        self.fired = 0
+        self.suppressed = dict.fromkeys(SUPPRESSION_REASONS, 0)
+
+
+class RateLimiter:
+    """Token bucket: ``per_minute`` sustained triggers with bursts up to ``burst``"""
+
+    def __init__(self, per_minute: float, burst: int):
+        self.rate = per_minute / 60.0
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated: Optional[float] = None
+
+    def allow(self, now: float) -> bool:
+        if self.updated is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class TriggerEngine:
+    """
+    Evaluates analysis results against a compiled rule set
+
+    Rules are indexed by the emotion, keyword and event that can match them,
+    so an evaluation only touches rules whose signal is present in this
+    block; blocks with nothing detected cost a few set lookups. Candidates are
+    checked in priority order and at most one effect fires per evaluation.
+    """
+
+    def __init__(
+        self,
+        rules: Optional[Iterable[Dict[str, Any]]] = None,
+        rate_per_minute: float = 6.0,
+        burst: int = 2,
+        sensitivity: float = 0.5
+    ):
+        self.enabled = False
+        self.sensitivity = sensitivity
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        self.load_rules(DEFAULT_RULES if rules is None else rules)
+
+    def load_rules(self, rules: Iterable[Dict[str, Any]]):
+        """Replace the rule set (validates and recompiles; runtime state resets)"""
+        parsed = [TriggerRule.from_dict(dict(r)) for r in rules]
+        # Highest priority first; definition order breaks ties
+        parsed.sort(key=lambda r: -r.priority)
+
+        compiled = [_CompiledRule(rule, i) for i, rule in enumerate(parsed)]
+        by_emotion: Dict[str, List[_CompiledRule]] = {}
+        by_keyword: Dict[str, List[_CompiledRule]] = {}
+        by_event: Dict[str, List[_CompiledRule]] = {}
+        for entry in compiled:
+            for name in entry.emotions:
+                by_emotion.setdefault(name, []).append(entry)
+            for name in entry.keywords:
+                by_keyword.setdefault(name, []).append(entry)
+            for name in entry.events:
+                by_event.setdefault(name, []).append(entry)
+
+        self.rules = compiled
+        self._by_emotion = by_emotion
+        self._by_keyword = by_keyword
+        self._by_event = by_event
+        self._streaking: List[_CompiledRule] = []
+        self.limiter = RateLimiter(self.rate_per_minute, self.burst)
+        self.evaluations = 0
+        self.fired = 0
+        self.suppressed = dict.fromkeys(SUPPRESSION_REASONS, 0)
+        logger.info(f"Trigger engine loaded {len(compiled)} rules")
+
+    def _suppress(self, entry: _CompiledRule, reason: str):
+        entry.suppressed[reason] += 1
+        self.suppressed[reason] += 1
+
+    def _candidates(
+        self,
+        emotion: Optional[str],
+        keywords: Iterable[str],
+        events: Iterable[str]
+    ) -> List[_CompiledRule]:
+        hits: Dict[int, List[Any]] = {}
+        if emotion:
+            for entry in self._by_emotion.get(emotion, ()):
+                hits.setdefault(entry.index, [entry, set()])[1].add("emotion")
+        for keyword in keywords:
+            for entry in self._by_keyword.get(keyword.lower(), ()):
+                hits.setdefault(entry.index, [entry, set()])[1].add("keyword")
+        for event in events:
+            for entry in self._by_event.get(event, ()):
+                hits.setdefault(entry.index, [entry, set()])[1].add("event")
+        matched = [entry for entry, kinds in hits.values() if len(kinds) == entry.kinds]
+        matched.sort(key=lambda entry: entry.index)
+        return matched
+
+    def evaluate(
+        self,
+        emotion: Optional[str],
+        confidence: float,
+        keywords: Iterable[str] = (),
+        events: Iterable[str] = (),
+        arousal: Optional[float] = None,
+        sensitivity: Optional[float] = None,
+        now: Optional[float] = None
+    ) -> Optional[TriggerDecision]:
+        """
+        Decide what to fire for one block of analysis results
+
+        Args:
+            emotion: Detected emotion label
+            confidence: Emotion confidence (0.0-1.0)
+            keywords: Detected keywords
+            events: Detected events
+            arousal: Arousal z-score, or None when no baseline exists yet
+            sensitivity: Overrides the engine sensitivity (0.0-1.0)
+            now: Monotonic timestamp (defaults to time.monotonic())
+
+        Returns:
+            The decision, or None if nothing should fire
+        """
+        self.evaluations += 1
+        if now is None:
+            now = time.monotonic()
+        if sensitivity is None:
+            sensitivity = self.sensitivity
+
+        matched = []
+        for entry in self._candidates(emotion, keywords, events):
+            rule = entry.rule
+            if entry.emotions:
+                if confidence <= rule.min_confidence * sensitivity:
+                    continue
+                if rule.arousal_z is not None and arousal is not None:
+                    if arousal < rule.arousal_z * (1.0 - sensitivity) + AROUSAL_FLOOR:
+                        continue
+            matched.append(entry)
+
+        # Debounce: streaks survive only while a rule keeps matching
+        for entry in self._streaking:
+            if entry not in matched:
+                entry.streak = 0
+        for entry in matched:
+            entry.streak += 1
+        self._streaking = matched
+
+        decision = None
+        for entry in matched:
+            rule = entry.rule
+            if decision is not None:
+                self._suppress(entry, "priority")
+            elif entry.streak < rule.debounce_blocks:
+                self._suppress(entry, "debounce")
+            elif now - entry.last_fired < rule.cooldown_seconds:
+                self._suppress(entry, "cooldown")
+            elif not self.limiter.allow(now):
+                self._suppress(entry, "rate_limit")
+            else:
+                entry.last_fired = now
+                entry.streak = 0
+                entry.fired += 1
+                self.fired += 1
+                decision = TriggerDecision(
+                    effect=rule.effect,
+                    rule=rule.name,
+                    priority=rule.priority,
+                    intensity=min(max(confidence, 0.0), 1.0) if entry.emotions else 0.5
+                )
+        return decision
+
+    def reset(self):
+        """Clear cooldowns, debounce streaks and counters"""
+        self.load_rules([asdict(entry.rule) for entry in self.rules])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "evaluations": self.evaluations,
+            "fired": self.fired,
+            "suppressed": dict(self.suppressed),
+            "rules": [
+                {
+                    "name": entry.rule.name,
+                    "effect": entry.rule.effect,
+                    "priority": entry.rule.priority,
+                    "fired": entry.fired,
+                    "suppressed": dict(entry.suppressed),
+                }
+                for entry in self.rules
+            ],
+        }
+
+
+@lru_cache()
+def get_trigger_engine() -> TriggerEngine:
+    """Get the shared trigger engine instance"""
+    settings = get_settings()
+    engine = TriggerEngine(
+        rules=settings.TRIGGER_RULES or None,
+        rate_per_minute=settings.TRIGGER_RATE_LIMIT_PER_MINUTE,
+        burst=settings.TRIGGER_RATE_LIMIT_BURST
+    )
+    metrics = get_metrics()
+    metrics.counter(
+        "triggers_fired_total", "Effects fired by the trigger rules",
+        function=lambda: {(): engine.fired}
+    )
+    metrics.counter(
+        "triggers_suppressed_total", "Matched triggers that were held back", ("reason",),
+        function=lambda: {(reason,): n for reason, n in engine.suppressed.items()}
+    )
+    return engine
@@ -0,0 +1,413 @@
+"""
+Append-only trigger history log
+Fixed-size binary records in memory-mapped, rotating segment files
+"""
+import mmap
+import os
+import struct
+import threading
+import time
+import logging
+import numpy as np
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Deque
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+SOURCE_CODES: Dict[str, int] = {"manual": 1, "auto": 2}
+SOURCE_NAMES = {code: name for name, code in SOURCE_CODES.items()}
+
+# Segment header: magic, format version, record size, committed record count
+_HEADER = struct.Struct("<4sHHQ")
+_MAGIC = b"SSTH"
+_VERSION = 1
+HEADER_SIZE = 64
+
+# One record: timestamp, intensity, source, effect variation id, rule name
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("intensity", "<f4"),
+    ("source", "u1"),
+    ("_pad", "V3"),
+    ("effect_id", "S24"),
+    ("rule", "S24"),
+])
+_RECORD = struct.Struct("<dfB3x24s24s")
+RECORD_SIZE = _RECORD.size
+assert RECORD_SIZE == RECORD_DTYPE.itemsize
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".log"
+
+
+class _Segment:
+    """One segment file; the active segment keeps a writable map open"""
+
+    def __init__(self, path: Path, number: int, capacity: int):
+        self.path = path
+        self.number = number
+        self.capacity = capacity
+        self.count = 0
+        self.first_ts = 0.0
+        self.last_ts = 0.0
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+
+    @classmethod
+    def create(cls, path: Path, number: int, capacity: int) -> "_Segment":
+        segment = cls(path, number, capacity)
+        with open(path, "wb") as f:
+            f.truncate(HEADER_SIZE + capacity * RECORD_SIZE)
+            f.write(_HEADER.pack(_MAGIC, _VERSION, RECORD_SIZE, 0))
+        return segment
+
+    @classmethod
+    def open_existing(cls, path: Path, number: int) -> Optional["_Segment"]:
+        try:
+            with open(path, "rb") as f:
+                header = f.read(_HEADER.size)
+                size = os.fstat(f.fileno()).st_size
+        except OSError as e:
+            logger.error(f"Failed to read history segment {path}: {e}")
+            return None
+        if len(header) < _HEADER.size:
+            return None
+        magic, version, record_size, count = _HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION or record_size != RECORD_SIZE:
+            logger.warning(f"Ignoring history segment with unknown format: {path}")
+            return None
+
+        segment = cls(path, number, (size - HEADER_SIZE) // RECORD_SIZE)
+        segment.count = min(count, segment.capacity)
+        if segment.count:
+            records = segment.records()
+            segment.first_ts = float(records["timestamp"][0])
+            segment.last_ts = float(records["timestamp"][-1])
+        return segment
+
+    @classmethod
+    def write(cls, path: Path, number: int, records: np.ndarray) -> "_Segment":
+        """Write records as a full segment: to a temp file, then renamed over path"""
+        segment = cls(path, number, records.shape[0])
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, RECORD_SIZE, records.shape[0]).ljust(
+                HEADER_SIZE, b"\0"
+            ))
+            f.write(records.astype(RECORD_DTYPE, copy=False).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        segment.count = records.shape[0]
+        if segment.count:
+            segment.first_ts = float(records["timestamp"][0])
+            segment.last_ts = float(records["timestamp"][-1])
+        return segment
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    def open_for_append(self):
+        self._file = open(self.path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def append(self, record: bytes, timestamp: float):
+        offset = HEADER_SIZE + self.count * RECORD_SIZE
+        self._map[offset:offset + RECORD_SIZE] = record
+        # Commit the record by bumping the header count after the data is in place
+        self.count += 1
+        _HEADER.pack_into(self._map, 0, _MAGIC, _VERSION, RECORD_SIZE, self.count)
+        if self.count == 1:
+            self.first_ts = timestamp
+        self.last_ts = timestamp
+
+    def records(self) -> np.ndarray:
+        """Committed records as a structured array (a private copy)"""
+        if self._map is not None:
+            return np.frombuffer(
+                self._map, dtype=RECORD_DTYPE, count=self.count, offset=HEADER_SIZE
+            ).copy()
+        with open(self.path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return np.frombuffer(
+                    data, dtype=RECORD_DTYPE, count=self.count, offset=HEADER_SIZE
+                ).copy()
+
+    def close(self):
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _truncate(text: str, size: int = 24) -> bytes:
+    """UTF-8 encode to at most size bytes without splitting a character"""
+    return text.encode("utf-8")[:size].decode("utf-8", "ignore").encode("utf-8")
+
+
+def _decode(record) -> Dict[str, Any]:
+    effect_id = record["effect_id"].decode("utf-8", "replace")
+    return {
+        "timestamp": float(record["timestamp"]),
+        "effect_type": effect_id.split(":", 1)[0],
+        "effect_id": effect_id,
+        "intensity": round(float(record["intensity"]), 4),
+        "source": SOURCE_NAMES.get(int(record["source"]), "unknown"),
+        "rule": record["rule"].decode("utf-8", "replace") or None,
+    }
+
+
+class TriggerHistory:
+    """
+    Append-only log of fired effects
+
+    Records are packed into fixed-size slots of a preallocated, memory-mapped
+    segment, so an append is a slice assignment plus a header update. When a
+    segment fills up a new one is started; retention (age and segment count)
+    runs on a background thread, deleting whole segments and compacting the
+    ones that straddle the age cutoff. Recent records are also
+    kept decoded in memory so "last N" requests don't touch the files, and
+    each segment's time span is indexed so range queries only open the
+    segments they overlap and binary-search within them.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_records: int = 16384,
+        retention_days: float = 30.0,
+        max_segments: int = 64,
+        tail_size: int = 1024
+    ):
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_records = segment_records
+        self.retention_seconds = retention_days * 86400
+        self.max_segments = max_segments
+
+        self._lock = threading.Lock()
+        self._maintenance: Optional[threading.Thread] = None
+        self.segments: List[_Segment] = self._load_segments()
+        self.tail: Deque[Dict[str, Any]] = deque(maxlen=tail_size)
+        self.appended = 0
+
+        if not self.segments or self.segments[-1].full:
+            self._rotate()
+        else:
+            self.segments[-1].open_for_append()
+        self._fill_tail()
+        self._schedule_maintenance()
+
+    def _segment_path(self, number: int) -> Path:
+        return self.directory / f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}"
+
+    def _load_segments(self) -> List[_Segment]:
+        # Leftovers from compactions interrupted by a crash
+        for tmp_path in self.directory.glob(f"{SEGMENT_PREFIX}*.tmp"):
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+        segments = []
+        for path in sorted(self.directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")):
+            try:
+                number = int(path.stem[len(SEGMENT_PREFIX):])
+            except ValueError:
+                continue
+            segment = _Segment.open_existing(path, number)
+            if segment is not None:
+                segments.append(segment)
+        segments.sort(key=lambda s: s.number)
+        return segments
+
+    def _fill_tail(self):
+        wanted = self.tail.maxlen
+        chunks = []
+        for segment in reversed(self.segments):
+            if wanted <= 0:
+                break
+            records = segment.records()[-wanted:]
+            chunks.append(records)
+            wanted -= records.shape[0]
+        for records in reversed(chunks):
+            self.tail.extend(_decode(r) for r in records)
+
+    def _rotate(self):
+        number = self.segments[-1].number + 1 if self.segments else 1
+        segment = _Segment.create(self._segment_path(number), number, self.segment_records)
+        segment.open_for_append()
+        with self._lock:
+            if self.segments:
+                self.segments[-1].close()
+            self.segments.append(segment)
+
+    def append(
+        self,
+        effect_id: str,
+        intensity: float = 0.5,
+        source: str = "manual",
+        rule: Optional[str] = None,
+        timestamp: Optional[float] = None
+    ):
+        """Record a fired effect (O(1); no allocation beyond the packed record)"""
+        if timestamp is None:
+            timestamp = time.time()
+        effect_bytes = _truncate(effect_id)
+        rule_bytes = _truncate(rule or "")
+        record = _RECORD.pack(
+            timestamp,
+            intensity,
+            SOURCE_CODES.get(source, 0),
+            effect_bytes,
+            rule_bytes
+        )
+
+        if self.segments[-1].full:
+            self._rotate()
+            self._schedule_maintenance()
+        self.segments[-1].append(record, timestamp)
+        self.appended += 1
+        self.tail.append({
+            "timestamp": timestamp,
+            "effect_type": effect_id.split(":", 1)[0],
+            "effect_id": effect_bytes.decode("utf-8"),
+            "intensity": intensity,
+            "source": source if source in SOURCE_CODES else "unknown",
+            "rule": rule_bytes.decode("utf-8") or None,
+        })
+
+    def last(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent records, newest first"""
+        if limit <= len(self.tail) or len(self.tail) < self.tail.maxlen:
+            return list(reversed(self.tail))[:limit]
+        return self.range(limit=limit)
+
+    def range(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """Records with since <= timestamp < until, newest first"""
+        with self._lock:
+            segments = list(self.segments)
+
+        results: List[Dict[str, Any]] = []
+        for segment in reversed(segments):
+            if len(results) >= limit:
+                break
+            if not segment.count:
+                continue
+            if since is not None and segment.last_ts < since:
+                break
+            if until is not None and segment.first_ts >= until:
+                continue
+            try:
+                records = segment.records()
+            except (OSError, ValueError):
+                # Removed or compacted by retention while we were reading
+                continue
+            timestamps = records["timestamp"]
+            lo = np.searchsorted(timestamps, since, "left") if since is not None else 0
+            hi = np.searchsorted(timestamps, until, "left") if until is not None else len(records)
+            for record in records[lo:hi][::-1][:limit - len(results)]:
+                results.append(_decode(record))
+        return results
+
+    def _schedule_maintenance(self):
+        """Apply retention on a background thread, off the append path"""
+        if self._maintenance is not None and self._maintenance.is_alive():
+            return
+        self._maintenance = threading.Thread(
+            target=self.apply_retention, name="trigger-history-retention", daemon=True
+        )
+        self._maintenance.start()
+
+    def apply_retention(self) -> int:
+        """
+        Delete closed segments past the age or count limit, and rewrite
+        closed segments that are only partly past the age limit without
+        their expired records
+
+        Returns:
+            Number of segments removed
+        """
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            closed = self.segments[:-1]
+            excess = max(len(self.segments) - self.max_segments, 0)
+            expired = [
+                s for i, s in enumerate(closed)
+                if i < excess or (s.count and s.last_ts < cutoff)
+            ]
+            partial = [
+                s for s in closed if s not in expired and s.count and s.first_ts < cutoff
+            ]
+            self.segments = [s for s in self.segments if s not in expired]
+
+        for segment in expired:
+            try:
+                segment.path.unlink()
+            except FileNotFoundError:
+                pass
+        if expired:
+            logger.info(f"Trigger history retention removed {len(expired)} segments")
+
+        for segment in partial:
+            self._compact(segment, cutoff)
+        return len(expired)
+
+    def _compact(self, segment: _Segment, cutoff: float):
+        """Replace a closed segment with one holding only its records from cutoff on"""
+        try:
+            records = segment.records()
+            keep = records[np.searchsorted(records["timestamp"], cutoff, "left"):]
+            replacement = _Segment.write(segment.path, segment.number, keep)
+        except OSError as e:
+            logger.error(f"Failed to compact history segment {segment.path}: {e}")
+            return
+        with self._lock:
+            if segment in self.segments:
+                self.segments[self.segments.index(segment)] = replacement
+        logger.info(
+            f"Trigger history retention compacted {segment.path.name} "
+            f"({records.shape[0] - keep.shape[0]} expired records)"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            segments = list(self.segments)
+        return {
+            "segments": len(segments),
+            "records": sum(s.count for s in segments),
+            "appended": self.appended,
+            "oldest": segments[0].first_ts if segments and segments[0].count else None,
+            "newest": segments[-1].last_ts if segments[-1].count else None,
+        }
+
+    def close(self):
+        if self._maintenance is not None:
+            self._maintenance.join(timeout=5)
+        with self._lock:
+            for segment in self.segments:
+                segment.close()
+
+
+@lru_cache()
+def get_trigger_history() -> TriggerHistory:
+    """Get the shared trigger history log"""
+    settings = get_settings()
+    return TriggerHistory(
+        os.path.join(os.path.expanduser(settings.CONFIG_DIR), "history"),
+        segment_records=settings.HISTORY_SEGMENT_RECORDS,
+        retention_days=settings.HISTORY_RETENTION_DAYS,
+        max_segments=settings.HISTORY_MAX_SEGMENTS
+    )
@@ -0,0 +1,407 @@
+"""
+Offline analysis of recorded VODs
+Memory-maps a WAV file, analyzes overlapping chunks on every core, and streams
+back a timeline of features, detections and would-be triggers
+
+CLI (from backend/):
+    python -m app.services.vod_analyzer stream.wav --output timeline.ndjson
+"""
+import argparse
+import asyncio
+import json
+import os
+import struct
+import sys
+import time
+import logging
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Optional, List, Dict, Any, AsyncIterator
+
+from app.core.config import get_settings
+from app.services.audio_analyzer import AudioAnalyzer
+from app.services.keyword_matcher import compile_keywords
+from app.services.trigger_engine import DEFAULT_RULES, TriggerEngine
+
+logger = logging.getLogger(__name__)
+
+_FORMAT_PCM = 1
+_FORMAT_FLOAT = 3
+_FORMAT_EXTENSIBLE = 0xFFFE
+
+# (format tag, bits per sample) -> (numpy dtype, scale to [-1, 1])
+_SAMPLE_FORMATS = {
+    (_FORMAT_PCM, 16): ("<i2", 1.0 / 32768.0),
+    (_FORMAT_PCM, 32): ("<i4", 1.0 / 2147483648.0),
+    (_FORMAT_FLOAT, 32): ("<f4", 1.0),
+}
+
+
+@dataclass
+class WavInfo:
+    """Layout of a WAV file's sample data"""
+    path: str
+    sample_rate: int
+    channels: int
+    frames: int
+    dtype: str
+    scale: float
+    data_offset: int
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate
+
+
+def read_wav_info(path: str) -> WavInfo:
+    """
+    Parse a WAV header without reading the sample data
+
+    Supports 16/32-bit integer and 32-bit float PCM (plain or extensible).
+
+    Raises:
+        ValueError: Not a WAV file, an unsupported sample format, or an
+            inconsistent fmt chunk
+    """
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            raise ValueError("Not a RIFF/WAVE file")
+
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError("WAV file has no data chunk")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                body = f.read(size + (size & 1))
+                if size < 16 or len(body) < 16:
+                    raise ValueError("WAV fmt chunk is truncated")
+                tag, channels, rate, _, block_align, bits = struct.unpack("<HHIIHH", body[:16])
+                if tag == _FORMAT_EXTENSIBLE and size >= 26:
+                    tag = struct.unpack("<H", body[24:26])[0]
+                fmt = (tag, channels, rate, block_align, bits)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError("WAV data chunk before fmt chunk")
+                data_offset = f.tell()
+                # Streamed/oversized files may carry a bogus size; trust the file
+                data_size = min(size, file_size - data_offset)
+                break
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+
+    tag, channels, rate, block_align, bits = fmt
+    sample_format = _SAMPLE_FORMATS.get((tag, bits))
+    if sample_format is None:
+        raise ValueError(f"Unsupported WAV sample format (tag {tag}, {bits}-bit)")
+    if channels < 1 or rate < 1:
+        raise ValueError(f"Invalid WAV format ({channels} channels at {rate} Hz)")
+    if block_align != channels * bits // 8:
+        raise ValueError(
+            f"Invalid WAV block alignment {block_align} for {channels} x {bits}-bit"
+        )
+    dtype, scale = sample_format
+    return WavInfo(
+        path=path,
+        sample_rate=rate,
+        channels=channels,
+        frames=data_size // block_align,
+        dtype=dtype,
+        scale=scale,
+        data_offset=data_offset,
+    )
+
+
+def open_samples(info: WavInfo) -> np.ndarray:
+    """Read-only memory map of the samples, shaped (frames, channels)"""
+    return np.memmap(
+        info.path,
+        dtype=info.dtype,
+        mode="r",
+        offset=info.data_offset,
+        shape=(info.frames, info.channels),
+    )
+
+
+def _to_float(samples: np.ndarray, scale: float) -> np.ndarray:
+    out = samples.astype(np.float32)
+    if scale != 1.0:
+        out *= scale
+    return out
+
+
+def analyze_chunk(
+    info: WavInfo,
+    start: int,
+    end: int,
+    params: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Analyze frames [start, end) of a VOD (runs in a worker process)
+
+    Analysis starts ``overlap`` frames early so streaming detectors and
+    baselines are warmed up at ``start``; anything found in that lead-in
+    belongs to the previous chunk and is dropped. Hops are aligned to
+    absolute multiples of the hop size, so chunk results join seamlessly.
+    """
+    samples = open_samples(info)
+    sample_rate = info.sample_rate
+    hop = params["hop_frames"]
+    window = params["window_frames"]
+    block = params["block_frames"]
+
+    analyzer = AudioAnalyzer(
+        sample_rate=sample_rate, event_template_dir=params.get("event_template_dir")
+    )
+    # Start on the detector's frame grid so event times match a single pass
+    frame_hop = analyzer.event_detector.extractor.hop_size
+    warm_start = max(start - params["overlap_frames"], 0) // frame_hop * frame_hop
+    automaton = compile_keywords(params.get("keywords") or [])
+
+    # Streaming event detection over consecutive blocks. An event is reported
+    # a little after it starts, so read past the end too and keep only the
+    # events that start inside this chunk
+    events = []
+    lookahead_end = min(end + params["overlap_frames"], info.frames)
+    for pos in range(warm_start, lookahead_end, block):
+        audio = _to_float(samples[pos:min(pos + block, lookahead_end)], info.scale)
+        for event in analyzer.event_detector.process_block(audio):
+            event_time = warm_start / sample_rate + event.time
+            if start / sample_rate <= event_time < end / sample_rate:
+                events.append({"name": event.name, "time": event_time, "score": event.score})
+
+    # Per-hop features, emotion and keywords over a sliding window
+    timeline = []
+    first_hop_end = (warm_start // hop + 1) * hop
+    for hop_end in range(first_hop_end, end + 1, hop):
+        hop_audio = _to_float(samples[hop_end - hop:hop_end], info.scale)
+        analyzer.update_baseline(hop_audio)
+        if hop_end <= start:
+            continue
+
+        window_audio = _to_float(samples[max(hop_end - window, 0):hop_end], info.scale)
+        features = analyzer.extract_features(window_audio)
+        summary = analyzer.analyze_audio_features(window_audio, features)
+        emotion, confidence = analyzer.analyze_emotion(window_audio, features)
+        keywords = analyzer.detect_keywords(hop_audio, automaton) if automaton.keywords else []
+        timeline.append({
+            "time": hop_end / sample_rate,
+            **summary,
+            "arousal": analyzer.get_arousal() if analyzer.aggregator.is_warm("2s") else None,
+            "emotion": emotion,
+            "confidence": confidence,
+            "keywords": keywords,
+        })
+
+    return {"start": start / sample_rate, "end": end / sample_rate,
+            "timeline": timeline, "events": events}
+
+
+class VodAnalyzer:
+    """
+    Batch analysis of a recorded WAV file
+
+    Chunks are analyzed concurrently in a process pool (workers open their
+    own memory map, so no audio is pickled) and yielded back in order. Trigger
+    rules then run sequentially over the merged timeline in stream time, so
+    cooldowns and rate limits behave as they would have live.
+    """
+
+    def __init__(
+        self,
+        chunk_seconds: float = 60.0,
+        overlap_seconds: float = 5.0,
+        window_seconds: float = 1.0,
+        hop_seconds: float = 0.25,
+        workers: Optional[int] = None,
+        keywords: Optional[List[str]] = None,
+        sensitivity: float = 0.5,
+        rules: Optional[List[Dict[str, Any]]] = None,
+        event_template_dir: Optional[str] = None
+    ):
+        if overlap_seconds < window_seconds:
+            raise ValueError("overlap_seconds must cover at least one analysis window")
+        self.chunk_seconds = chunk_seconds
+        self.overlap_seconds = overlap_seconds
+        self.window_seconds = window_seconds
+        self.hop_seconds = hop_seconds
+        self.workers = workers or os.cpu_count() or 1
+        self.keywords = keywords or []
+        self.sensitivity = sensitivity
+        self.rules = rules
+        self.event_template_dir = event_template_dir
+
+    def _plan(self, info: WavInfo):
+        rate = info.sample_rate
+        hop = max(int(self.hop_seconds * rate), 1)
+        # Whole hops per chunk so hop boundaries line up across chunks
+        chunk = max(int(self.chunk_seconds * rate) // hop, 1) * hop
+        params = {
+            "hop_frames": hop,
+            "window_frames": int(self.window_seconds * rate),
+            "block_frames": 4096,
+            "overlap_frames": int(self.overlap_seconds * rate),
+            "keywords": self.keywords,
+            "event_template_dir": self.event_template_dir,
+        }
+        bounds = [(s, min(s + chunk, info.frames)) for s in range(0, info.frames, chunk)]
+        return bounds, params
+
+    async def analyze(self, path: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Analyze a WAV file, yielding one record per chunk then a summary
+
+        Raises:
+            ValueError: Unsupported or invalid WAV file
+        """
+        info = read_wav_info(path)
+        bounds, params = self._plan(info)
+        engine = TriggerEngine(rules=self.rules or DEFAULT_RULES, sensitivity=self.sensitivity)
+        started = time.perf_counter()
+        logger.info(
+            f"VOD analysis: {info.duration:.0f}s in {len(bounds)} chunks on {self.workers} workers"
+        )
+
+        yield {
+            "type": "start",
+            "path": info.path,
+            "sample_rate": info.sample_rate,
+            "channels": info.channels,
+            "duration": info.duration,
+            "chunks": len(bounds),
+        }
+
+        loop = asyncio.get_running_loop()
+        total_events = 0
+        total_triggers = 0
+        pool = ProcessPoolExecutor(max_workers=self.workers)
+        pending = []
+        try:
+            next_chunk = 0
+            # Keep a bounded number of chunks in flight so results don't pile up
+            while next_chunk < len(bounds) or pending:
+                while next_chunk < len(bounds) and len(pending) < self.workers * 2:
+                    start, end = bounds[next_chunk]
+                    pending.append(loop.run_in_executor(
+                        pool, analyze_chunk, info, start, end, params
+                    ))
+                    next_chunk += 1
+
+                chunk = await pending.pop(0)
+                triggers = self._evaluate(engine, chunk)
+                total_events += len(chunk["events"])
+                total_triggers += len(triggers)
+                yield {"type": "chunk", **chunk, "triggers": triggers}
+        finally:
+            # Runs on client disconnect too (generator close), inside the event
+            # loop: never wait for chunks still being analyzed
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        elapsed = time.perf_counter() - started
+        yield {
+            "type": "summary",
+            "duration": info.duration,
+            "elapsed": elapsed,
+            "realtime_factor": info.duration / elapsed if elapsed else 0.0,
+            "events": total_events,
+            "triggers": total_triggers,
+            "trigger_stats": engine.stats(),
+        }
+
+    def _evaluate(self, engine: TriggerEngine, chunk: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Run the trigger rules over a chunk's hops, in stream time"""
+        events = sorted(chunk["events"], key=lambda e: e["time"])
+        triggers = []
+        index = 0
+        for entry in chunk["timeline"]:
+            hop_events = []
+            while index < len(events) and events[index]["time"] < entry["time"]:
+                hop_events.append(events[index]["name"])
+                index += 1
+            decision = engine.evaluate(
+                entry["emotion"],
+                entry["confidence"],
+                entry["keywords"],
+                hop_events,
+                arousal=entry["arousal"],
+                now=entry["time"]
+            )
+            if decision is not None:
+                triggers.append({"time": entry["time"], **asdict(decision)})
+        return triggers
+
+
+def get_vod_analyzer(
+    keywords: Optional[List[str]] = None,
+    sensitivity: float = 0.5,
+    rules: Optional[List[Dict[str, Any]]] = None
+) -> VodAnalyzer:
+    """VodAnalyzer configured from settings"""
+    settings = get_settings()
+    return VodAnalyzer(
+        chunk_seconds=settings.VOD_CHUNK_SECONDS,
+        overlap_seconds=settings.VOD_OVERLAP_SECONDS,
+        window_seconds=settings.ANALYSIS_WINDOW_SECONDS,
+        hop_seconds=settings.ANALYSIS_HOP_SECONDS,
+        workers=settings.VOD_WORKERS or None,
+        keywords=keywords,
+        sensitivity=sensitivity,
+        rules=rules or settings.TRIGGER_RULES or None,
+        event_template_dir=settings.EVENT_TEMPLATE_DIR
+    )
+
+
+async def _run_cli(args: argparse.Namespace) -> int:
+    analyzer = get_vod_analyzer(keywords=args.keywords, sensitivity=args.sensitivity)
+    if args.workers:
+        analyzer.workers = args.workers
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    try:
+        async for record in analyzer.analyze(args.path):
+            if output:
+                output.write(json.dumps(record, default=str) + "\n")
+            if record["type"] == "chunk":
+                print(
+                    f"{record['end']:8.0f}s  events={len(record['events']):<4}"
+                    f"triggers={len(record['triggers'])}",
+                    file=sys.stderr
+                )
+            elif record["type"] == "summary":
+                print(
+                    f"Analyzed {record['duration']:.0f}s in {record['elapsed']:.1f}s "
+                    f"({record['realtime_factor']:.0f}x real time): "
+                    f"{record['events']} events, {record['triggers']} triggers",
+                    file=sys.stderr
+                )
+    finally:
+        if output:
+            output.close()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze a recorded VOD (WAV)")
+    parser.add_argument("path", help="WAV file (16/32-bit PCM or 32-bit float)")
+    parser.add_argument("--output", help="write the timeline as NDJSON to this file")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--sensitivity", type=float, default=0.5)
+    parser.add_argument("--keywords", nargs="*", default=[])
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        return asyncio.run(_run_cli(args))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Background startup warmup
+Builds slow services after the server is already answering, with progress
+"""
+import asyncio
+import time
+import logging
+from typing import Optional, List, Dict, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupStep:
+    """One named startup step and its outcome"""
+
+    def __init__(self, name: str, fn: Callable, blocking: bool):
+        self.name = name
+        self.fn = fn
+        self.blocking = blocking
+        self.status = "pending"
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"status": self.status, "duration_ms": self.duration_ms, "error": self.error}
+
+
+class Warmup:
+    """
+    Runs startup steps in order on a background task
+
+    Steps are plain callables; ``blocking`` ones (imports that initialize
+    native libraries, file loads) run on a worker thread so the event loop
+    keeps serving /health while they run. A failed step is recorded and the
+    rest still run; whatever it was building is constructed on first use.
+    """
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = started if started is not None else time.perf_counter()
+        self.steps: List[WarmupStep] = []
+        self.marks: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, name: str, fn: Callable, blocking: bool = False):
+        """Register a step (sync callable or coroutine function)"""
+        self.steps.append(WarmupStep(name, fn, blocking))
+
+    def mark(self, phase: str):
+        """Record when a startup phase was reached (ms since ``started``)"""
+        self.marks[phase] = (time.perf_counter() - self.started) * 1000
+
+    @property
+    def ready(self) -> bool:
+        return all(step.status in ("done", "failed") for step in self.steps)
+
+    async def run(self):
+        for step in self.steps:
+            step.status = "running"
+            started = time.perf_counter()
+            try:
+                if asyncio.iscoroutinefunction(step.fn):
+                    await step.fn()
+                elif step.blocking:
+                    await asyncio.to_thread(step.fn)
+                else:
+                    step.fn()
+            except asyncio.CancelledError:
+                step.status = "pending"
+                raise
+            except Exception as e:
+                step.status = "failed"
+                step.error = str(e)
+                logger.error(f"Warmup step '{step.name}' failed: {e}")
+            else:
+                step.status = "done"
+            step.duration_ms = (time.perf_counter() - started) * 1000
+
+        self.mark("ready")
+        logger.info(f"Backend ready in {self.marks['ready']:.0f} ms")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def status(self) -> Dict[str, Any]:
+        done = sum(1 for step in self.steps if step.status in ("done", "failed"))
+        current = next((s.name for s in self.steps if s.status == "running"), None)
+        return {
+            "ready": self.ready,
+            "progress": done / len(self.steps) if self.steps else 1.0,
+            "current": current,
+            "steps": {step.name: step.to_dict() for step in self.steps},
+            "timeline_ms": dict(self.marks),
+        }
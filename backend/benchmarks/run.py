@@ -0,0 +1,235 @@
+"""
+Per-block microbenchmarks for the real-time audio path
+
+Usage (from backend/):
+    python -m benchmarks.run                              # print results
+    python -m benchmarks.run --output benchmarks/baseline.json    # save a baseline
+    python -m benchmarks.run --baseline benchmarks/baseline.json  # regression gate
+
+Each case is timed call by call over a deterministic mix of speech, music,
+silence and crowd audio, fed in capture-sized blocks. Results are reported
+per block against the block's real-time budget (e.g. 1024 frames at
+44.1 kHz = 23.2 ms). With --baseline the run exits non-zero when a case's
+median got slower than the baseline by more than the tolerance.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import numpy as np
+from typing import Optional, List, Dict, Any, Callable
+
+from app.services.activity_gate import ActivityGate
+from app.services.analysis_executor import DETECTORS, run_detectors
+from app.services.audio_analyzer import AudioAnalyzer
+from app.services.keyword_matcher import compile_keywords
+from app.services.resampler import AnalysisFrontEnd
+from app.services.ring_buffer import AudioRingBuffer
+from benchmarks.signals import SIGNALS, generate
+
+DEFAULT_SAMPLE_RATES = [16000, 44100, 48000]
+DEFAULT_BLOCKSIZES = [256, 512, 1024, 2048]
+KEYWORDS = ["gg", "let's go", "no way", "clutch", "what a play"]
+ANALYSIS_RATE = 16000
+
+CASES = (
+    "capture_callback",
+    "activity_gate",
+    "front_end",
+    "features",
+    "emotion",
+    "keywords",
+    "events",
+    "should_trigger",
+    "pipeline",
+)
+
+
+def build_cases(sample_rate: int, blocksize: int, channels: int) -> Dict[str, Callable]:
+    """Fresh, independent state for every case at one stream configuration"""
+    analyzer = AudioAnalyzer(sample_rate=sample_rate)
+    pipeline_analyzer = AudioAnalyzer(sample_rate=sample_rate)
+    automaton = compile_keywords(KEYWORDS)
+    ring = AudioRingBuffer(sample_rate * 10, channels=channels)
+    gate = ActivityGate(blocksize=blocksize)
+    front_end = AnalysisFrontEnd(sample_rate, ANALYSIS_RATE)
+    consumed = [0]
+
+    def capture_callback(block):
+        # What the PortAudio callback does per block
+        ring.write(block)
+        ring.latest(block.shape[0])
+
+    def downmix_resample(block):
+        # Consumer-side downmix + resample into the analysis-rate buffer
+        front_end.process(block, consumed[0])
+        consumed[0] += block.shape[0]
+
+    return {
+        "capture_callback": capture_callback,
+        "activity_gate": gate.process,
+        "front_end": downmix_resample,
+        "features": analyzer.analyze_audio_features,
+        "emotion": analyzer.analyze_emotion,
+        "keywords": lambda block: analyzer.detect_keywords(block, automaton),
+        "events": analyzer.detect_events,
+        "should_trigger": lambda block: analyzer.should_trigger_effect(
+            "excited", 0.9, ["gg"], ["victory"]
+        ),
+        "pipeline": lambda block: run_detectors(
+            pipeline_analyzer, block, DETECTORS, automaton.keywords
+        ),
+    }
+
+
+def time_case(fn: Callable, blocks: List[np.ndarray], repeat: int) -> Dict[str, float]:
+    """Per-call timings in microseconds over ``repeat`` passes of the stream"""
+    for block in blocks[:8]:
+        fn(block)  # warm caches and lazy allocations
+
+    samples = np.empty(len(blocks) * repeat, dtype=np.float64)
+    clock = time.perf_counter_ns
+    i = 0
+    for _ in range(repeat):
+        for block in blocks:
+            start = clock()
+            fn(block)
+            samples[i] = clock() - start
+            i += 1
+
+    samples /= 1000.0
+    return {
+        "median_us": float(np.median(samples)),
+        "p95_us": float(np.percentile(samples, 95)),
+        "p99_us": float(np.percentile(samples, 99)),
+        "mean_us": float(samples.mean()),
+        "calls": int(samples.shape[0]),
+    }
+
+
+def run(
+    sample_rates: List[int],
+    blocksizes: List[int],
+    channels: int,
+    seconds: float,
+    repeat: int,
+    cases: List[str]
+) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for sample_rate in sample_rates:
+        stream = np.concatenate([
+            generate(kind, seconds, sample_rate, channels) for kind in SIGNALS
+        ])
+        for blocksize in blocksizes:
+            usable = stream.shape[0] - stream.shape[0] % blocksize
+            blocks = list(stream[:usable].reshape(-1, blocksize, channels))
+            budget_us = blocksize / sample_rate * 1e6
+            available = build_cases(sample_rate, blocksize, channels)
+            for name in cases:
+                stats = time_case(available[name], blocks, repeat)
+                stats["budget_us"] = budget_us
+                stats["budget_fraction"] = stats["p95_us"] / budget_us
+                results[f"{name}@{sample_rate}/{blocksize}"] = stats
+    return results
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "system": platform.system(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def print_table(results: Dict[str, Any]):
+    print(f"{'case':<36}{'median':>10}{'p95':>10}{'budget':>11}{'p95/budget':>12}")
+    for key, stats in results.items():
+        print(
+            f"{key:<36}{stats['median_us']:>8.1f}us{stats['p95_us']:>8.1f}us"
+            f"{stats['budget_us'] / 1000:>9.1f}ms{stats['budget_fraction']:>11.2%}"
+        )
+
+
+def compare(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float,
+    min_delta_us: float
+) -> List[str]:
+    """Cases whose median regressed beyond the tolerance (and the noise floor)"""
+    regressions = []
+    for key, stats in results.items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        delta = stats["median_us"] - base["median_us"]
+        if delta > min_delta_us and stats["median_us"] > base["median_us"] * (1 + tolerance):
+            regressions.append(
+                f"{key}: {base['median_us']:.1f}us -> {stats['median_us']:.1f}us "
+                f"(+{delta / base['median_us']:.0%})"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sample-rates", type=int, nargs="+", default=DEFAULT_SAMPLE_RATES)
+    parser.add_argument("--blocksizes", type=int, nargs="+", default=DEFAULT_BLOCKSIZES)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=2.0,
+                        help="seconds of each signal type in the test stream")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the stream")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--output", help="write results (a new baseline) to this JSON file")
+    parser.add_argument("--baseline", help="compare against this JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed median slowdown as a fraction (default 0.25)")
+    parser.add_argument("--min-delta-us", type=float, default=5.0,
+                        help="ignore slowdowns smaller than this many microseconds")
+    parser.add_argument("--fail-over-budget", action="store_true",
+                        help="also fail when a pipeline case's p95 exceeds its block budget")
+    args = parser.parse_args(argv)
+
+    results = run(
+        args.sample_rates, args.blocksizes, args.channels, args.seconds, args.repeat, args.cases
+    )
+    print_table(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+    failed = False
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("environment", {}).get("machine") != platform.machine():
+            print("\nWarning: baseline was recorded on a different machine type")
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_us)
+        if regressions:
+            failed = True
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+        else:
+            print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+    if args.fail_over_budget:
+        over = [
+            key for key, stats in results.items()
+            if key.startswith("pipeline@") and stats["budget_fraction"] > 1.0
+        ]
+        if over:
+            failed = True
+            print(f"\nOver real-time budget (p95): {', '.join(over)}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
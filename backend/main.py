@@ -2,13 +2,34 @@
 SoundStage - Dynamic Soundboard Backend
 FastAPI server for real-time audio processing and SFX triggering
 """
-from fastapi import FastAPI, WebSocket, HTTPException
+# First: everything imported after it counts as import cost (timeline_ms.imports)
+from app.core.boot import IMPORT_STARTED
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from typing import List
+import asyncio
+import importlib
 import logging
+import numpy as np
 
-from app.routers import analyze, trigger, settings
+from app.routers import analyze, trigger
+from app.routers import settings as settings_router
 from app.core.config import get_settings
+from app.services.analysis_executor import DETECTORS, run_detectors
+from app.services.audio_analyzer import AudioAnalyzer
+from app.services.audio_output import get_effect_mixer
+from app.services.device_registry import get_device_registry
+from app.services.effect_library import get_effect_library
+from app.services.event_hub import ENCODINGS, get_event_hub
+from app.services.elevenlabs_service import get_circuit_breaker
+from app.services.http_client import close_http_client
+from app.services.metrics import get_metrics
+from app.services.settings_store import get_settings_store
+from app.routers.settings import apply_user_settings
+from app.services.trigger_history import get_trigger_history
+from app.services.warmup import Warmup
 
 # Configure logging
 logging.basicConfig(
@@ -19,13 +40,107 @@ logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
+warmup = Warmup(started=IMPORT_STARTED)
+warmup.mark("imports")
+get_metrics().gauge(
+    "startup_milliseconds", "Time from process import to each startup phase", ("phase",),
+    function=lambda: {(phase,): ms for phase, ms in warmup.marks.items()}
+)
+
+# Tasks started during warmup that run for the life of the server
+_background: List[asyncio.Task] = []
+
+
+def _constructed(getter) -> bool:
+    """Whether a lazily built (lru_cache) service singleton exists yet"""
+    return getter.cache_info().currsize > 0
+
+
+async def publish_metrics(interval: float):
+    """Push a metrics summary to dashboard clients every interval seconds"""
+    hub = get_event_hub()
+    metrics = get_metrics()
+    while True:
+        await asyncio.sleep(interval)
+        if hub.subscribers:
+            hub.publish("metrics", metrics.snapshot(), coalesce=True)
+
+
+def _apply_saved_settings():
+    """Apply saved user settings, then keep services in sync with changes"""
+    store = get_settings_store()
+    apply_user_settings(store.settings)
+    store.subscribe(apply_user_settings)
+
+
+async def _start_audio():
+    """Initialize PortAudio and enumerate devices, off the event loop"""
+    await asyncio.to_thread(importlib.import_module, "sounddevice")
+    devices = get_device_registry()
+    devices.listeners.append(
+        lambda found: get_event_hub().publish("devices", {"count": len(found)})
+    )
+    await devices.refresh()
+    devices.start()
+
+
+def _warm_analysis():
+    """Decode event templates and run one window through every detector"""
+    rate = settings.ANALYSIS_SAMPLE_RATE or settings.SAMPLE_RATE
+    analyzer = AudioAnalyzer(sample_rate=rate, event_template_dir=settings.EVENT_TEMPLATE_DIR)
+    window = np.zeros((int(rate * settings.ANALYSIS_WINDOW_SECONDS), 1), dtype=np.float32)
+    run_detectors(analyzer, window, DETECTORS)
+
+
+def _start_effects():
+    library = get_effect_library()
+    if settings.EFFECT_PREWARM_ENABLED:
+        _background.append(asyncio.create_task(library.prewarm()))
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
     logger.info("Starting SoundStage backend...")
+    
+    # The server only starts answering once this yields, so slow setup runs
+    # on the warmup task instead (progress is reported by /health). Services
+    # not built yet are constructed on first use.
+    warmup.add("settings", _apply_saved_settings)
+    warmup.add("history", get_trigger_history, blocking=True)
+    warmup.add("audio", _start_audio)
+    warmup.add("analysis", _warm_analysis, blocking=True)
+    warmup.add("effects", _start_effects)
+    warmup.start()
+    
+    if settings.METRICS_PUBLISH_SECONDS > 0:
+        _background.append(
+            asyncio.create_task(publish_metrics(settings.METRICS_PUBLISH_SECONDS))
+        )
+    
     yield
+    
     logger.info("Shutting down SoundStage backend...")
+    # Only shutdown touches the ingest manager; the analyze router loads it
+    from app.services.remote_ingest import get_ingest_manager
+    
+    await warmup.stop()
+    for task in _background:
+        if not task.done():
+            task.cancel()
+    if _constructed(get_ingest_manager):
+        get_ingest_manager().close()
+    if _constructed(get_device_registry):
+        await get_device_registry().stop()
+    if _constructed(get_effect_mixer):
+        get_effect_mixer().stop()
+    if _constructed(get_effect_library):
+        await get_effect_library().close()
+    await close_http_client()
+    if _constructed(get_trigger_history):
+        get_trigger_history().close()
+    if _constructed(get_settings_store):
+        get_settings_store().flush()
 
 
 app = FastAPI(
@@ -47,7 +162,9 @@ app.add_middleware(
 # Include routers
 app.include_router(analyze.router, prefix="/api/analyze", tags=["analyze"])
 app.include_router(trigger.router, prefix="/api/trigger", tags=["trigger"])
-app.include_router(settings.router, prefix="/api/settings", tags=["settings"])
+app.include_router(settings_router.router, prefix="/api/settings", tags=["settings"])
+
+warmup.mark("app")
 
 
 @app.get("/")
@@ -62,25 +179,64 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Detailed health check"""
+    """
+    Detailed health check
+    Answers as soon as the server is up; ``warmup`` shows startup progress
+    and nothing is constructed just to report on it
+    """
+    breaker_state = get_circuit_breaker().state
+    xruns = sum(get_metrics().xruns.values.values())
+    if not warmup.ready:
+        status = "starting"
+    else:
+        status = "healthy" if breaker_state != "open" else "degraded"
+    mixer_running = _constructed(get_effect_mixer) and get_effect_mixer().is_running
     return {
-        "status": "healthy",
-        "audio_system": "ready",
-        "api_status": "operational"
+        "status": status,
+        "audio_system": "running" if mixer_running else "ready",
+        "audio_xruns": int(xruns),
+        "api_status": "operational" if breaker_state == "closed" else breaker_state,
+        "effects": get_effect_library().status() if _constructed(get_effect_library) else None,
+        "warmup": warmup.status()
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus-compatible metrics"""
+    return PlainTextResponse(
+        get_metrics().render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time event streaming"""
+async def websocket_endpoint(websocket: WebSocket, format: str = "json"):
+    """
+    WebSocket endpoint for real-time event streaming
+    
+    Pass ?format=binary for compact binary frames instead of JSON text.
+    """
+    if format not in ENCODINGS:
+        await websocket.close(code=1003)
+        return
+    
     await websocket.accept()
-    logger.info("WebSocket connection established")
+    logger.info(f"WebSocket connection established ({format})")
+    
+    hub = get_event_hub()
+    subscriber = hub.subscribe(format)
+    sender = asyncio.create_task(hub.serve(websocket, subscriber))
     try:
+        # Incoming messages are ignored; reading just detects disconnects
         while True:
-            data = await websocket.receive_text()
-            # Echo for now - will implement real-time audio event streaming
-            await websocket.send_text(f"Echo: {data}")
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
+        sender.cancel()
+        hub.unsubscribe(subscriber)
         logger.info("WebSocket connection closed")
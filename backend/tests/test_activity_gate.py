@@ -0,0 +1,53 @@
+import numpy as np
+
+from app.services.activity_gate import ActivityGate
+
+RATE = 48000
+BLOCK = 1024
+
+
+def noise(blocks: int, db: float, seed: int = 0) -> np.ndarray:
+    rms = 10.0 ** (db / 20.0)
+    rng = np.random.default_rng(seed)
+    return (rng.normal(0.0, rms, blocks * BLOCK)).astype(np.float32)
+
+
+def tone(blocks: int, db: float, freq: float = 220.0) -> np.ndarray:
+    t = np.arange(blocks * BLOCK) / RATE
+    return (np.sqrt(2.0) * 10.0 ** (db / 20.0) * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def run(gate: ActivityGate, audio: np.ndarray) -> list:
+    return [gate.process(audio[i:i + BLOCK]) for i in range(0, audio.shape[0], BLOCK)]
+
+
+def test_tone_opens_and_hangover_closes():
+    gate = ActivityGate(blocksize=BLOCK, hangover_blocks=5)
+    run(gate, noise(50, -70.0))
+    assert run(gate, tone(10, -20.0)) == [True] * 10
+    quiet = run(gate, noise(10, -70.0, seed=1))
+    assert quiet[:5] == [True] * 5
+    assert not any(quiet[5:])
+
+
+def test_steady_hiss_keeps_the_gate_shut():
+    gate = ActivityGate(blocksize=BLOCK)
+    assert not any(run(gate, noise(500, -40.0)))
+    assert gate.last_flatness > gate.max_flatness
+
+
+def test_noise_burst_well_above_the_floor_opens():
+    gate = ActivityGate(blocksize=BLOCK, hangover_blocks=5)
+    run(gate, noise(50, -70.0))
+    burst = run(gate, noise(20, -15.0, seed=1))
+    assert burst == [True] * 20
+
+
+def test_hiss_that_starts_loud_settles_into_the_floor():
+    gate = ActivityGate(blocksize=BLOCK, hangover_blocks=5)
+    run(gate, noise(50, -90.0))
+    states = run(gate, noise(1000, -30.0, seed=1))
+    assert states[0]
+    assert not any(states[-500:])
+    # Speech over the hiss still opens it
+    assert all(run(gate, tone(10, -10.0)))
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from app.services import analysis_executor
+from app.services.analysis_executor import DETECTORS, INLINE, AnalysisExecutor
+
+
+def window(value: float, frames: int = 1600) -> np.ndarray:
+    return np.full((frames, 1), value, dtype=np.float32)
+
+
+def inline_executor(**kwargs) -> AnalysisExecutor:
+    return AnalysisExecutor(
+        sample_rate=16000, channels=1, max_window_frames=1600,
+        routing={name: INLINE for name in DETECTORS}, **kwargs
+    )
+
+
+def test_cancelled_analysis_keeps_its_slot_until_the_reader_finishes(monkeypatch):
+    seen = []
+
+    def slow_detectors(analyzer, audio, detectors, keywords, stream_position):
+        first = float(audio[0, 0])
+        time.sleep(0.2)
+        seen.append((first, float(audio[-1, 0])))
+        return {"features": {"rms": first}}
+
+    monkeypatch.setattr(analysis_executor, "run_detectors", slow_detectors)
+
+    async def scenario():
+        executor = inline_executor(slots=1)
+        executor.start()
+        try:
+            first = asyncio.create_task(executor.analyze(window(1.0), detectors=["features"]))
+            await asyncio.sleep(0.05)
+            first.cancel()
+            second = asyncio.create_task(executor.analyze(window(2.0), detectors=["features"]))
+            await asyncio.sleep(0.05)
+            # The only slot is still being read by the cancelled call
+            assert not second.done()
+            assert seen == []
+            return await second
+        finally:
+            executor.shutdown()
+
+    result = asyncio.run(scenario())
+    assert result == {"features": {"rms": 2.0}}
+    # The first reader saw its own window from start to end
+    assert seen == [(1.0, 1.0), (2.0, 2.0)]
+
+
+def test_detectors_run_where_they_are_routed(monkeypatch):
+    run_detectors = analysis_executor.run_detectors
+
+    def tagged(analyzer, audio, detectors, *args):
+        results = run_detectors(analyzer, audio, detectors, *args)
+        # Forked workers inherit the patch and tag their results too
+        results.update({f"pid:{name}": os.getpid() for name in detectors})
+        return results
+
+    monkeypatch.setattr(analysis_executor, "run_detectors", tagged)
+
+    async def scenario():
+        executor = AnalysisExecutor(
+            sample_rate=16000, channels=1, max_window_frames=16000,
+            pools={"analysis": 1},
+            routing={"features": INLINE, "emotion": "analysis", "keywords": INLINE,
+                     "events": INLINE}
+        )
+        executor.start()
+        try:
+            audio = np.random.default_rng(0).normal(0.0, 0.1, (16000, 1)).astype(np.float32)
+            return await executor.analyze(audio, detectors=["features", "emotion"])
+        finally:
+            executor.shutdown()
+
+    results = asyncio.run(scenario())
+    assert set(results["features"]) >= {"rms"}
+    assert set(results["emotion"]) == {"label", "confidence"}
+    assert results["pid:features"] == os.getpid()
+    assert results.get("pid:emotion") != os.getpid()
+    assert "keywords" not in results and "events" not in results
@@ -0,0 +1,102 @@
+import time
+
+from app.services.analysis_scheduler import AnalysisScheduler
+
+HOP = 0.25
+
+
+def make_scheduler(**kwargs) -> AnalysisScheduler:
+    options = {"hop_seconds": HOP, "budget_seconds": 0.5, "raise_after": 2, "recover_after": 3}
+    options.update(kwargs)
+    return AnalysisScheduler(**options)
+
+
+def on_time() -> float:
+    return time.monotonic() + 60.0
+
+
+def overload(scheduler: AnalysisScheduler, hops: int):
+    for _ in range(hops):
+        scheduler.complete(on_time(), elapsed=HOP * 2)
+
+
+def relax(scheduler: AnalysisScheduler, hops: int):
+    for _ in range(hops):
+        scheduler.complete(on_time(), elapsed=HOP * 0.1)
+
+
+def test_level_rises_after_raise_after_overloads():
+    scheduler = make_scheduler()
+    overload(scheduler, 1)
+    assert scheduler.level == 0
+    overload(scheduler, 1)
+    assert scheduler.level == 1
+    assert scheduler.plan(["features", "keywords", "events"]) == ["features", "events"]
+
+    overload(scheduler, 10)
+    assert scheduler.level == scheduler.max_level
+    assert scheduler.shed == ("keywords", "emotion", "features")
+
+
+def test_detector_is_restored_after_recover_after_relaxed_hops():
+    scheduler = make_scheduler()
+    overload(scheduler, 2)
+    relax(scheduler, 2)
+    assert scheduler.level == 1
+    relax(scheduler, 1)
+    assert scheduler.level == 0
+
+    # A busy but in-time hop resets the relaxed streak
+    overload(scheduler, 2)
+    relax(scheduler, 2)
+    scheduler.complete(on_time(), elapsed=HOP * 0.9)
+    relax(scheduler, 2)
+    assert scheduler.level == 1
+
+
+def test_recovery_wait_doubles_after_a_failed_restore():
+    scheduler = make_scheduler()
+    overload(scheduler, 4)
+    assert scheduler.level == 2
+    relax(scheduler, 3)
+    assert scheduler.level == 1
+
+    # The restore overloads the loop again: back up, and wait twice as long
+    overload(scheduler, 2)
+    assert scheduler.level == 2
+    relax(scheduler, 5)
+    assert scheduler.level == 2
+    relax(scheduler, 1)
+    assert scheduler.level == 1
+
+    # Once a restore holds for the whole wait, the wait is reset
+    relax(scheduler, 6)
+    assert scheduler.level == 0
+    relax(scheduler, 3)
+    overload(scheduler, 2)
+    relax(scheduler, 3)
+    assert scheduler.level == 0
+
+
+def test_late_results_do_not_fire_and_count_as_overload():
+    scheduler = make_scheduler()
+    assert scheduler.complete(time.monotonic() - 1.0, elapsed=0.01) is False
+    assert scheduler.complete(time.monotonic() - 1.0, elapsed=0.01) is False
+    assert scheduler.counts["late"] == 2
+    assert scheduler.level == 1
+    assert scheduler.last_lateness > 0
+
+    assert scheduler.admit(time.monotonic() - 1.0) is False
+    assert scheduler.admit(on_time()) is True
+    assert scheduler.counts["dropped"] == 1
+    assert scheduler.complete(on_time(), elapsed=0.01) is True
+
+
+def test_overrun_hops_are_merged_into_the_next_window():
+    scheduler = make_scheduler()
+    assert 0.0 < scheduler.delay(time.monotonic()) <= HOP
+    assert scheduler.counts["merged"] == 0
+
+    delay = scheduler.delay(time.monotonic() - 2.5 * HOP)
+    assert scheduler.counts["merged"] == 2
+    assert 0.0 < delay <= 0.5 * HOP + 0.01
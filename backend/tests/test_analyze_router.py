@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from fastapi import BackgroundTasks, HTTPException
+
+from app.routers import analyze
+from app.routers.analyze import AudioAnalysisRequest, start_analysis
+
+
+class FakeCapture:
+    """AudioCaptureService stand-in; start_source fails for the named sources"""
+
+    instances = []
+
+    def __init__(self, failing=(), **kwargs):
+        self.sources = {"main": None}
+        self.failing = set(failing)
+        self.started = []
+        FakeCapture.instances.append(self)
+
+    def add_source(self, name):
+        self.sources[name] = None
+
+    def start_capture(self, device_id=None):
+        return self.start_source("main", device_id)
+
+    def start_source(self, name, device_id=None):
+        if name in self.failing:
+            return False
+        self.started.append(name)
+        return True
+
+    def stop_capture(self):
+        self.started.clear()
+
+
+class FakeStore:
+    settings = {"shed_order": None}
+
+    def has_consent(self, kind):
+        return True
+
+
+@pytest.fixture
+def session(monkeypatch):
+    FakeCapture.instances.clear()
+    monkeypatch.setattr(analyze, "get_settings_store", lambda: FakeStore())
+    monkeypatch.setattr(analyze, "_parse_device", lambda device: device)
+    return monkeypatch
+
+
+def start(sources=None):
+    request = AudioAnalysisRequest(audio_source="1", sources=sources)
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(start_analysis(request, BackgroundTasks()))
+    return raised.value
+
+
+def test_failed_extra_source_stops_the_started_capture(session):
+    session.setattr(analyze, "AudioCaptureService", lambda **kw: FakeCapture({"game"}, **kw))
+    error = start({"game": "3"})
+    assert error.status_code == 500 and "'game'" in error.detail
+    assert FakeCapture.instances[0].started == []
+    assert analyze._session["task"] is None
+
+
+def test_failed_executor_start_stops_capture_and_workers(session):
+    shutdowns = []
+
+    class FailingExecutor:
+        def __init__(self, **kwargs):
+            pass
+
+        def start(self):
+            raise OSError("no shared memory")
+
+        def shutdown(self):
+            shutdowns.append(True)
+
+    session.setattr(analyze, "AudioCaptureService", FakeCapture)
+    session.setattr(analyze, "AnalysisExecutor", FailingExecutor)
+    error = start()
+    assert error.status_code == 500 and "no shared memory" in error.detail
+    assert FakeCapture.instances[0].started == []
+    assert shutdowns == [True]
+    assert analyze._session["capture"] is None
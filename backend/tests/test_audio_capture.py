@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.audio_capture import MAIN_SOURCE, AudioCaptureService, CaptureSource, StreamClock
+
+RATE = 8000
+BLOCK = 80
+
+
+class Device:
+    """Simulated input device: its own start time, clock drift and jitter"""
+
+    def __init__(self, start: float, drift_ppm: float, seed: int):
+        self.start = start
+        self.rate = RATE * (1.0 + drift_ppm * 1e-6)
+        self.rng = np.random.default_rng(seed)
+        self.frame = 0
+
+    def block(self):
+        """(first frame, jittered callback timestamp, samples holding their capture times)"""
+        times = self.start + (self.frame + np.arange(BLOCK)) / self.rate
+        timestamp = times[0] + self.rng.uniform(-0.3e-3, 0.3e-3)
+        first, self.frame = self.frame, self.frame + BLOCK
+        # Relative to 10 s so float32 keeps sub-sample precision
+        return first, timestamp, (times - 10.0).astype(np.float32).reshape(-1, 1)
+
+
+def test_clock_locks_onto_a_drifting_jittery_device():
+    device = Device(start=10.0, drift_ppm=80.0, seed=0)
+    clock = StreamClock(RATE)
+    for _ in range(3000):
+        first, timestamp, _ = device.block()
+        clock.update(first, timestamp)
+
+    assert clock.drift_ppm == pytest.approx(80.0, abs=10.0)
+    true_time = device.start + device.frame / device.rate
+    # Filtered well below the 0.3 ms callback jitter
+    assert clock.time_at(device.frame) == pytest.approx(true_time, abs=0.1e-3)
+    assert clock.frame_at(true_time) == pytest.approx(device.frame, abs=1)
+    assert clock.resyncs == 0
+
+
+def test_clock_resyncs_after_a_stall():
+    clock = StreamClock(RATE)
+    clock.update(0, 5.0)
+    clock.update(BLOCK, 5.0 + BLOCK / RATE)
+    clock.update(2 * BLOCK, 7.0)
+    assert clock.resyncs == 1
+    assert clock.time_at(2 * BLOCK) == 7.0
+
+
+def test_aligned_windows_end_at_the_same_instant_on_every_source():
+    service = AudioCaptureService(sample_rate=RATE, channels=1, blocksize=BLOCK)
+    service.add_source("game")
+    devices = {
+        MAIN_SOURCE: Device(start=10.0, drift_ppm=-40.0, seed=1),
+        "game": Device(start=10.0375, drift_ppm=60.0, seed=2),
+    }
+    for _ in range(400):
+        for name, device in devices.items():
+            source = service.sources[name]
+            first, timestamp, samples = device.block()
+            source.clock.update(first, timestamp)
+            source.ring_buffer.write(samples)
+
+    try:
+        # common_time only considers running sources
+        for source in service.sources.values():
+            source.stream = object()
+        end_time = service.common_time()
+    finally:
+        for source in service.sources.values():
+            source.stream = None
+    ends = [device.start + device.frame / device.rate for device in devices.values()]
+    assert end_time == pytest.approx(min(ends), abs=0.2e-3)
+
+    ends = {}
+    for name in devices:
+        window, ends[name] = service.aligned_window(name, end_time, 400)
+        assert window.shape == (400, 1)
+        # The last frame was captured one sample period before end_time
+        assert window[-1, 0] + 10.0 == pytest.approx(end_time - 1.0 / RATE, abs=1.5 / RATE)
+
+    # The later-started device has audio past end_time, held back for alignment
+    game_ahead = service.sources["game"].ring_buffer.write_index - ends["game"]
+    assert game_ahead == pytest.approx(0.0375 * RATE, abs=2)
+
+
+def test_callback_only_hands_on_frames_the_buffer_kept():
+    source = CaptureSource("main", RATE, 1, BLOCK, buffer_seconds=0.03,
+                           overrun_policy="drop_newest")
+    delivered = []
+    source.callback_fn = lambda block: delivered.append(block[:, 0].copy())
+    time_info = SimpleNamespace(inputBufferAdcTime=0.0, currentTime=0.0)
+
+    # 240 frames of room: three blocks fit, the fourth is refused outright
+    for value in range(4):
+        block = np.full((BLOCK, 1), float(value), dtype=np.float32)
+        source._callback(block, BLOCK, time_info, None)
+    assert [(b.shape[0], float(b[0])) for b in delivered] == [
+        (BLOCK, 0.0), (BLOCK, 1.0), (BLOCK, 2.0)
+    ]
+    # Room for one block: only the first half of a double block is kept
+    source.ring_buffer.read(BLOCK)
+    source._callback(np.full((BLOCK * 2, 1), 5.0, dtype=np.float32), BLOCK * 2, time_info, None)
+    assert delivered[-1].shape[0] == BLOCK
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from app.services.audio_codec import (
+    integrated_loudness,
+    normalize_loudness,
+    prepare_effect,
+    trim_silence,
+)
+
+
+def sine(frequency: float, seconds: float, sample_rate: int, amplitude: float = 1.0):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+@pytest.mark.parametrize("sample_rate", [44100, 48000])
+def test_full_scale_1khz_sine_is_minus_3_lufs(sample_rate):
+    # BS.1770-4 calibration: a 0 dBFS 997 Hz sine in one channel reads -3.01 LUFS
+    assert integrated_loudness(sine(997, 5.0, sample_rate), sample_rate) == pytest.approx(
+        -3.01, abs=0.05
+    )
+    assert integrated_loudness(sine(1000, 5.0, sample_rate), sample_rate) == pytest.approx(
+        -3.0, abs=0.1
+    )
+
+
+def test_level_changes_move_loudness_by_the_same_db():
+    rate = 48000
+    loud = integrated_loudness(sine(997, 3.0, rate), rate)
+    quiet = integrated_loudness(sine(997, 3.0, rate, amplitude=0.1), rate)
+    assert loud - quiet == pytest.approx(20.0, abs=0.01)
+
+
+def test_gating_ignores_silence():
+    rate = 48000
+    tone = sine(997, 3.0, rate, amplitude=0.1)
+    padded = np.concatenate([np.zeros(rate * 5, np.float32), tone, np.zeros(rate * 5, np.float32)])
+    # Ungated, 10 s of silence would pull it down by 6.4 dB; only the blocks
+    # straddling the tone's edges still count
+    assert integrated_loudness(padded, rate) == pytest.approx(
+        integrated_loudness(tone, rate), abs=0.5
+    )
+    assert integrated_loudness(np.zeros(rate, np.float32), rate) == float("-inf")
+
+
+def test_normalize_hits_the_target_below_the_peak_ceiling():
+    rate = 48000
+    scaled, _, _ = normalize_loudness(sine(997, 3.0, rate, 0.05), rate, -16.0)
+    assert integrated_loudness(scaled, rate) == pytest.approx(-16.0, abs=0.01)
+
+    # A -2 LUFS target would need a peak above -1 dBFS, so the ceiling wins
+    scaled, _, _ = normalize_loudness(sine(997, 3.0, rate, 0.05), rate, -2.0, peak_dbfs=-1.0)
+    assert 20 * np.log10(np.max(np.abs(scaled))) == pytest.approx(-1.0, abs=0.01)
+
+
+def test_trim_silence_keeps_the_sound():
+    rate = 48000
+    tone = sine(997, 1.0, rate, 0.5)
+    clip = np.concatenate([np.zeros(rate // 2, np.float32), tone, np.zeros(rate, np.float32)])
+    trimmed = trim_silence(clip, rate)
+    assert tone.shape[0] <= trimmed.shape[0] <= tone.shape[0] + int(0.05 * rate)
+    assert trim_silence(np.zeros(rate, np.float32), rate).shape[0] == 0
+
+
+def test_prepare_effect_resamples_trims_and_normalizes():
+    tone = sine(440, 1.0, 44100, 0.2)
+    raw = np.concatenate([np.zeros(22050, np.float32), tone, np.zeros(22050, np.float32)])
+    data = (raw * 32767).astype("<i2").tobytes()
+
+    pcm, details = prepare_effect(data, "pcm_44100", 48000, target_lufs=-16.0)
+    assert pcm.dtype == np.float32 and pcm.shape[1] == 1
+    assert details["source_seconds"] == pytest.approx(2.0)
+    assert details["seconds"] == pytest.approx(1.0, abs=0.05)
+    assert integrated_loudness(pcm[:, 0], 48000) == pytest.approx(-16.0, abs=0.1)
+
+    assert prepare_effect(data, "mp3_44100_128", 48000) == (None, {})
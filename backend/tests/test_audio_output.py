@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services.audio_output import EffectMixer
+
+STATUS = SimpleNamespace(output_underflow=False)
+
+
+def render(mixer: EffectMixer, blocks: int = 1) -> np.ndarray:
+    out = np.zeros((blocks * mixer.blocksize, 1), dtype=np.float32)
+    for i in range(blocks):
+        block = out[i * mixer.blocksize:(i + 1) * mixer.blocksize]
+        mixer._callback(block, mixer.blocksize, None, STATUS)
+    return out[:, 0]
+
+
+def make_mixer(**kwargs) -> EffectMixer:
+    options = dict(sample_rate=1000, channels=1, blocksize=64, fade_ms=20.0, volume=1.0)
+    options.update(kwargs)
+    return EffectMixer(**options)
+
+
+def test_play_takes_effect_on_the_next_block():
+    mixer = make_mixer()
+    mixer.play(np.full(1000, 0.25, dtype=np.float32))
+    assert mixer.active_voices() == 0
+    np.testing.assert_allclose(render(mixer), 0.25)
+    assert mixer.active_voices() == 1
+
+
+def test_stolen_voice_fades_out_instead_of_cutting():
+    mixer = make_mixer(max_voices=2)
+    for _ in range(2):
+        mixer.play(np.full(1000, 0.25, dtype=np.float32))
+    render(mixer)
+    mixer.play(np.full(1000, 0.25, dtype=np.float32))
+
+    out = render(mixer)
+    assert mixer.voices_stolen == 1
+    # Three voices at first, the oldest ramping down over 20 frames
+    assert out[0] == np.float32(0.75)
+    assert np.all(np.diff(out[:21]) <= 0)
+    np.testing.assert_allclose(out[20:], 0.5)
+
+
+def test_stop_voice_fades_out():
+    mixer = make_mixer()
+    voice = mixer.play(np.full(1000, 0.5, dtype=np.float32))
+    render(mixer)
+    mixer.stop_voice(voice)
+    out = render(mixer)
+    assert out[0] == np.float32(0.5)
+    np.testing.assert_allclose(out[20:], 0.0)
+    assert mixer.active_voices() == 0
+
+
+def test_oversized_block_is_mixed_without_reallocating():
+    mixer = make_mixer(max_block_frames=32)
+    scratch = mixer._scratch
+    mixer.play(np.linspace(0.0, 0.5, 100, dtype=np.float32))
+    out = np.zeros((100, 1), dtype=np.float32)
+    mixer._callback(out, 100, None, STATUS)
+    assert mixer._scratch is scratch
+    np.testing.assert_allclose(out[:, 0], np.linspace(0.0, 0.5, 100), rtol=1e-6)
+
+
+def test_mismatched_channel_layout_is_downmixed_in_play():
+    mixer = make_mixer(channels=2)
+    surround = np.tile(np.float64([0.1, 0.2, 0.3, 0.4, 0.5, 0.6]), (200, 1))
+    mixer.play(surround)
+    out = np.zeros((mixer.blocksize, 2), dtype=np.float32)
+    mixer._callback(out, mixer.blocksize, None, STATUS)
+    np.testing.assert_allclose(out, 0.35, rtol=1e-6)
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services import device_registry
+from app.services.device_registry import (
+    AudioDevice,
+    DeviceRegistry,
+    close_stream,
+    open_stream,
+    streams_open,
+)
+
+
+def device(index: int, name: str, inputs: int = 2, outputs: int = 0) -> AudioDevice:
+    return AudioDevice(
+        id=index, key=f"ALSA:{name}", name=name, host_api="ALSA",
+        max_input_channels=inputs, max_output_channels=outputs, default_samplerate=48000.0
+    )
+
+
+class FakeStream:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.started = self.closed = False
+
+    def start(self):
+        if self.fail:
+            raise RuntimeError("device busy")
+        self.started = True
+
+    def stop(self):
+        self.started = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def portaudio(monkeypatch):
+    """Fake enumeration; records re-inits and the streams open during each"""
+    state = {"devices": (), "reinits": [], "delay": 0.0}
+
+    def reinitialize():
+        time.sleep(state["delay"])
+        state["reinits"].append(streams_open())
+
+    monkeypatch.setattr(device_registry, "_enumerate", lambda: state["devices"])
+    monkeypatch.setattr(device_registry, "_reinitialize", reinitialize)
+    return state
+
+
+def test_keys_and_names_follow_devices_across_reindexing(portaudio):
+    registry = DeviceRegistry()
+    portaudio["devices"] = (device(0, "Mic"), device(1, "Interface"))
+    asyncio.run(registry.refresh())
+    assert registry.resolve("ALSA:Interface") == 1
+
+    # A hot-plugged device shifts the indexes
+    portaudio["devices"] = (device(0, "Headset"), device(1, "Mic"), device(2, "Interface"))
+    assert asyncio.run(registry.refresh(rescan=True)) is True
+    assert registry.resolve("ALSA:Interface") == 2
+    assert registry.resolve("Mic") == 1
+    assert registry.resolve("3") == 3
+    assert registry.resolve("Unknown") == "Unknown"
+    assert registry.version == 2
+
+
+def test_output_keys_do_not_resolve_as_inputs(portaudio):
+    registry = DeviceRegistry()
+    portaudio["devices"] = (device(0, "Speakers", inputs=0, outputs=2),)
+    asyncio.run(registry.refresh())
+    assert registry.resolve("ALSA:Speakers", "output") == 0
+    assert registry.resolve("ALSA:Speakers", "input") == "ALSA:Speakers"
+
+
+def test_no_rescan_while_a_stream_is_open(portaudio):
+    registry = DeviceRegistry()
+    stream = open_stream(FakeStream)
+    try:
+        asyncio.run(registry.refresh(rescan=True))
+        assert portaudio["reinits"] == []
+    finally:
+        close_stream(stream)
+    asyncio.run(registry.refresh(rescan=True))
+    assert portaudio["reinits"] == [0]
+    assert stream.closed
+
+
+def test_stream_open_waits_for_a_running_rescan(portaudio):
+    portaudio["delay"] = 0.2
+    registry = DeviceRegistry()
+    rescan = threading.Thread(target=lambda: asyncio.run(registry.refresh(rescan=True)))
+    rescan.start()
+    time.sleep(0.05)
+    stream = open_stream(FakeStream)
+    rescan.join()
+    # The re-init saw no open stream, and the stream opened after it finished
+    assert portaudio["reinits"] == [0]
+    assert stream.started
+    close_stream(stream)
+
+
+def test_failed_start_closes_the_stream():
+    stream = FakeStream(fail=True)
+    with pytest.raises(RuntimeError):
+        open_stream(lambda: stream)
+    assert stream.closed
+    assert streams_open() == 0
@@ -0,0 +1,72 @@
+import asyncio
+
+import numpy as np
+
+from app.services.effect_library import EFFECT_CATALOG, EffectLibrary, INTENSITY_LEVELS
+
+
+class FakeService:
+    api_key = "test-key"
+    output_format = "pcm_24000"
+
+    def __init__(self):
+        self.generated = []
+
+    def cache_key(self, prompt, duration=None, influence=0.5):
+        return f"{prompt}|{duration}"
+
+    def get_cached_sound_effect(self, prompt, duration=None):
+        return None
+
+    async def generate_sound_effect(self, prompt, duration=None):
+        self.generated.append(prompt)
+        await asyncio.sleep(0.001)
+        return prompt.encode("utf-8")
+
+    async def close(self):
+        pass
+
+
+class FakeStore:
+    ingested = 0
+
+    def __init__(self):
+        self.files = {}
+
+    def load(self, key):
+        return self.files.get(key)
+
+    def ingest(self, key, data, output_format):
+        self.files[key] = np.zeros((8, 1), dtype=np.float32)
+        return self.files[key]
+
+
+def make_library() -> EffectLibrary:
+    return EffectLibrary(service=FakeService(), store=FakeStore(), variations_per_level=2)
+
+
+def test_pick_falls_back_to_the_nearest_level():
+    library = make_library()
+    clip = np.zeros((8, 1), dtype=np.float32)
+    library.variations[("cheer", "low")] = [clip]
+    library.variations[("cheer", "high")] = [clip]
+    assert library.pick("cheer", 0.4)[0] == "cheer:low:0"
+    assert library.pick("cheer", 0.6)[0] == "cheer:high:0"
+
+    library.variations[("cheer", "medium")] = [clip]
+    del library.variations[("cheer", "high")]
+    assert library.pick("cheer", 0.9)[0] == "cheer:medium:0"
+    assert library.pick("cheer", 0.1)[0] == "cheer:low:0"
+
+
+def test_on_demand_load_during_prewarm_is_not_duplicated():
+    async def scenario():
+        library = make_library()
+        await asyncio.gather(library.prewarm(), library.get_or_generate("cheer", 0.5))
+        return library
+
+    library = asyncio.run(scenario())
+    assert library.loaded == library.total
+    assert len(library.variations[("cheer", "medium")]) == library.variations_per_level
+    expected = len(EFFECT_CATALOG) * len(INTENSITY_LEVELS) * library.variations_per_level
+    assert len(library.service.generated) == expected
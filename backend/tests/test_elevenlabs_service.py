@@ -0,0 +1,115 @@
+import asyncio
+
+import httpx
+
+from app.core.config import get_settings
+from app.services.elevenlabs_service import ElevenLabsService
+from app.services.http_client import CircuitBreaker
+from app.services.sfx_cache import SoundEffectCache
+
+
+class Upstream:
+    """MockTransport handler answering with queued statuses (then 200s)"""
+
+    def __init__(self, statuses=(), release: asyncio.Event = None):
+        self.statuses = list(statuses)
+        self.release = release
+        self.calls = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        status = self.statuses.pop(0) if self.statuses else 200
+        return httpx.Response(status, content=b"audio" if status == 200 else b"")
+
+
+def make_service(tmp_path, upstream: Upstream, threshold: int = 5, retries: int = 3):
+    service = ElevenLabsService(
+        api_key="test-key",
+        cache=SoundEffectCache(str(tmp_path / "sfx"), 1 << 20),
+        base_url="http://upstream.test",
+        client=httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+    )
+    service.settings = get_settings().model_copy(update={
+        "ELEVENLABS_MAX_RETRIES": retries,
+        "ELEVENLABS_BACKOFF_BASE_SECONDS": 0.0,
+        "ELEVENLABS_DEADLINE_SECONDS": 5.0,
+    })
+    service.breaker = CircuitBreaker(failure_threshold=threshold, reset_timeout=60.0)
+    return service
+
+
+def test_identical_concurrent_requests_share_one_upstream_call(tmp_path):
+    async def scenario():
+        upstream = Upstream(release=asyncio.Event())
+        service = make_service(tmp_path, upstream)
+        callers = [
+            asyncio.create_task(service.generate_sound_effect("thunder", 2.0))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        upstream.release.set()
+        results = await asyncio.gather(*callers)
+        await service.client.aclose()
+        return upstream.calls, results
+
+    calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert results == [b"audio"] * 3
+
+
+def test_cancelling_one_caller_keeps_the_shared_request(tmp_path):
+    async def scenario():
+        upstream = Upstream(release=asyncio.Event())
+        service = make_service(tmp_path, upstream)
+        first = asyncio.create_task(service.generate_sound_effect("rain"))
+        second = asyncio.create_task(service.generate_sound_effect("rain"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0)
+        upstream.release.set()
+        result = await second
+        await service.client.aclose()
+        return upstream.calls, first.cancelled(), result
+
+    calls, cancelled, result = asyncio.run(scenario())
+    assert cancelled
+    assert (calls, result) == (1, b"audio")
+
+
+def test_transient_errors_are_retried(tmp_path):
+    async def scenario():
+        upstream = Upstream(statuses=[429, 503])
+        service = make_service(tmp_path, upstream)
+        result = await service.generate_sound_effect("wind")
+        await service.client.aclose()
+        return upstream.calls, result, service.breaker.state
+
+    assert asyncio.run(scenario()) == (3, b"audio", "closed")
+
+
+def test_client_errors_are_not_retried_and_do_not_trip_the_breaker(tmp_path):
+    async def scenario():
+        upstream = Upstream(statuses=[400])
+        service = make_service(tmp_path, upstream, threshold=1)
+        result = await service.generate_sound_effect("bad prompt")
+        await service.client.aclose()
+        return upstream.calls, result, service.breaker.state
+
+    assert asyncio.run(scenario()) == (1, None, "closed")
+
+
+def test_breaker_opens_after_repeated_failures(tmp_path):
+    async def scenario():
+        upstream = Upstream(statuses=[500] * 10)
+        service = make_service(tmp_path, upstream, threshold=2, retries=1)
+        results = [await service.generate_sound_effect(f"boom {i}") for i in range(3)]
+        await service.client.aclose()
+        return upstream.calls, results, service.breaker.state
+
+    calls, results, state = asyncio.run(scenario())
+    # Two calls of two attempts each; the third is refused without a request
+    assert calls == 4
+    assert results == [None] * 3
+    assert state == "open"
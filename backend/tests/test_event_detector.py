@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from app.services.event_detector import ONSET_EVENT, StreamingEventDetector
+
+RATE = 16000
+
+
+def chirp(seconds: float, start: float = 300.0, sweep: float = 1500.0) -> np.ndarray:
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (0.5 * np.sin(2 * np.pi * (start + sweep * t) * t)).astype(np.float32)
+
+
+def background(seconds: float) -> np.ndarray:
+    return np.random.default_rng(0).normal(0.0, 0.005, int(seconds * RATE)).astype(np.float32)
+
+
+def detect(audio: np.ndarray, block: int, clip=None):
+    detector = StreamingEventDetector(sample_rate=RATE)
+    if clip is not None:
+        detector.add_template("victory", clip, RATE)
+    events = []
+    for start in range(0, audio.shape[0], block):
+        events.extend(detector.process_block(audio[start:start + block]))
+    return events
+
+
+def test_onsets_do_not_depend_on_block_boundaries():
+    audio = background(4.0)
+    clicks = [0.8, 1.7, 2.45, 3.3]
+    for at in clicks:
+        start = int(at * RATE)
+        audio[start:start + 400] += np.random.default_rng(1).normal(0.0, 0.5, 400)
+
+    def onsets(block):
+        return [round(e.time, 6) for e in detect(audio, block) if e.name == ONSET_EVENT]
+
+    reference = onsets(audio.shape[0])
+    assert len(reference) == len(clicks)
+    for found, at in zip(reference, clicks):
+        assert found == pytest.approx(at, abs=2 * 512 / RATE)
+    # Blocks that split frames and hops anywhere give the same onsets
+    assert onsets(1000) == reference
+    assert onsets(333) == reference
+
+
+def test_template_hits_once_per_occurrence():
+    clip = chirp(0.5)
+    audio = background(5.0)
+    for at in (1.3, 3.6):
+        start = int(at * RATE)
+        audio[start:start + clip.shape[0]] += clip
+
+    hits = [e for e in detect(audio, 1024, clip) if e.name == "victory"]
+    assert [e.time for e in hits] == pytest.approx([1.3, 3.6], abs=0.05)
+    assert all(e.score >= 0.7 for e in hits)
+
+
+def test_template_misses_a_different_sound():
+    audio = background(3.0)
+    other = chirp(0.5, start=1800.0, sweep=-1500.0)
+    start = int(1.0 * RATE)
+    audio[start:start + other.shape[0]] += other
+
+    assert not [e for e in detect(audio, 1024, chirp(0.5)) if e.name == "victory"]
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import struct
+
+from app.services.event_hub import EventHub
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, data: str):
+        self.sent.append(json.loads(data))
+
+    async def send_bytes(self, data: bytes):
+        self.sent.append(data)
+
+
+def test_events_fan_out_to_every_subscriber_encoded_once():
+    async def scenario():
+        hub = EventHub()
+        text, binary = hub.subscribe("json"), hub.subscribe("binary")
+        hub.publish("trigger", {"effect": "cheer"})
+        hub.publish("meter", {"rms": 0.5, "peak": 0.9})
+        return hub, text.drain(), binary.drain()
+
+    hub, text, binary = asyncio.run(scenario())
+    assert [m.topic for m in text] == [m.topic for m in binary] == ["trigger", "meter"]
+    # Both subscribers share the same message objects
+    assert text[0] is binary[0]
+    assert json.loads(text[0].encode("json"))["data"] == {"effect": "cheer"}
+    code, _, rms, peak, _, _ = struct.unpack("<Bdffff", binary[1].encode("binary"))
+    assert (code, rms, peak) == (1, 0.5, struct.unpack("<f", struct.pack("<f", 0.9))[0])
+    assert hub.published == 2
+
+
+def test_slow_subscriber_drops_events_without_blocking_others():
+    async def scenario():
+        hub = EventHub(max_queue=3, policy="drop_oldest")
+        slow, fast = hub.subscribe(), hub.subscribe()
+        delivered = []
+        for i in range(5):
+            hub.publish("detection", {"i": i})
+            delivered.extend(m.payload["i"] for m in fast.drain())
+        for i in range(10):
+            hub.publish("meter", {"rms": i / 10})
+        return hub, slow.drain(), delivered
+
+    hub, pending, delivered = asyncio.run(scenario())
+    assert delivered == [0, 1, 2, 3, 4]
+    # Oldest detections were dropped; meters collapsed to the latest value
+    assert [m.payload for m in pending] == [{"i": 2}, {"i": 3}, {"i": 4}, {"rms": 0.9}]
+    stats = hub.stats()
+    assert (stats["dropped"], stats["coalesced"]) == (2, 18)
+
+
+def test_drop_newest_keeps_the_queued_events():
+    async def scenario():
+        hub = EventHub(max_queue=2, policy="drop_newest")
+        subscriber = hub.subscribe()
+        for i in range(4):
+            hub.publish("detection", {"i": i})
+        return subscriber.drain()
+
+    assert [m.payload["i"] for m in asyncio.run(scenario())] == [0, 1]
+
+
+def test_unsubscribed_clients_stop_receiving_and_keep_their_counts():
+    async def scenario():
+        hub = EventHub(max_queue=1)
+        leaving, staying = hub.subscribe(), hub.subscribe()
+        hub.publish("detection", {"i": 0})
+        hub.publish("detection", {"i": 1})
+        hub.unsubscribe(leaving)
+        hub.unsubscribe(leaving)
+        hub.publish("detection", {"i": 2})
+        return hub, leaving, staying
+
+    hub, leaving, staying = asyncio.run(scenario())
+    assert [m.payload["i"] for m in leaving.drain()] == [1]
+    assert [m.payload["i"] for m in staying.drain()] == [2]
+    assert hub.stats()["subscribers"] == 1
+    assert hub.stats()["dropped"] == 3
+
+
+def test_serve_sends_queued_events_in_the_subscriber_encoding():
+    async def scenario():
+        hub = EventHub()
+        subscriber = hub.subscribe("json")
+        websocket = FakeWebSocket()
+        sender = asyncio.create_task(hub.serve(websocket, subscriber))
+        hub.publish("status", {"running": True})
+        hub.publish("trigger", {"effect": "boo"})
+        await asyncio.sleep(0.01)
+        sender.cancel()
+        return websocket.sent, subscriber.sent
+
+    sent, count = asyncio.run(scenario())
+    assert [(m["type"], m["data"]) for m in sent] == [
+        ("status", {"running": True}), ("trigger", {"effect": "boo"})
+    ]
+    assert count == 2
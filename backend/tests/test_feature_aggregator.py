@@ -0,0 +1,78 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.services.feature_aggregator import (
+    DEFAULT_HORIZONS,
+    ExponentialStats,
+    MultiTimescaleAggregator,
+    rms_to_db,
+)
+
+DT = 0.02
+
+
+def feed(aggregator: MultiTimescaleAggregator, seconds: float, rms: float, pitch=None, dt=DT):
+    for _ in range(round(seconds / dt)):
+        aggregator.update(dt, rms, pitch)
+
+
+def test_horizons_follow_a_step_with_their_time_constants():
+    aggregator = MultiTimescaleAggregator()
+    feed(aggregator, 5.0, 0.01)
+    feed(aggregator, 2.0, 0.1)
+    quiet, loud = rms_to_db(0.01), rms_to_db(0.1)
+    for name, tau in DEFAULT_HORIZONS.items():
+        expected = loud + (quiet - loud) * math.exp(-2.0 / tau)
+        assert aggregator.mean("loudness_db", name) == pytest.approx(expected, abs=1e-6), name
+    # Short horizons have caught up, long ones still remember the quiet
+    assert aggregator.mean("loudness_db", "250ms") > aggregator.mean("loudness_db", "60s")
+
+
+def test_block_size_does_not_change_the_averages():
+    fine, coarse = MultiTimescaleAggregator(), MultiTimescaleAggregator()
+    for seconds, rms in ((3.0, 0.02), (1.0, 0.3), (4.0, 0.05)):
+        feed(fine, seconds, rms, dt=0.01)
+        feed(coarse, seconds, rms, dt=0.05)
+    for name in DEFAULT_HORIZONS:
+        assert fine.mean("energy", name) == pytest.approx(coarse.mean("energy", name), rel=1e-6)
+
+
+def test_warm_up_is_one_time_constant_per_horizon():
+    aggregator = MultiTimescaleAggregator()
+    assert not any(aggregator.is_warm(name) for name in DEFAULT_HORIZONS)
+    feed(aggregator, 2.0, 0.1)
+    assert [aggregator.is_warm(name) for name in DEFAULT_HORIZONS] == [True, True, False, False]
+    feed(aggregator, 58.0, 0.1)
+    assert aggregator.is_warm("60s")
+
+    aggregator.reset()
+    assert not aggregator.is_warm("250ms")
+    assert aggregator.zscore("loudness_db") == 0.0
+
+
+def test_exponential_stats_match_explicit_weights():
+    values = np.random.default_rng(0).normal(5.0, 2.0, 200)
+    alpha = 0.05
+    stats = ExponentialStats()
+    for value in values:
+        stats.update(float(value), alpha)
+
+    # The first value seeds the mean; each later one gets weight alpha
+    weights = alpha * (1 - alpha) ** np.arange(len(values) - 1)[::-1]
+    weights = np.concatenate(([(1 - alpha) ** (len(values) - 1)], weights))
+    mean = np.sum(weights * values)
+    assert stats.mean == pytest.approx(mean, rel=1e-9)
+    assert stats.std == pytest.approx(np.sqrt(np.sum(weights * (values - mean) ** 2)), rel=0.1)
+
+
+def test_zscore_flags_a_burst_and_unvoiced_blocks_skip_pitch():
+    aggregator = MultiTimescaleAggregator()
+    feed(aggregator, 30.0, 0.02, pitch=150.0)
+    steady = aggregator.zscore("loudness_db")
+    feed(aggregator, 0.5, 0.4)
+    assert abs(steady) < 0.5
+    assert aggregator.zscore("loudness_db") > 3.0
+    # No pitch during the burst: the pitch baselines are untouched
+    assert aggregator.mean("pitch_hz", "250ms") == pytest.approx(150.0)
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from app.services.feature_extractor import SpectralFeatureExtractor, estimate_pitch
+
+RATE = 16000
+FIELDS = ("rms", "zero_crossing_rate", "centroid", "rolloff", "flux", "flatness",
+          "band_energies", "mfcc", "log_mel", "magnitude")
+
+
+def signal(seconds: float = 1.0) -> np.ndarray:
+    t = np.arange(int(seconds * RATE)) / RATE
+    tone = 0.3 * np.sin(2 * np.pi * (220 + 400 * t) * t)
+    noise = np.random.default_rng(0).normal(0.0, 0.02, t.shape[0])
+    return (tone + noise).astype(np.float32)
+
+
+def make_extractor() -> SpectralFeatureExtractor:
+    # A small max_frames so long calls also exercise reallocation
+    return SpectralFeatureExtractor(sample_rate=RATE, frame_size=512, hop_size=256, max_frames=4)
+
+
+def stream(audio: np.ndarray, block: int):
+    extractor = make_extractor()
+    collected = {field: [] for field in FIELDS}
+    for start in range(0, audio.shape[0], block):
+        features = extractor.process_block(audio[start:start + block])
+        for field in FIELDS:
+            collected[field].append(getattr(features, field).copy())
+    return {field: np.concatenate(parts) for field, parts in collected.items()}
+
+
+@pytest.mark.parametrize("block", [100, 256, 1000, 4096])
+def test_process_block_matches_a_one_shot_extract(block):
+    audio = signal()
+    reference = make_extractor().extract(audio)
+    streamed = stream(audio, block)
+    assert streamed["rms"].shape[0] == reference.n_frames
+    for field in FIELDS:
+        np.testing.assert_allclose(
+            streamed[field], getattr(reference, field), rtol=1e-4, atol=1e-5, err_msg=field
+        )
+
+
+def test_extract_matches_a_direct_computation():
+    audio = signal()
+    extractor = make_extractor()
+    features = extractor.extract(audio)
+    frame = audio[10 * 256:10 * 256 + 512].astype(np.float64)
+
+    magnitude = np.abs(np.fft.rfft(frame * np.hanning(512)))
+    frequencies = np.fft.rfftfreq(512, 1.0 / RATE)
+    power = magnitude ** 2
+    assert features.rms[10] == pytest.approx(np.sqrt(np.mean(frame ** 2)), rel=1e-5)
+    assert features.centroid[10] == pytest.approx(
+        np.sum(magnitude * frequencies) / np.sum(magnitude), rel=1e-4
+    )
+    assert features.flatness[10] == pytest.approx(
+        np.exp(np.mean(np.log(power + 1e-10))) / np.mean(power), rel=1e-3
+    )
+    assert features.frame_times[10] == pytest.approx((10 * 256 + 256) / RATE)
+
+
+def test_reset_restarts_the_frame_grid():
+    audio = signal(0.2)
+    extractor = make_extractor()
+    extractor.process_block(audio[:300])
+    extractor.reset()
+    first = extractor.process_block(audio).rms.copy()
+    np.testing.assert_allclose(first, make_extractor().extract(audio).rms, rtol=1e-6)
+
+
+def test_pitch_of_a_voiced_tone():
+    t = np.arange(2048) / RATE
+    assert estimate_pitch(np.sin(2 * np.pi * 200 * t), RATE) == pytest.approx(200, rel=0.02)
+    assert estimate_pitch(np.zeros(2048), RATE) is None
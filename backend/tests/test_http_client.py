@@ -0,0 +1,35 @@
+import pytest
+
+from app.services.http_client import CircuitBreaker, CircuitOpenError
+
+
+def opened_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    return breaker
+
+
+def test_half_open_allows_a_single_trial():
+    breaker = opened_breaker()
+    assert breaker.state == "half_open"
+    assert breaker.before_call() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.before_call() is False
+
+
+def test_release_frees_a_trial_that_recorded_no_outcome():
+    breaker = opened_breaker()
+    trial = breaker.before_call()
+    # e.g. the caller was cancelled mid-request
+    breaker.release(trial)
+    assert breaker.before_call() is True
+
+
+def test_open_breaker_refuses_calls():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60.0)
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
@@ -0,0 +1,51 @@
+from app.services.keyword_matcher import KeywordAutomaton, compile_keywords
+
+
+def test_overlapping_phrases_all_match():
+    automaton = KeywordAutomaton(["good game", "game over", "over"])
+    matches = automaton.stream().feed_text("That was a good game over there")
+    assert matches == ["good game", "game over", "over"]
+
+
+def test_phrase_split_across_chunks():
+    matcher = KeywordAutomaton(["let's go", "gg"]).stream()
+    assert matcher.feed_text("okay let's") == []
+    assert matcher.feed_text("go team, GG") == ["let's go", "gg"]
+
+
+def test_unmatched_token_breaks_a_phrase():
+    matcher = KeywordAutomaton(["good game"]).stream()
+    assert matcher.feed_text("good old game") == []
+
+
+def test_reset_forgets_partial_matches():
+    matcher = KeywordAutomaton(["good game"]).stream()
+    matcher.feed_text("good")
+    matcher.reset()
+    assert matcher.feed_text("game") == []
+
+
+def test_fuzzy_matches_one_edit_away():
+    automaton = KeywordAutomaton(["clutch", "victory royale"], fuzzy=True)
+    matcher = automaton.stream()
+    assert matcher.feed_text("what a clutc") == ["clutch"]
+    assert matcher.feed_text("clutchh") == ["clutch"]
+    assert matcher.feed_text("victory roiale") == ["victory royale"]
+    # A transposition is two edits
+    assert matcher.feed_text("cltuch") == []
+
+
+def test_fuzzy_leaves_short_tokens_exact():
+    matcher = KeywordAutomaton(["gg"], fuzzy=True).stream()
+    assert matcher.feed_text("go gz gg") == ["gg"]
+
+
+def test_exact_mode_ignores_typos():
+    assert KeywordAutomaton(["clutch"]).stream().feed_text("clutc") == []
+
+
+def test_compile_is_cached_per_keyword_set():
+    first = compile_keywords(["b", "a", "a"])
+    assert compile_keywords(["a", "b"]) is first
+    assert first.keywords == ["a", "b"]
+    assert compile_keywords(["a", "b"], fuzzy=True) is not first
@@ -0,0 +1,60 @@
+import math
+
+from app.services.metrics import MetricsRegistry
+
+
+def sample_lines(text: str, name: str):
+    return [line for line in text.splitlines() if line.startswith(name)]
+
+
+def test_counters_and_gauges_render_in_prometheus_text_format():
+    registry = MetricsRegistry(namespace="test")
+    triggers = registry.counter("triggers_total", "Effects fired", ("source",))
+    triggers.inc("manual")
+    triggers.inc("auto", amount=2)
+    registry.gauge("queue_depth", "Queued events", function=lambda: {(): 7})
+
+    text = registry.render()
+    assert text.endswith("\n")
+    assert "# HELP test_triggers_total Effects fired" in text
+    assert "# TYPE test_triggers_total counter" in text
+    assert "# TYPE test_queue_depth gauge" in text
+    assert sample_lines(text, "test_triggers_total{") == [
+        'test_triggers_total{source="manual"} 1.0',
+        'test_triggers_total{source="auto"} 2.0',
+    ]
+    assert sample_lines(text, "test_queue_depth") == ["test_queue_depth 7.0"]
+
+
+def test_histogram_buckets_are_cumulative_with_sum_and_count():
+    registry = MetricsRegistry(namespace="test")
+    for seconds in (0.0004, 0.003, 0.003, 2.0, 60.0):
+        registry.observe_stage("analysis", seconds)
+
+    text = registry.render()
+    buckets = sample_lines(text, "test_stage_latency_seconds_bucket")
+    assert buckets[0] == 'test_stage_latency_seconds_bucket{stage="analysis",le="0.0001"} 0'
+    assert 'test_stage_latency_seconds_bucket{stage="analysis",le="0.0005"} 1' in buckets
+    assert 'test_stage_latency_seconds_bucket{stage="analysis",le="0.005"} 3' in buckets
+    assert 'test_stage_latency_seconds_bucket{stage="analysis",le="2.5"} 4' in buckets
+    assert buckets[-1] == 'test_stage_latency_seconds_bucket{stage="analysis",le="+Inf"} 5'
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert counts == sorted(counts)
+
+    (total,) = sample_lines(text, "test_stage_latency_seconds_sum")
+    assert math.isclose(float(total.rsplit(" ", 1)[1]), 62.0064)
+    assert sample_lines(text, "test_stage_latency_seconds_count") == [
+        'test_stage_latency_seconds_count{stage="analysis"} 5'
+    ]
+    assert registry.stage_latency.quantile(0.5, "analysis") == 0.005
+
+
+def test_label_values_are_escaped_and_failing_collectors_are_skipped():
+    registry = MetricsRegistry(namespace="test")
+    registry.xruns.inc('Mic "USB"\\1', "overflow")
+    registry.gauge("broken", "Raises at scrape time", function=lambda: 1 / 0)
+
+    text = registry.render()
+    assert 'test_audio_xruns_total{stream="Mic \\"USB\\"\\\\1",kind="overflow"} 1.0' in text
+    assert "# TYPE test_broken gauge" not in text
+    assert registry.snapshot()["values"]['audio_xruns_total.Mic "USB"\\1.overflow'] == 1.0
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from app.services.remote_ingest import (
+    FRAME_HEADER,
+    FRAME_MAGIC,
+    FRAME_VERSION,
+    IngestSession,
+    PcmFrame,
+    ReorderBuffer,
+    decode_frame,
+)
+
+
+def frame(sequence: int, frames: int = 4) -> PcmFrame:
+    samples = np.full((frames, 1), sequence % 100, dtype=np.int16)
+    return PcmFrame(sequence, 16000, 1, 1.0 / 32768.0, samples)
+
+
+def delivered(buffer: ReorderBuffer, sequences):
+    out = []
+    for sequence in sequences:
+        out.extend((ready.sequence, lost) for ready, lost in buffer.push(frame(sequence)))
+    return out
+
+
+def test_reorders_within_depth():
+    buffer = ReorderBuffer(depth=4)
+    assert delivered(buffer, [10, 12, 13, 11, 14]) == [
+        (10, 0), (11, 0), (12, 0), (13, 0), (14, 0)
+    ]
+    assert buffer.lost == 0 and buffer.waiting == 0
+
+
+def test_declares_a_gap_lost_once_depth_is_exceeded():
+    buffer = ReorderBuffer(depth=2)
+    assert delivered(buffer, [0, 3, 4]) == [(0, 0)]
+    assert delivered(buffer, [5]) == [(3, 2), (4, 0), (5, 0)]
+    assert buffer.lost == 2
+    # The missing frames arriving afterwards are late, not delivered
+    assert delivered(buffer, [1]) == []
+    assert buffer.late == 1
+
+
+def test_sequence_wraps_around():
+    top = (1 << 32) - 2
+    buffer = ReorderBuffer(depth=4)
+    assert delivered(buffer, [top, 0, top + 1, 1]) == [
+        (top, 0), (top + 1, 0), (0, 0), (1, 0)
+    ]
+    # Just before the wrap is behind, not 4 billion frames ahead
+    assert delivered(buffer, [top + 1]) == []
+    assert buffer.late == 1 and buffer.lost == 0
+
+
+def test_loss_across_the_wrap():
+    top = (1 << 32) - 1
+    buffer = ReorderBuffer(depth=1)
+    assert delivered(buffer, [top, 1, 2]) == [(top, 0), (1, 1), (2, 0)]
+    assert buffer.lost == 1
+
+
+def test_resyncs_after_a_run_of_late_frames():
+    buffer = ReorderBuffer(depth=2)
+    delivered(buffer, [1000, 1001])
+    # Sender restarted its counter
+    assert delivered(buffer, [0, 1]) == []
+    assert delivered(buffer, [2]) == [(2, 0)]
+    assert delivered(buffer, [3]) == [(3, 0)]
+
+
+def test_duplicates_are_dropped():
+    buffer = ReorderBuffer(depth=4)
+    assert delivered(buffer, [5, 7, 7, 6]) == [(5, 0), (6, 0), (7, 0)]
+    assert buffer.late == 1
+
+
+def message(samples: np.ndarray, fmt: int = 1, sequence: int = 0, rate: int = 48000) -> bytes:
+    header = FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, fmt, samples.shape[1], rate, sequence)
+    return header + samples.tobytes()
+
+
+def test_decode_frame_views_the_payload():
+    samples = np.arange(12, dtype="<i2").reshape(6, 2)
+    decoded = decode_frame(message(samples, sequence=7))
+    assert (decoded.sequence, decoded.sample_rate, decoded.channels) == (7, 48000, 2)
+    np.testing.assert_array_equal(decoded.samples, samples)
+    assert decoded.scale == 1.0 / 32768.0
+
+
+@pytest.mark.parametrize("data", [
+    b"SSPC",
+    b"XXXX" + message(np.zeros((2, 1), dtype="<i2"))[4:],
+    message(np.zeros((2, 1), dtype="<i2"), fmt=9),
+    message(np.zeros((2, 1), dtype="<i2"), rate=1000),
+    message(np.zeros((2, 2), dtype="<i2"))[:-1],
+])
+def test_decode_frame_rejects_malformed_messages(data):
+    with pytest.raises(ValueError):
+        decode_frame(data)
+
+
+def test_session_reports_arousal_once_its_baseline_is_warm():
+    session = IngestSession("test", detectors=("events",))
+    # A tone, so the activity gate opens (it ignores noise-like audio)
+    tone = np.sin(2 * np.pi * 220 * np.arange(2400 * 60) / 48000) * 8000
+    arousal = []
+    for sequence in range(60):  # 3 s of 50 ms frames
+        samples = tone[sequence * 2400:(sequence + 1) * 2400].astype("<i2").reshape(-1, 1)
+        if session.receive(message(samples, sequence=sequence)):
+            taken = session.take_window()
+            if taken is not None:
+                window, end, _, _ = taken
+                arousal.append(session.analyze(window, end)["arousal"])
+
+    assert arousal[0] is None
+    assert arousal[-1] is not None
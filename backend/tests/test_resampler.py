@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from app.services.resampler import AnalysisFrontEnd, PolyphaseResampler
+
+
+def noise(frames: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).uniform(-0.5, 0.5, frames).astype(np.float32)
+
+
+@pytest.mark.parametrize("in_rate,out_rate", [(48000, 16000), (44100, 16000), (16000, 44100)])
+def test_block_invariance(in_rate, out_rate):
+    signal = noise(in_rate // 2)
+    whole = PolyphaseResampler(in_rate, out_rate).process(signal)
+
+    resampler = PolyphaseResampler(in_rate, out_rate)
+    parts = []
+    position = 0
+    for size in (1, 7, 256, 1000, 33, 4096, 5):
+        parts.append(resampler.process(signal[position:position + size]))
+        position += size
+    parts.append(resampler.process(signal[position:]))
+
+    np.testing.assert_allclose(np.concatenate(parts), whole, atol=1e-6)
+    assert resampler.samples_out == resampler.output_count(signal.shape[0])
+
+
+def test_passband_tone_survives_and_alias_is_rejected():
+    in_rate, out_rate = 48000, 16000
+    t = np.arange(in_rate) / in_rate
+    resampler = PolyphaseResampler(in_rate, out_rate)
+    delay = int(np.ceil(resampler.delay * out_rate / in_rate)) + 64
+
+    passband = resampler.process(np.sin(2 * np.pi * 1000 * t).astype(np.float32))[delay:]
+    assert np.sqrt(np.mean(passband ** 2)) == pytest.approx(np.sqrt(0.5), rel=0.01)
+
+    # 12 kHz would fold to 4 kHz at 16 kHz; it must be filtered out
+    stopband = PolyphaseResampler(in_rate, out_rate).process(
+        np.sin(2 * np.pi * 12000 * t).astype(np.float32)
+    )[delay:]
+    assert 20 * np.log10(np.sqrt(np.mean(stopband ** 2)) + 1e-12) < -60
+
+
+def test_front_end_restarts_after_a_gap():
+    front_end = AnalysisFrontEnd(48000, 16000, buffer_seconds=1.0, max_block=1024)
+    front_end.process(noise(960).reshape(-1, 1), 0)
+    assert front_end.position(960) == 320
+
+    # 480 capture frames were lost; positions resume from the new block
+    front_end.process(noise(960, seed=1).reshape(-1, 1), 1440)
+    assert front_end.position(2400) == 640
+    window, end = front_end.window(2400, 640)
+    assert end == 640
+    assert window.shape == (640, 1)
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from app.services.ring_buffer import AudioRingBuffer
+
+
+def ramp(start: int, frames: int, channels: int = 1) -> np.ndarray:
+    """Frames whose value is their absolute index, so positions are checkable"""
+    values = np.arange(start, start + frames, dtype=np.float32)
+    return np.repeat(values[:, None], channels, axis=1)
+
+
+def test_reads_are_contiguous_across_the_wrap():
+    buffer = AudioRingBuffer(capacity=10, channels=2)
+    written = 0
+    for size in (7, 6, 5, 9, 3):
+        assert buffer.write(ramp(written, size, 2)) == size
+        written += size
+        block = buffer.read(size)
+        np.testing.assert_array_equal(block, ramp(written - size, size, 2))
+        # Views straight into the mirrored storage, never copies
+        assert block.base is not None
+    assert buffer.write_index == buffer.read_index == written
+
+
+def test_window_and_latest_span_the_wrap():
+    buffer = AudioRingBuffer(capacity=8)
+    buffer.write(ramp(0, 6))
+    buffer.write(ramp(6, 5))  # wraps at frame 8
+
+    np.testing.assert_array_equal(buffer.latest(8), ramp(3, 8))
+    np.testing.assert_array_equal(buffer.window(10, 4), ramp(6, 4))
+    # Overwritten or not yet written
+    assert buffer.window(4, 4) is None
+    assert buffer.window(12, 4) is None
+
+
+def test_drop_oldest_skips_overwritten_frames():
+    buffer = AudioRingBuffer(capacity=8)
+    buffer.write(ramp(0, 6))
+    buffer.write(ramp(6, 6))
+
+    assert buffer.overrun_frames == 4
+    assert buffer.available() == 8
+    np.testing.assert_array_equal(buffer.read(8), ramp(4, 8))
+
+
+def test_drop_newest_keeps_unread_frames():
+    buffer = AudioRingBuffer(capacity=8, overrun_policy="drop_newest")
+    buffer.write(ramp(0, 6))
+    assert buffer.write(ramp(6, 6)) == 2
+
+    assert buffer.overrun_frames == 4
+    np.testing.assert_array_equal(buffer.read(8), ramp(0, 8))
+
+
+def test_oversized_block_keeps_its_newest_frames():
+    buffer = AudioRingBuffer(capacity=8)
+    assert buffer.write(ramp(0, 20)) == 8
+    np.testing.assert_array_equal(buffer.read(8), ramp(12, 8))
+
+
+def test_reads_larger_than_capacity_are_rejected():
+    buffer = AudioRingBuffer(capacity=8)
+    with pytest.raises(ValueError):
+        buffer.read(9)
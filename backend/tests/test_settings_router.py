@@ -0,0 +1,23 @@
+import asyncio
+import threading
+
+from app.routers.settings import _device_executor, _switch_device
+
+
+def test_device_switches_leave_the_event_loop_in_order():
+    calls = []
+
+    def switch(device_id):
+        calls.append((device_id, threading.current_thread() is threading.main_thread()))
+
+    async def scenario():
+        for device_id in ("a", "b", "c"):
+            _switch_device(switch, device_id)
+        await asyncio.get_running_loop().run_in_executor(_device_executor, lambda: None)
+
+    asyncio.run(scenario())
+    assert calls == [("a", False), ("b", False), ("c", False)]
+
+    # Without an event loop (scripts) the switch runs inline
+    _switch_device(switch, "d")
+    assert calls[-1] == ("d", True)
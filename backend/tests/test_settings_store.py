@@ -0,0 +1,58 @@
+import asyncio
+import json
+import stat
+
+from app.services.settings_store import SettingsStore
+
+
+def test_updates_are_debounced_into_one_atomic_write(tmp_path):
+    path = tmp_path / "settings.json"
+
+    async def scenario():
+        store = SettingsStore(str(path), debounce_seconds=0.05)
+        for volume in (0.1, 0.2, 0.3):
+            store.update({"effect_volume": volume})
+        pending = store.stats()
+        await asyncio.sleep(0.1)
+        await store._flush_task
+        return store, pending
+
+    store, pending = asyncio.run(scenario())
+    assert (pending["writes"], pending["coalesced"], pending["pending"]) == (0, 2, 1)
+    assert (store.writes, store.stats()["pending"]) == (1, 0)
+    assert json.loads(path.read_text())["settings"]["effect_volume"] == 0.3
+    assert [p.name for p in tmp_path.iterdir()] == ["settings.json"]
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+
+
+def test_listeners_get_only_changed_keys(tmp_path):
+    store = SettingsStore(str(tmp_path / "settings.json"))
+    everything, volume_only = [], []
+    store.subscribe(everything.append)
+    store.subscribe(volume_only.append, keys=["effect_volume"])
+
+    store.update({"effect_volume": 0.8, "trigger_sensitivity": 0.7})
+    store.update({"effect_volume": 0.4})
+    store.update({"effect_volume": 0.4})
+    assert everything == [{"trigger_sensitivity": 0.7}, {"effect_volume": 0.4}]
+    assert volume_only == [{"effect_volume": 0.4}]
+
+
+def test_profiles_never_hold_the_api_key(tmp_path):
+    path = tmp_path / "settings.json"
+    store = SettingsStore(str(path))
+    store.update({"elevenlabs_api_key": "secret", "effect_volume": 0.3})
+    store.save_profile("quiet")
+    store.update({"elevenlabs_api_key": "rotated", "effect_volume": 0.9})
+
+    assert store.load_profile("quiet") == {"effect_volume": 0.3}
+    assert store.settings["elevenlabs_api_key"] == "rotated"
+    assert "secret" not in path.read_text()
+
+    # Profiles saved by older versions lose the key on load
+    document = json.loads(path.read_text())
+    document["profiles"]["old"] = {"elevenlabs_api_key": "leaked", "effect_volume": 0.5}
+    path.write_text(json.dumps(document))
+    reloaded = SettingsStore(str(path))
+    assert reloaded.load_profile("old") == {"effect_volume": 0.5}
+    assert reloaded.settings["elevenlabs_api_key"] == "rotated"
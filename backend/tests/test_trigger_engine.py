@@ -0,0 +1,29 @@
+import pytest
+
+from app.services.effect_library import EFFECT_CATALOG
+from app.services.trigger_engine import DEFAULT_RULES, TriggerEngine, TriggerRule
+
+
+def test_default_rules_only_use_catalog_effects():
+    for rule in DEFAULT_RULES:
+        TriggerRule.from_dict(dict(rule), effects=EFFECT_CATALOG)
+
+
+def test_unknown_effect_is_rejected():
+    with pytest.raises(ValueError, match="unknown effect"):
+        TriggerRule.from_dict(
+            {"name": "x", "effect": "kazoo", "events": ["victory"]}, effects=EFFECT_CATALOG
+        )
+
+
+def test_arousal_gates_excited_rules():
+    engine = TriggerEngine(sensitivity=0.5)
+    assert engine.evaluate("excited", 0.9, [], [], arousal=0.1, now=0.0) is None
+    decision = engine.evaluate("excited", 0.9, [], [], arousal=3.0, now=1.0)
+    assert decision is not None and decision.effect == "cheer"
+
+
+def test_missing_baseline_falls_back_to_confidence():
+    engine = TriggerEngine(sensitivity=0.5)
+    decision = engine.evaluate("excited", 0.9, [], [], arousal=None, now=0.0)
+    assert decision is not None and decision.effect == "cheer"
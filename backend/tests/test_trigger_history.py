@@ -0,0 +1,98 @@
+import time
+
+from app.services.trigger_history import TriggerHistory
+
+
+def open_history(path, **kwargs) -> TriggerHistory:
+    options = {"segment_records": 4, "retention_days": 1.0, "max_segments": 100}
+    options.update(kwargs)
+    return TriggerHistory(str(path), **options)
+
+
+def fill(history: TriggerHistory, timestamps):
+    for i, timestamp in enumerate(timestamps):
+        history.append(f"cheer:high:{i}", 0.8, "auto", "hype", timestamp=timestamp)
+
+
+def settle(history: TriggerHistory):
+    """Wait for the retention pass that rotation starts in the background"""
+    if history._maintenance is not None:
+        history._maintenance.join()
+
+
+def test_appends_rotate_and_survive_reopening(tmp_path):
+    history = open_history(tmp_path)
+    now = time.time()
+    fill(history, [now + i for i in range(10)])
+    assert history.stats()["segments"] == 3
+    newest = history.last(3)
+    history.close()
+
+    reopened = open_history(tmp_path, tail_size=2)
+    assert reopened.stats()["records"] == 10
+    assert reopened.last(3) == [
+        {**record, "intensity": round(record["intensity"], 4)} for record in newest
+    ]
+    reopened.append("boo:low:0", timestamp=now + 10)
+    assert reopened.last(1)[0]["effect_id"] == "boo:low:0"
+    reopened.close()
+
+
+def test_range_spans_segments_newest_first(tmp_path):
+    history = open_history(tmp_path)
+    now = time.time()
+    fill(history, [now + i for i in range(10)])
+    records = history.range(since=now + 2, until=now + 7, limit=50)
+    assert [r["timestamp"] for r in records] == [now + i for i in range(6, 1, -1)]
+    assert [r["effect_id"] for r in history.range(since=now + 8)] == [
+        "cheer:high:9", "cheer:high:8"
+    ]
+    assert len(history.range(limit=3)) == 3
+    history.close()
+
+
+def test_retention_deletes_and_compacts_expired_records(tmp_path):
+    history = open_history(tmp_path)
+    day = 86400
+    now = time.time()
+    # Segment 1 fully expired, segment 2 straddles the cutoff, segment 3 active
+    fill(history, [now - 3 * day, now - 2.5 * day, now - 2 * day, now - 1.5 * day,
+                   now - 1.2 * day, now - 1.1 * day, now - 0.5 * day, now - 0.4 * day,
+                   now - 0.1 * day])
+    settle(history)
+    history.apply_retention()
+
+    stats = history.stats()
+    assert (stats["segments"], stats["records"]) == (2, 3)
+    assert stats["oldest"] == now - 0.5 * day
+    assert [r["timestamp"] for r in history.range(limit=50)] == [
+        now - 0.1 * day, now - 0.4 * day, now - 0.5 * day
+    ]
+    history.close()
+
+    reopened = open_history(tmp_path)
+    assert reopened.stats()["records"] == 3
+    assert not list(tmp_path.glob("*.tmp"))
+    reopened.close()
+
+
+def test_count_limit_removes_the_oldest_segments(tmp_path):
+    history = open_history(tmp_path, max_segments=2)
+    now = time.time()
+    fill(history, [now + i for i in range(12)])
+    settle(history)
+    history.apply_retention()
+    assert history.stats()["segments"] == 2
+    assert history.range(limit=50)[-1]["timestamp"] == now + 4
+    history.close()
+
+
+def test_ids_are_truncated_on_utf8_character_boundaries(tmp_path):
+    history = open_history(tmp_path)
+    effect_id = "cheer:" + "é" * 20
+    history.append(effect_id, rule="ü" * 13)
+    in_memory = history.last(1)[0]
+    on_disk = history.range(limit=1)[0]
+    assert in_memory["effect_id"] == on_disk["effect_id"] == "cheer:" + "é" * 9
+    assert in_memory["rule"] == on_disk["rule"] == "ü" * 12
+    history.close()
@@ -0,0 +1,100 @@
+import struct
+import wave
+
+import numpy as np
+import pytest
+
+from app.services.vod_analyzer import VodAnalyzer, analyze_chunk, read_wav_info
+
+RATE = 16000
+
+
+def write_wav(path, audio: np.ndarray):
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes((np.clip(audio, -1.0, 1.0) * 32767).astype("<i2").tobytes())
+
+
+def chirp(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * RATE)) / RATE
+    return 0.5 * np.sin(2 * np.pi * (300 + 1500 * t) * t)
+
+
+@pytest.fixture
+def recording(tmp_path):
+    """24 s of quiet noise with the event clip at 3.1 s, 9.8 s (across the
+    10 s chunk boundary) and 17.3 s, plus its template directory"""
+    templates = tmp_path / "templates"
+    templates.mkdir()
+    clip = chirp(0.5)
+    write_wav(templates / "victory.wav", clip)
+
+    audio = np.random.default_rng(0).normal(0.0, 0.01, 24 * RATE)
+    for at in (3.1, 9.8, 17.3):
+        start = int(at * RATE)
+        audio[start:start + clip.shape[0]] += clip
+    path = tmp_path / "vod.wav"
+    write_wav(path, audio)
+    return str(path), str(templates)
+
+
+def run(path: str, templates: str, chunk_seconds: float):
+    analyzer = VodAnalyzer(chunk_seconds=chunk_seconds, event_template_dir=templates)
+    info = read_wav_info(path)
+    bounds, params = analyzer._plan(info)
+    chunks = [analyze_chunk(info, start, end, params) for start, end in bounds]
+    timeline = [entry for chunk in chunks for entry in chunk["timeline"]]
+    events = [event for chunk in chunks for event in chunk["events"]]
+    return len(bounds), timeline, events
+
+
+def test_chunked_analysis_matches_a_single_pass(recording):
+    path, templates = recording
+    single_chunks, single_timeline, single_events = run(path, templates, 60.0)
+    split_chunks, split_timeline, split_events = run(path, templates, 10.0)
+    assert (single_chunks, split_chunks) == (1, 3)
+
+    # Every hop exactly once, with the same window contents
+    assert [e["time"] for e in split_timeline] == [e["time"] for e in single_timeline]
+    for split, single in zip(split_timeline, single_timeline):
+        for key in ("rms", "peak", "spectral_centroid", "emotion", "confidence"):
+            assert split[key] == pytest.approx(single[key]), (split["time"], key)
+
+    # Events near a boundary are reported once, by the chunk they start in
+    def by_time(events):
+        return sorted((round(e["time"], 6), e["name"]) for e in events)
+
+    assert by_time(split_events) == by_time(single_events)
+    assert [name for _, name in by_time(single_events)].count("victory") == 3
+
+
+def write_header(path, channels: int, rate: int, block_align: int, bits: int):
+    fmt = struct.pack("<HHIIHH", 1, channels, rate, rate * block_align, block_align, bits)
+    data = b"\0" * 64
+    path.write_bytes(
+        b"RIFF" + struct.pack("<I", 4 + 8 + len(fmt) + 8 + len(data)) + b"WAVE"
+        + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+        + b"data" + struct.pack("<I", len(data)) + data
+    )
+
+
+@pytest.mark.parametrize("channels, rate, block_align, bits", [
+    (1, RATE, 0, 16),
+    (0, RATE, 0, 16),
+    (2, RATE, 2, 16),
+    (1, 0, 2, 16),
+])
+def test_inconsistent_fmt_chunk_is_rejected(tmp_path, channels, rate, block_align, bits):
+    path = tmp_path / "bad.wav"
+    write_header(path, channels, rate, block_align, bits)
+    with pytest.raises(ValueError):
+        read_wav_info(str(path))
+
+
+def test_valid_header_is_parsed(tmp_path):
+    path = tmp_path / "ok.wav"
+    write_header(path, 2, RATE, 4, 16)
+    info = read_wav_info(str(path))
+    assert (info.channels, info.sample_rate, info.frames) == (2, RATE, 16)